@@ -0,0 +1,225 @@
+"""
+Micro-benchmarks for the CPU hot paths
+Times community and event match ranking at several catalogue sizes, cosine
+similarity, profile text generation, serialize_doc, JWT encode/verify and bcrypt
+on fixed synthetic inputs (seeded, so runs are comparable).
+
+    python benchmarks.py [--sizes 100,1000,10000] [--filter matches] [--save-baseline]
+    python benchmarks.py --max-regression 20   # exit 1 if anything is >20% slower than the baseline
+
+The gate compares each benchmark's best per-call time with the baseline file
+(written by --save-baseline on the same machine).
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+from bson import ObjectId
+
+# server.py reads these at import; nothing here talks to MongoDB
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'community_matching_db')
+
+import server  # noqa: E402
+from db_admin import serialize_doc  # noqa: E402
+from game_scoring import PREFERENCE_LABELS, PROFILE_KEYS  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+
+ROOT_DIR = Path(__file__).parent
+BASELINE_PATH = ROOT_DIR.parent / "test_reports" / "benchmarks" / "baseline.json"
+
+SEED = 42
+REPEATS = 5
+EMBEDDING_DIM = 768  # BAAI/bge-base-en-v1.5, the HuggingFace embedding model
+
+
+def random_profile(rng: np.random.Generator) -> dict:
+    return {key: float(value) for key, value in zip(PROFILE_KEYS, rng.random(len(PROFILE_KEYS)).round(2))}
+
+
+def synthetic_communities(rng: np.random.Generator, count: int) -> list:
+    return [
+        {
+            "community_id": f"comm_{i:08x}",
+            "name": f"Community {i}",
+            "description": "A synthetic community for benchmarking",
+            "value_profile": random_profile(rng),
+            "environment_settings": {"size": "medium", "interaction_style": "balanced"},
+            "member_count": int(rng.integers(0, 500)),
+        }
+        for i in range(count)
+    ]
+
+
+def synthetic_events(rng: np.random.Generator, count: int, now: datetime) -> list:
+    return [
+        {
+            "event_id": f"event_{i:08x}",
+            "name": f"Event {i}",
+            "description": "A synthetic event for benchmarking",
+            "event_type": "meetup",
+            # A tenth are already over, as in a live catalogue
+            "date": now + timedelta(days=int(rng.integers(-3, 27))),
+            "location": "Online",
+            "value_profile": random_profile(rng),
+            "attendees": [f"user_{j}" for j in range(int(rng.integers(0, 20)))],
+            "attendee_count": 0,
+            "tags": ["benchmark"],
+        }
+        for i in range(count)
+    ]
+
+
+def synthetic_summary(rng: np.random.Generator, communities: list, now: datetime) -> dict:
+    """Joined ~5% and skipped ~10% of the catalogue"""
+    ids = [community["community_id"] for community in communities]
+    picked = rng.permutation(len(ids))
+    joined = picked[:len(ids) // 20]
+    skipped = picked[len(ids) // 20:len(ids) // 20 + len(ids) // 10]
+    return {
+        "joined": {ids[i]: now for i in joined},
+        "skipped": {ids[i]: now - timedelta(days=int(rng.integers(0, 60))) for i in skipped},
+    }
+
+
+def synthetic_documents(rng: np.random.Generator, count: int) -> list:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": f"user_{i:08x}",
+            "created_at": now,
+            "value_profile": random_profile(rng),
+            "members": [f"user_{j}" for j in range(10)],
+            "nested": {"score": float(rng.random()), "tags": ["a", "b", "c"]},
+        }
+        for i in range(count)
+    ]
+
+
+def build_benchmarks(sizes):
+    """(name, callable) pairs; every input is built here, outside the timed calls"""
+    rng = np.random.default_rng(SEED)
+    now = datetime.now(timezone.utc)
+    profile = random_profile(rng)
+    user = server.User(
+        user_id="user_benchmark", email="benchmark@example.com", name="Benchmark",
+        created_at=now, value_profile=profile
+    )
+    benchmarks = []
+
+    for size in sizes:
+        communities = synthetic_communities(rng, size)
+        summary = synthetic_summary(rng, communities, now)
+        events = synthetic_events(rng, size, now)
+        benchmarks += [
+            (f"community_matches[{size}]",
+             lambda c=communities, s=summary: server.rank_community_matches(profile, c, s, mmr_lambda=1.0)),
+            (f"community_matches_mmr[{size}]",
+             lambda c=communities, s=summary: server.rank_community_matches(profile, c, s, mmr_lambda=server.MMR_LAMBDA)),
+            (f"event_matches[{size}]",
+             lambda e=events: server.rank_event_matches(user, e, now)),
+        ]
+
+    a, b = rng.random(EMBEDDING_DIM).tolist(), rng.random(EMBEDDING_DIM).tolist()
+    preferences = {key: labels[0] for key, labels in PREFERENCE_LABELS.items()}
+    documents = synthetic_documents(rng, 100)
+    token = server.create_access_token({"user_id": user.user_id})
+    request = Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]})
+    password_hash = server.hash_password("benchmark-password")
+
+    benchmarks += [
+        (f"cosine_similarity[{EMBEDDING_DIM}]", lambda: server.cosine_similarity(a, b)),
+        ("generate_profile_text", lambda: server.generate_profile_text(profile, preferences)),
+        ("serialize_doc[100 docs]", lambda: serialize_doc(documents)),
+        ("jwt_encode", lambda: server.create_access_token({"user_id": user.user_id})),
+        ("jwt_verify", lambda: server.has_valid_jwt(request)),
+        ("bcrypt_hash", lambda: server.hash_password("benchmark-password")),
+        ("bcrypt_verify", lambda: server.verify_password("benchmark-password", password_hash)),
+    ]
+    return benchmarks
+
+
+def measure(fn) -> dict:
+    """Per-call times over REPEATS runs of a batch sized by timeit's autorange (>= 0.2 s)"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    per_call = np.array(timer.repeat(repeat=REPEATS, number=number)) / number * 1e6
+    return {
+        "best_us": round(float(per_call.min()), 2),
+        "median_us": round(float(np.median(per_call)), 2),
+        "calls": number * REPEATS,
+    }
+
+
+def format_us(us: float) -> str:
+    if us >= 1e6:
+        return f"{us / 1e6:.2f} s"
+    if us >= 1e3:
+        return f"{us / 1e3:.2f} ms"
+    return f"{us:.2f} µs"
+
+
+def run(sizes, name_filter: str = "", baseline=None, max_regression: float = None):
+    results = {}
+    regressions = []
+    print(f"{'benchmark':32} {'best':>12} {'median':>12}  vs baseline")
+    for name, fn in build_benchmarks(sizes):
+        if name_filter and name_filter not in name:
+            continue
+        result = measure(fn)
+        results[name] = result
+
+        comparison = ""
+        previous = (baseline or {}).get(name)
+        if previous:
+            change = (result["best_us"] / previous["best_us"] - 1) * 100
+            comparison = f"{change:+.1f}%"
+            if max_regression is not None and change > max_regression:
+                regressions.append((name, change))
+                comparison += " ❌"
+        print(f"{name:32} {format_us(result['best_us']):>12} {format_us(result['median_us']):>12}  {comparison}")
+    return results, regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for scoring, serialization and auth hot paths")
+    parser.add_argument("--sizes", default="100,1000,10000", help="catalogue sizes for the match benchmarks")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--max-regression", type=float, help="fail if a benchmark is this many percent slower")
+    parser.add_argument("--output", help="also write this run's results as JSON here")
+    args = parser.parse_args()
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text())["results"] if baseline_path.exists() else None
+    if args.max_regression is not None and baseline is None:
+        print(f"⚠️ No baseline at {baseline_path}; run with --save-baseline first")
+        sys.exit(2)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    results, regressions = run(sizes, args.filter, baseline, args.max_regression)
+
+    report = {"timestamp": datetime.now(timezone.utc).isoformat(), "sizes": sizes, "results": results}
+    for path in filter(None, [args.output, baseline_path if args.save_baseline else None]):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path == baseline_path and baseline:
+            # Keep entries for benchmarks this run skipped (--filter / --sizes)
+            report["results"] = {**baseline, **results}
+        path.write_text(json.dumps(report, indent=2))
+        print(f"\n💾 Saved results to {path}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) regressed by more than {args.max_regression}%:")
+        for name, change in regressions:
+            print(f"   {name}: {change:+.1f}%")
+        sys.exit(1)
+    if args.max_regression is not None:
+        print(f"\n✅ No benchmark regressed by more than {args.max_regression}%")
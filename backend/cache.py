@@ -0,0 +1,89 @@
+"""
+In-process caches
+Bounded LRU cache with TTL, version-checked entries and hit/miss metrics, plus
+catalogue version counters that writes bump to invalidate derived results
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+import time
+
+from metrics import REGISTRY, Counter, Gauge
+
+CACHE_HITS = REGISTRY.register(Counter("cache_hits_total", "Cache hits", ("cache",)))
+CACHE_MISSES = REGISTRY.register(Counter("cache_misses_total", "Cache misses (absent, expired or stale)", ("cache",)))
+CACHE_EVICTIONS = REGISTRY.register(Counter("cache_evictions_total", "Entries evicted to stay within maxsize", ("cache",)))
+CACHE_ENTRIES = REGISTRY.register(Gauge("cache_entries", "Entries currently held", ("cache",)))
+
+MISSING = object()
+
+
+class TTLCache:
+    """LRU cache bounded by entry count; entries expire after `ttl` seconds or when their version changes.
+    Values computed concurrently with an invalidate() must include generation(key), read before
+    computing, in their version; otherwise a slow computation could cache pre-write data."""
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._labels = (name,)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._generations: "OrderedDict[Hashable, int]" = OrderedDict()  # recently invalidated keys
+        self._last_generation = 0
+
+    def get(self, key: Hashable, version: Any = None) -> Any:
+        """Cached value, or MISSING if absent, expired or cached under a different version"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, entry_version, value = entry
+            if expires_at > time.monotonic() and entry_version == version:
+                self._entries.move_to_end(key)
+                CACHE_HITS.inc(self._labels)
+                return value
+            del self._entries[key]
+            CACHE_ENTRIES.set(len(self._entries), self._labels)
+        CACHE_MISSES.inc(self._labels)
+        return MISSING
+
+    def set(self, key: Hashable, value: Any, version: Any = None):
+        self._entries[key] = (time.monotonic() + self.ttl, version, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            CACHE_EVICTIONS.inc(self._labels)
+        CACHE_ENTRIES.set(len(self._entries), self._labels)
+
+    def generation(self, key: Hashable) -> int:
+        """Changes on every invalidate(key) (only the last `maxsize` invalidated keys are tracked)"""
+        return self._generations.get(key, 0)
+
+    def invalidate(self, key: Hashable):
+        self._last_generation += 1
+        self._generations[key] = self._last_generation
+        self._generations.move_to_end(key)
+        if len(self._generations) > self.maxsize:
+            self._generations.popitem(last=False)
+        if self._entries.pop(key, None) is not None:
+            CACHE_ENTRIES.set(len(self._entries), self._labels)
+
+    def clear(self):
+        self._entries.clear()
+        self._generations.clear()
+        CACHE_ENTRIES.set(0, self._labels)
+
+
+class CatalogueVersions:
+    """Per-catalogue counters bumped whenever items are added or changed (per process)"""
+
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+
+    def get(self, catalogue: str) -> int:
+        return self._versions.get(catalogue, 0)
+
+    def bump(self, catalogue: str) -> int:
+        self._versions[catalogue] = self._versions.get(catalogue, 0) + 1
+        return self._versions[catalogue]
+
+
+catalogue_versions = CatalogueVersions()
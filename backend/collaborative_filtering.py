@@ -0,0 +1,185 @@
+"""
+Collaborative-filtering recommender trained from user_actions
+Training builds a sparse user x community matrix (join = +1, skip = -0.5) and
+factorizes it with truncated SVD; serving loads the factor file and scores
+communities with one dot product per request.
+
+    python collaborative_filtering.py [--factors 32] [--output .cache/cf_model.npz]
+"""
+from array import array
+from pathlib import Path
+from typing import Optional, Sequence
+import argparse
+import asyncio
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parent
+CF_MODEL_PATH = Path(os.environ.get('CF_MODEL_PATH', ROOT_DIR / '.cache' / 'cf_model.npz'))
+CF_RELOAD_INTERVAL = 60  # seconds between checks for a newer model file
+
+ACTION_WEIGHTS = {"join": 1.0, "skip": -0.5}
+
+
+class CFModel:
+    """Trained factors with sorted id arrays, so lookups are binary searches rather than big dicts"""
+
+    def __init__(self, user_ids: np.ndarray, item_ids: np.ndarray,
+                 user_factors: np.ndarray, item_factors: np.ndarray):
+        self.user_ids = user_ids
+        self.item_ids = item_ids
+        self.user_factors = user_factors
+        self.item_factors = item_factors
+
+    @classmethod
+    def load(cls, path: Path) -> "CFModel":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["user_ids"], data["item_ids"], data["user_factors"], data["item_factors"])
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+        np.savez(
+            tmp_path,
+            user_ids=self.user_ids, item_ids=self.item_ids,
+            user_factors=self.user_factors, item_factors=self.item_factors
+        )
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _positions(sorted_ids: np.ndarray, ids: Sequence[str]) -> np.ndarray:
+        """Row index per id, -1 where the id was not in the training data"""
+        if len(sorted_ids) == 0:
+            return np.full(len(ids), -1)
+        # Own width, not the model's: casting to its <U n would truncate longer ids into a false match
+        wanted = np.asarray(ids, dtype=str)
+        positions = np.searchsorted(sorted_ids, wanted)
+        positions = np.minimum(positions, len(sorted_ids) - 1)
+        return np.where(sorted_ids[positions] == wanted, positions, -1)
+
+    def score(self, user_id: str, item_ids: Sequence[str]) -> Optional[np.ndarray]:
+        """0-100 CF score per item (NaN for unseen items), or None for a user the model hasn't seen"""
+        user_row = self._positions(self.user_ids, [user_id])[0]
+        if user_row < 0 or not len(item_ids):
+            return None
+        item_rows = self._positions(self.item_ids, item_ids)
+        known = item_rows >= 0
+        scores = np.full(len(item_ids), np.nan)
+        raw = self.item_factors[item_rows[known]] @ self.user_factors[user_row]
+        scores[known] = 50 + 50 * np.clip(raw, -1.0, 1.0)
+        return scores
+
+
+_model: Optional[CFModel] = None
+_model_mtime: Optional[float] = None
+_model_checked_at: Optional[float] = None
+_model_lock = threading.Lock()
+
+
+def get_model() -> Optional[CFModel]:
+    """Currently deployed model, reloaded when the file on disk changes; None if not trained yet"""
+    global _model, _model_mtime, _model_checked_at
+    now = time.monotonic()
+    if _model_checked_at is not None and now - _model_checked_at < CF_RELOAD_INTERVAL:
+        return _model
+    with _model_lock:
+        _model_checked_at = now
+        try:
+            mtime = CF_MODEL_PATH.stat().st_mtime
+        except OSError:
+            return _model
+        if mtime != _model_mtime:
+            try:
+                _model = CFModel.load(CF_MODEL_PATH)
+                _model_mtime = mtime
+                logger.info(f"Loaded CF model: {len(_model.user_ids):,} users x {len(_model.item_ids):,} communities")
+            except Exception as e:
+                logger.error(f"Failed to load CF model from {CF_MODEL_PATH}: {str(e)}")
+        return _model
+
+
+def model_version() -> Optional[float]:
+    """mtime of the deployed model file (None if no model is loaded); part of cached results' version"""
+    get_model()
+    return _model_mtime
+
+
+# ==================== TRAINING ====================
+
+async def load_interactions(db, batch_size: int = 50000):
+    """Stream user_actions into compact int/float arrays plus id vocabularies"""
+    user_index, item_index = {}, {}
+    rows, cols, values = array('i'), array('i'), array('f')
+    cursor = db.user_actions.find(
+        {"action": {"$in": list(ACTION_WEIGHTS)}},
+        {"_id": 0, "user_id": 1, "community_id": 1, "action": 1},
+        batch_size=batch_size
+    )
+    async for action in cursor:
+        rows.append(user_index.setdefault(action["user_id"], len(user_index)))
+        cols.append(item_index.setdefault(action["community_id"], len(item_index)))
+        values.append(ACTION_WEIGHTS[action["action"]])
+    return user_index, item_index, rows, cols, values
+
+
+def factorize(user_index, item_index, rows, cols, values, factors: int) -> CFModel:
+    """Truncated SVD of the clipped interaction matrix"""
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.linalg import svds
+
+    matrix = csr_matrix(
+        (np.frombuffer(values, dtype=np.float32), (np.frombuffer(rows, dtype=np.int32), np.frombuffer(cols, dtype=np.int32))),
+        shape=(len(user_index), len(item_index)), dtype=np.float32
+    )
+    matrix.sum_duplicates()
+    np.clip(matrix.data, -1.0, 1.0, out=matrix.data)
+
+    k = max(1, min(factors, min(matrix.shape) - 1))
+    u, s, vt = svds(matrix, k=k)
+    root_s = np.sqrt(s)
+    user_factors = (u * root_s).astype(np.float32)
+    item_factors = (vt.T * root_s).astype(np.float32)
+
+    # Store ids sorted so serving can binary-search them
+    user_ids = np.array(list(user_index), dtype=str)
+    item_ids = np.array(list(item_index), dtype=str)
+    user_order = np.argsort(user_ids)
+    item_order = np.argsort(item_ids)
+    return CFModel(user_ids[user_order], item_ids[item_order], user_factors[user_order], item_factors[item_order])
+
+
+async def train(factors: int = 32, output: Path = CF_MODEL_PATH):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(ROOT_DIR / '.env')
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'))
+    db = client[os.environ.get('DB_NAME', 'community_matching_db')]
+
+    started = time.perf_counter()
+    user_index, item_index, rows, cols, values = await load_interactions(db)
+    loaded = time.perf_counter()
+    print(f"📥 {len(values):,} interactions, {len(user_index):,} users x {len(item_index):,} communities ({loaded - started:.1f}s)")
+    if len(user_index) < 2 or len(item_index) < 2:
+        print("⚠️  Not enough interactions to train")
+        client.close()
+        return
+
+    model = factorize(user_index, item_index, rows, cols, values, factors)
+    model.save(output)
+    print(f"✅ Trained {model.user_factors.shape[1]} factors in {time.perf_counter() - loaded:.1f}s → {output}")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the collaborative-filtering model from user_actions")
+    parser.add_argument("--factors", type=int, default=32)
+    parser.add_argument("--output", type=Path, default=CF_MODEL_PATH)
+    args = parser.parse_args()
+    asyncio.run(train(args.factors, args.output))
@@ -3,13 +3,21 @@ Real MongoDB Admin Interface
 Provides browsing collections, viewing documents, and running queries
 """
 from fastapi import APIRouter, Request, Form, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorClient
+from pydantic import BaseModel
 import os
 import json
-from bson import ObjectId, json_util
+import time
+import hashlib
+import math
+from collections import Counter
+from html import escape as html_escape
+from bson import ObjectId, json_util, encode as bson_encode
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from cache import MISSING, TTLCache
 
 db_admin_router = APIRouter(prefix="/api/db-admin")
 
@@ -17,6 +25,20 @@ db_admin_router = APIRouter(prefix="/api/db-admin")
 mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
 client = AsyncIOMotorClient(mongo_url)
 
+# Aggregation runner limits
+AGGREGATE_MAX_TIME_MS = int(os.environ.get('DB_ADMIN_AGGREGATE_MAX_TIME_MS', '30000'))
+AGGREGATE_BATCH_SIZE = 100
+AGGREGATE_MAX_BATCH_SIZE = 1000
+AGGREGATE_MAX_ROWS = 10000  # HTML page only; the JSON API streams everything
+
+# Schema sampler limits
+SCHEMA_SAMPLE_SIZE = 1000
+SCHEMA_MAX_SAMPLE_SIZE = 50000
+SCHEMA_CACHE_TTL = 300  # seconds
+SCHEMA_CACHE_SIZE = 64  # (db, collection, sample_size) entries; each holds a full schema with histograms
+SCHEMA_HISTOGRAM_KEYS = 200  # distinct values tracked per field before the histogram stops growing
+SCHEMA_ARRAY_ELEMENTS = 100  # elements inspected per array value
+
 def serialize_doc(doc):
     """Convert MongoDB document to JSON-serializable format"""
     return json.loads(json_util.dumps(doc))
@@ -310,6 +332,29 @@ ADMIN_CSS = """
         border-color: #ef4444;
         color: #ef4444;
     }
+    
+    /* Streaming progress */
+    .stream-progress {
+        color: #94a3b8;
+        font-size: 13px;
+        margin: 10px 0;
+    }
+    .stream-progress strong { color: #60a5fa; }
+    .query-options {
+        display: flex;
+        gap: 15px;
+        margin-top: 10px;
+        color: #94a3b8;
+        font-size: 13px;
+    }
+    .query-options input {
+        background: #0f172a;
+        border: 1px solid #334155;
+        color: #e2e8f0;
+        padding: 6px;
+        border-radius: 6px;
+        width: 110px;
+    }
 </style>
 """
 
@@ -553,6 +598,8 @@ async def view_collection(db_name: str, collection_name: str, page: int = 1, lim
                         <div class="btn-group">
                             <button type="submit" class="btn">Run Query</button>
                             <a href="/api/db-admin/db/{db_name}/collection/{collection_name}" class="btn btn-secondary">Reset</a>
+                            <a href="/api/db-admin/db/{db_name}/collection/{collection_name}/aggregate" class="btn btn-secondary">Aggregate</a>
+                            <a href="/api/db-admin/db/{db_name}/collection/{collection_name}/schema" class="btn btn-secondary">Schema</a>
                         </div>
                     </form>
                 </div>
@@ -749,6 +796,466 @@ async def view_document(db_name: str, collection_name: str, doc_id: str):
         return HTMLResponse(content=f"<h1>Error: {str(e)}</h1>", status_code=500)
 
 
+def parse_pipeline(text: str) -> List[Dict[str, Any]]:
+    """Parse an extended JSON aggregation pipeline, raising ValueError if malformed"""
+    pipeline = json_util.loads(text) if text.strip() else []
+    if isinstance(pipeline, dict):
+        pipeline = [pipeline]
+    if not isinstance(pipeline, list) or not all(isinstance(stage, dict) and len(stage) == 1 for stage in pipeline):
+        raise ValueError("Pipeline must be a JSON array of single-key stage objects")
+    return pipeline
+
+
+def aggregate_limits(max_time_ms: int, batch_size: int) -> Tuple[int, int]:
+    """Clamp client-supplied limits (maxTimeMS 0 would mean no time limit at all)"""
+    return (min(max(1, max_time_ms), AGGREGATE_MAX_TIME_MS),
+            min(max(1, batch_size), AGGREGATE_MAX_BATCH_SIZE))
+
+
+async def stream_aggregate(collection, pipeline: List[Dict[str, Any]], max_time_ms: int,
+                           batch_size: int, max_rows: Optional[int] = None):
+    """Run an aggregation server-side and yield (documents, total_rows, elapsed_seconds) per batch"""
+    max_time_ms, batch_size = aggregate_limits(max_time_ms, batch_size)
+    started = time.perf_counter()
+    cursor = collection.aggregate(
+        pipeline,
+        allowDiskUse=True,
+        maxTimeMS=max_time_ms,
+        batchSize=batch_size
+    )
+    batch = []
+    total = 0
+    try:
+        async for doc in cursor:
+            batch.append(doc)
+            total += 1
+            if len(batch) >= batch_size or (max_rows and total >= max_rows):
+                yield batch, total, time.perf_counter() - started
+                batch = []
+                if max_rows and total >= max_rows:
+                    break
+        if batch:
+            yield batch, total, time.perf_counter() - started
+    finally:
+        await cursor.close()
+
+
+@db_admin_router.get("/db/{db_name}/collection/{collection_name}/aggregate", response_class=HTMLResponse)
+async def aggregate_page(db_name: str, collection_name: str):
+    """Aggregation pipeline editor for a collection"""
+    html = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>Aggregate {collection_name} - MongoDB Admin</title>
+        <meta name="viewport" content="width=device-width, initial-scale=1">
+        {ADMIN_CSS}
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <div>
+                    <h1>🍃 MongoDB Admin</h1>
+                    <div class="db-info">{db_name} / {collection_name}</div>
+                </div>
+            </div>
+            
+            <div class="breadcrumb">
+                <a href="/api/db-admin/">Home</a>
+                <span>›</span>
+                <a href="/api/db-admin/db/{db_name}">{db_name}</a>
+                <span>›</span>
+                <a href="/api/db-admin/db/{db_name}/collection/{collection_name}">{collection_name}</a>
+                <span>›</span>
+                <span>Aggregate</span>
+            </div>
+            
+            <div class="query-section">
+                <form action="/api/db-admin/db/{db_name}/collection/{collection_name}/aggregate" method="POST">
+                    <label style="color: #94a3b8; margin-bottom: 8px; display: block;">Aggregation pipeline (JSON array of stages)</label>
+                    <textarea name="pipeline" class="query-input" style="min-height: 200px;" placeholder='[{{"$group": {{"_id": "$action", "count": {{"$sum": 1}}}}}}]'></textarea>
+                    <div class="query-options">
+                        <label>maxTimeMS <input type="number" name="max_time_ms" value="{AGGREGATE_MAX_TIME_MS}" min="1" max="{AGGREGATE_MAX_TIME_MS}"></label>
+                        <label>Batch size <input type="number" name="batch_size" value="{AGGREGATE_BATCH_SIZE}" min="1" max="{AGGREGATE_MAX_BATCH_SIZE}"></label>
+                    </div>
+                    <div class="btn-group">
+                        <button type="submit" class="btn">Run Pipeline</button>
+                        <a href="/api/db-admin/db/{db_name}/collection/{collection_name}" class="btn btn-secondary">← Back to Collection</a>
+                    </div>
+                </form>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+    return HTMLResponse(content=html)
+
+
+@db_admin_router.post("/db/{db_name}/collection/{collection_name}/aggregate")
+async def run_aggregate(
+    db_name: str,
+    collection_name: str,
+    pipeline: str = Form(...),
+    max_time_ms: int = Form(AGGREGATE_MAX_TIME_MS),
+    batch_size: int = Form(AGGREGATE_BATCH_SIZE)
+):
+    """Run an aggregation pipeline and stream the results page batch by batch"""
+    try:
+        stages = parse_pipeline(pipeline)
+    except ValueError as e:
+        return HTMLResponse(content=f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>Pipeline Error - MongoDB Admin</title>
+            {ADMIN_CSS}
+        </head>
+        <body>
+            <div class="container">
+                <div class="card">
+                    <h2 style="color: #ef4444;">Invalid Pipeline</h2>
+                    <p style="color: #94a3b8; margin: 20px 0;">{html_escape(str(e))}</p>
+                    <a href="/api/db-admin/db/{db_name}/collection/{collection_name}/aggregate" class="btn">Go Back</a>
+                </div>
+            </div>
+        </body>
+        </html>
+        """, status_code=400)
+    
+    collection = client[db_name][collection_name]
+    max_time_ms, batch_size = aggregate_limits(max_time_ms, batch_size)
+    
+    async def render():
+        yield f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>Aggregation Results - MongoDB Admin</title>
+            <meta name="viewport" content="width=device-width, initial-scale=1">
+            {ADMIN_CSS}
+        </head>
+        <body>
+            <div class="container">
+                <div class="header">
+                    <div>
+                        <h1>🍃 MongoDB Admin</h1>
+                        <div class="db-info">Aggregation Results</div>
+                    </div>
+                </div>
+                
+                <div class="breadcrumb">
+                    <a href="/api/db-admin/">Home</a>
+                    <span>›</span>
+                    <a href="/api/db-admin/db/{db_name}">{db_name}</a>
+                    <span>›</span>
+                    <a href="/api/db-admin/db/{db_name}/collection/{collection_name}">{collection_name}</a>
+                    <span>›</span>
+                    <span>Aggregation Results</span>
+                </div>
+                
+                <div class="card">
+                    <div class="card-header">
+                        <span class="card-title">Pipeline</span>
+                        <span class="card-count">allowDiskUse • maxTimeMS {max_time_ms}</span>
+                    </div>
+                    <pre class="document-json">{html_escape(pipeline)}</pre>
+                </div>
+        """
+        
+        total = 0
+        elapsed = 0.0
+        try:
+            async for documents, total, elapsed in stream_aggregate(
+                collection, stages, max_time_ms, batch_size, max_rows=AGGREGATE_MAX_ROWS
+            ):
+                chunk = ""
+                for i, doc in enumerate(documents, start=total - len(documents) + 1):
+                    chunk += f'''
+                    <div class="card" style="margin-bottom: 15px;">
+                        <div class="card-header">
+                            <span class="card-title">Row {i}</span>
+                        </div>
+                        <pre class="document-json">{html_escape(json_util.dumps(doc, indent=2))}</pre>
+                    </div>
+                    '''
+                chunk += f'<div class="stream-progress"><strong>{total:,}</strong> rows • {elapsed:.2f}s</div>'
+                yield chunk
+        except Exception as e:
+            yield f'''
+            <div class="card">
+                <h2 style="color: #ef4444;">Aggregation failed</h2>
+                <p style="color: #94a3b8; margin: 20px 0;">{html_escape(str(e))}</p>
+            </div>
+            '''
+        
+        if total == 0:
+            yield '<div class="empty-state"><h3>Pipeline returned no documents</h3></div>'
+        
+        capped = f" (capped at {AGGREGATE_MAX_ROWS:,})" if total >= AGGREGATE_MAX_ROWS else ""
+        yield f"""
+                <div style="margin: 15px 0;">
+                    <span class="card-count" style="font-size: 14px;">{total:,} rows{capped} in {elapsed:.2f}s</span>
+                </div>
+                
+                <div style="margin-top: 20px;">
+                    <a href="/api/db-admin/db/{db_name}/collection/{collection_name}/aggregate" class="btn btn-secondary">← Back to Pipeline</a>
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+    
+    return StreamingResponse(render(), media_type="text/html")
+
+
+class HyperLogLog:
+    """Fixed-size distinct-count estimator (2^precision one-byte registers)"""
+    
+    def __init__(self, precision: int = 10):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+        self.alpha = 0.7213 / (1 + 1.079 / self.m)
+    
+    def add(self, key: str):
+        h = int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+        index = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+    
+    def estimate(self) -> int:
+        raw = self.alpha * self.m * self.m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * self.m and zeros:
+            # Small-range correction (linear counting)
+            return int(round(self.m * math.log(self.m / zeros)))
+        return int(round(raw))
+
+
+def bson_type_name(value) -> str:
+    """Short BSON-style type name for a decoded value"""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "double"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, dict):
+        return "object"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, ObjectId):
+        return "objectId"
+    if isinstance(value, datetime):
+        return "date"
+    return type(value).__name__
+
+
+class FieldStats:
+    """Incrementally accumulated statistics for one field path"""
+    
+    def __init__(self):
+        self.present = 0
+        self.types = Counter()
+        self.values = Counter()
+        self.distinct = HyperLogLog()
+        self.array_lengths = []
+    
+    def observe(self, value):
+        self.present += 1
+        type_name = bson_type_name(value)
+        self.types[type_name] += 1
+        if type_name == "array":
+            self.array_lengths.append(len(value))
+        elif type_name != "object":
+            key = f"{type_name}:{value}"
+            self.distinct.add(key)
+            if key in self.values or len(self.values) < SCHEMA_HISTOGRAM_KEYS:
+                self.values[key] += 1
+    
+    def summary(self, sampled: int) -> Dict[str, Any]:
+        result = {
+            "presence": round(self.present / sampled, 4) if sampled else 0,
+            "types": dict(self.types.most_common()),
+            "distinct_estimate": self.distinct.estimate(),
+            "top_values": [
+                {"value": key.split(":", 1)[1], "count": count}
+                for key, count in self.values.most_common(5)
+            ]
+        }
+        if self.array_lengths:
+            result["array_length"] = {
+                "min": min(self.array_lengths),
+                "max": max(self.array_lengths),
+                "avg": round(sum(self.array_lengths) / len(self.array_lengths), 1)
+            }
+        return result
+
+
+class SchemaSampler:
+    """Infers a collection's shape from a stream of sampled documents"""
+    
+    def __init__(self):
+        self.sampled = 0
+        self.fields: Dict[str, FieldStats] = {}
+        self.doc_sizes = []
+    
+    def observe(self, doc: Dict[str, Any]):
+        self.sampled += 1
+        self.doc_sizes.append(len(bson_encode(doc)))
+        self._walk(doc, "")
+    
+    def _walk(self, doc: Dict[str, Any], prefix: str):
+        for key, value in doc.items():
+            path = f"{prefix}{key}"
+            stats = self.fields.get(path)
+            if stats is None:
+                stats = self.fields[path] = FieldStats()
+            stats.observe(value)
+            if isinstance(value, dict):
+                self._walk(value, f"{path}.")
+            elif isinstance(value, list):
+                element_path = f"{path}[]"
+                element_stats = self.fields.get(element_path)
+                if element_stats is None:
+                    element_stats = self.fields[element_path] = FieldStats()
+                for element in value[:SCHEMA_ARRAY_ELEMENTS]:
+                    element_stats.observe(element)
+    
+    def result(self) -> Dict[str, Any]:
+        sizes = sorted(self.doc_sizes)
+        return {
+            "sampled": self.sampled,
+            "document_size": {
+                "avg": round(sum(sizes) / len(sizes)) if sizes else 0,
+                "p50": sizes[len(sizes) // 2] if sizes else 0,
+                "max": sizes[-1] if sizes else 0
+            },
+            "fields": {
+                path: stats.summary(self.sampled)
+                for path, stats in sorted(self.fields.items())
+            }
+        }
+
+
+# (db_name, collection_name, sample_size) -> schema
+_schema_cache = TTLCache("schema", SCHEMA_CACHE_SIZE, SCHEMA_CACHE_TTL)
+
+
+async def infer_schema(db_name: str, collection_name: str, sample_size: int = SCHEMA_SAMPLE_SIZE,
+                       refresh: bool = False) -> Dict[str, Any]:
+    """Sample a collection with $sample and return its inferred schema, cached for SCHEMA_CACHE_TTL"""
+    sample_size = max(1, min(sample_size, SCHEMA_MAX_SAMPLE_SIZE))
+    cache_key = (db_name, collection_name, sample_size)
+    if not refresh:
+        cached = _schema_cache.get(cache_key)
+        if cached is not MISSING:
+            return cached
+    
+    collection = client[db_name][collection_name]
+    started = time.perf_counter()
+    sampler = SchemaSampler()
+    async for doc in collection.aggregate([{"$sample": {"size": sample_size}}], allowDiskUse=True):
+        sampler.observe(doc)
+    
+    schema = sampler.result()
+    schema["estimated_count"] = await collection.estimated_document_count()
+    schema["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    schema["computed_at"] = datetime.utcnow().isoformat()
+    _schema_cache.set(cache_key, schema)
+    return schema
+
+
+@db_admin_router.get("/db/{db_name}/collection/{collection_name}/schema", response_class=HTMLResponse)
+async def view_schema(db_name: str, collection_name: str, sample_size: int = SCHEMA_SAMPLE_SIZE, refresh: bool = False):
+    """Inferred schema, field presence and cardinality for a collection"""
+    try:
+        schema = await infer_schema(db_name, collection_name, sample_size, refresh)
+        
+        rows_html = ""
+        for path, field in schema["fields"].items():
+            types = ", ".join(f"{t} ({c})" for t, c in field["types"].items())
+            top_values = ", ".join(
+                f'{html_escape(v["value"][:40])} ({v["count"]})' for v in field["top_values"]
+            )
+            array_info = ""
+            if "array_length" in field:
+                lengths = field["array_length"]
+                array_info = f'{lengths["min"]}–{lengths["max"]} (avg {lengths["avg"]})'
+            rows_html += f"""
+            <tr>
+                <td><span class="string">{html_escape(path)}</span></td>
+                <td><span class="number">{field["presence"] * 100:.1f}%</span></td>
+                <td>{types}</td>
+                <td><span class="number">~{field["distinct_estimate"]:,}</span></td>
+                <td><span class="array-preview">{array_info}</span></td>
+                <td style="font-size: 12px; color: #94a3b8;">{top_values}</td>
+            </tr>
+            """
+        
+        if not rows_html:
+            rows_html = '<tr><td colspan="6" class="empty-state">Collection is empty</td></tr>'
+        
+        sizes = schema["document_size"]
+        html = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>{collection_name} schema - MongoDB Admin</title>
+            <meta name="viewport" content="width=device-width, initial-scale=1">
+            {ADMIN_CSS}
+        </head>
+        <body>
+            <div class="container">
+                <div class="header">
+                    <div>
+                        <h1>🍃 MongoDB Admin</h1>
+                        <div class="db-info">{db_name} / {collection_name}</div>
+                    </div>
+                </div>
+                
+                <div class="breadcrumb">
+                    <a href="/api/db-admin/">Home</a>
+                    <span>›</span>
+                    <a href="/api/db-admin/db/{db_name}">{db_name}</a>
+                    <span>›</span>
+                    <a href="/api/db-admin/db/{db_name}/collection/{collection_name}">{collection_name}</a>
+                    <span>›</span>
+                    <span>Schema</span>
+                </div>
+                
+                <div class="card">
+                    <div class="card-header">
+                        <span class="card-title">Schema ({schema["sampled"]:,} sampled of ~{schema["estimated_count"]:,})</span>
+                        <span class="card-count">Doc size avg {sizes["avg"]:,} B • p50 {sizes["p50"]:,} B • max {sizes["max"]:,} B</span>
+                    </div>
+                    <div class="table-container">
+                        <table>
+                            <thead><tr><th>Field</th><th>Presence</th><th>Types</th><th>Distinct</th><th>Array length</th><th>Top values</th></tr></thead>
+                            <tbody>{rows_html}</tbody>
+                        </table>
+                    </div>
+                    <div class="stream-progress">Computed {schema["computed_at"]} in {schema["elapsed_ms"]} ms</div>
+                    <div class="btn-group">
+                        <a href="?sample_size={sample_size}&refresh=true" class="btn">Resample</a>
+                        <a href="/api/db-admin/db/{db_name}/collection/{collection_name}" class="btn btn-secondary">← Back to Collection</a>
+                    </div>
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+        return HTMLResponse(content=html)
+    except Exception as e:
+        return HTMLResponse(content=f"<h1>Error: {str(e)}</h1>", status_code=500)
+
+
 # API endpoints for programmatic access
 @db_admin_router.get("/api/databases")
 async def api_list_databases():
@@ -779,3 +1286,48 @@ async def api_list_documents(db_name: str, collection_name: str, skip: int = 0,
         "total": total,
         "documents": [serialize_doc(d) for d in documents]
     }
+
+
+
+@db_admin_router.get("/api/db/{db_name}/collection/{collection_name}/schema")
+async def api_schema(db_name: str, collection_name: str, sample_size: int = SCHEMA_SAMPLE_SIZE, refresh: bool = False):
+    """API: Inferred schema with field presence, types, histograms and cardinality estimates"""
+    return await infer_schema(db_name, collection_name, sample_size, refresh)
+
+
+class AggregateRequest(BaseModel):
+    pipeline: List[Dict[str, Any]]
+    max_time_ms: int = AGGREGATE_MAX_TIME_MS
+    batch_size: int = AGGREGATE_BATCH_SIZE
+
+
+@db_admin_router.post("/api/db/{db_name}/collection/{collection_name}/aggregate")
+async def api_aggregate(db_name: str, collection_name: str, request: AggregateRequest):
+    """API: Run an aggregation pipeline, streaming NDJSON batches with a row counter and elapsed time"""
+    try:
+        # Round-trip through extended JSON so {"$oid": ...} / {"$date": ...} become BSON types
+        pipeline = parse_pipeline(json.dumps(request.pipeline))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    collection = client[db_name][collection_name]
+    max_time_ms, batch_size = aggregate_limits(request.max_time_ms, request.batch_size)
+    
+    async def ndjson():
+        total = 0
+        elapsed = 0.0
+        try:
+            async for documents, total, elapsed in stream_aggregate(
+                collection, pipeline, max_time_ms, batch_size
+            ):
+                yield json_util.dumps({
+                    "rows": total,
+                    "elapsed_ms": round(elapsed * 1000, 1),
+                    "documents": documents
+                }) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": str(e), "rows": total}) + "\n"
+            return
+        yield json.dumps({"done": True, "rows": total, "elapsed_ms": round(elapsed * 1000, 1)}) + "\n"
+    
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
@@ -0,0 +1,219 @@
+"""
+Match notification fan-out
+Creating a community or event enqueues a job in the fanout_jobs collection; a
+background worker reverse-matches the item, then writes inbox entries for the
+best-matching users in rate-limited bulk_write chunks. The audience and the
+progress through it are stored on the job, so a retry or a restarted worker
+resumes where the last attempt stopped, and inbox writes are upserts so
+replaying a chunk never duplicates entries.
+"""
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+
+from pymongo import ReturnDocument, UpdateOne
+
+from metrics import REGISTRY, Counter
+from reverse_matching import UserProfileIndex
+
+logger = logging.getLogger(__name__)
+
+FANOUT_MAX_USERS = int(os.environ.get('FANOUT_MAX_USERS', '5000'))
+FANOUT_MIN_SCORE = float(os.environ.get('FANOUT_MIN_SCORE', '70'))
+FANOUT_CHUNK_SIZE = int(os.environ.get('FANOUT_CHUNK_SIZE', '500'))
+FANOUT_RATE_PER_SECOND = float(os.environ.get('FANOUT_RATE_PER_SECOND', '2000'))  # inbox writes
+FANOUT_POLL_SECONDS = 30
+FANOUT_LEASE_SECONDS = 120
+FANOUT_MAX_ATTEMPTS = 5
+
+# kind -> (collection, id field, member field)
+ITEM_KINDS = {
+    "community": ("communities", "community_id", "members"),
+    "event": ("events", "event_id", "attendees"),
+}
+
+FANOUT_JOBS = REGISTRY.register(Counter("fanout_jobs_total", "Fan-out jobs finished, by outcome", ("outcome",)))
+FANOUT_INBOX_WRITES = REGISTRY.register(Counter("fanout_inbox_writes_total", "Inbox entries written by fan-out", ("kind",)))
+
+
+class FanoutWorker:
+    """Single background task draining fanout_jobs; safe to run on several replicas (jobs are leased)"""
+
+    def __init__(self, index: UserProfileIndex):
+        self.index = index
+        self.db = None
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def enqueue(self, kind: str, item_id: str) -> str:
+        """Record a job for a newly created item and wake the worker"""
+        now = datetime.now(timezone.utc)
+        job_id = f"fanout_{uuid.uuid4().hex[:12]}"
+        await self.db.fanout_jobs.insert_one({
+            "_id": job_id,
+            "kind": kind,
+            "item_id": item_id,
+            "status": "pending",
+            "offset": 0,
+            "delivered": 0,
+            "attempts": 0,
+            "created_at": now,
+            "lease_until": now,
+        })
+        if self._wake is not None:
+            self._wake.set()
+        return job_id
+
+    def start(self, db):
+        self.db = db
+        if self._task is None:
+            # Created here so it belongs to the running loop, not whichever loop existed at import
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _claim(self) -> Optional[dict]:
+        """Take the oldest pending job, or a running one whose worker stopped renewing its lease
+        (a job whose worker keeps dying is marked failed after FANOUT_MAX_ATTEMPTS)"""
+        now = datetime.now(timezone.utc)
+        abandoned = await self.db.fanout_jobs.update_many(
+            {"status": "running", "lease_until": {"$lte": now}, "attempts": {"$gte": FANOUT_MAX_ATTEMPTS}},
+            {"$set": {"status": "failed", "finished_at": now, "error": "worker stopped during the last attempt"}}
+        )
+        if abandoned.modified_count:
+            FANOUT_JOBS.inc(("failed",), abandoned.modified_count)
+        return await self.db.fanout_jobs.find_one_and_update(
+            {
+                "status": {"$in": ["pending", "running"]},
+                "lease_until": {"$lte": now},
+                "attempts": {"$lt": FANOUT_MAX_ATTEMPTS}
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "worker": self.worker_id,
+                    "lease_until": now + timedelta(seconds=FANOUT_LEASE_SECONDS)
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _run(self):
+        while True:
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logger.error(f"Fan-out claim failed: {str(e)}")
+                job = None
+            if job is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), FANOUT_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._process(job)
+                FANOUT_JOBS.inc(("done",))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failed = job["attempts"] >= FANOUT_MAX_ATTEMPTS
+                FANOUT_JOBS.inc(("failed" if failed else "retried",))
+                logger.error(f"Fan-out job {job['_id']} failed (attempt {job['attempts']}): {str(e)}")
+                # Back off before the next attempt; the stored audience and offset let it resume
+                retry_at = datetime.now(timezone.utc) + timedelta(seconds=30 * job["attempts"])
+                await self.db.fanout_jobs.update_one(
+                    {"_id": job["_id"]},
+                    {"$set": {"status": "failed" if failed else "pending", "lease_until": retry_at, "error": str(e)}}
+                )
+
+    async def _process(self, job: dict):
+        collection, id_field, member_field = ITEM_KINDS[job["kind"]]
+        item = await self.db[collection].find_one(
+            {id_field: job["item_id"]},
+            {"_id": 0, "name": 1, "value_profile": 1, member_field: 1}
+        )
+        if not item:
+            await self._finish(job, "skipped")
+            return
+
+        audience = job.get("audience")
+        if audience is None:
+            await self.index.ensure_loaded(self.db)
+            audience = [
+                [user_id, score]
+                for user_id, score in self.index.top_k(
+                    item.get("value_profile") or {}, FANOUT_MAX_USERS, exclude=item.get(member_field) or []
+                )
+                if score >= FANOUT_MIN_SCORE
+            ]
+            # Stored so a retry walks the same list and the offset stays meaningful
+            job["offset"] = 0
+            await self.db.fanout_jobs.update_one(
+                {"_id": job["_id"]}, {"$set": {"audience": audience, "offset": 0}}
+            )
+
+        offset = job.get("offset", 0)
+        delivered = job.get("delivered", 0)
+        labels = (job["kind"],)
+        while offset < len(audience):
+            started = time.monotonic()
+            chunk = audience[offset:offset + FANOUT_CHUNK_SIZE]
+            now = datetime.now(timezone.utc)
+            result = await self.db.inbox.bulk_write([
+                UpdateOne(
+                    {"user_id": user_id, "kind": job["kind"], "item_id": job["item_id"]},
+                    {"$setOnInsert": {
+                        "user_id": user_id,
+                        "kind": job["kind"],
+                        "item_id": job["item_id"],
+                        "item_name": item.get("name"),
+                        "compatibility_score": score,
+                        "read": False,
+                        "created_at": now
+                    }},
+                    upsert=True
+                )
+                for user_id, score in chunk
+            ], ordered=False)
+            offset += len(chunk)
+            delivered += result.upserted_count
+            FANOUT_INBOX_WRITES.inc(labels, result.upserted_count)
+            # Checkpoint and renew the lease; a crash replays at most this chunk
+            await self.db.fanout_jobs.update_one(
+                {"_id": job["_id"]},
+                {"$set": {
+                    "offset": offset,
+                    "delivered": delivered,
+                    "lease_until": datetime.now(timezone.utc) + timedelta(seconds=FANOUT_LEASE_SECONDS)
+                }}
+            )
+            pause = len(chunk) / FANOUT_RATE_PER_SECOND - (time.monotonic() - started)
+            if pause > 0:
+                await asyncio.sleep(pause)
+
+        await self._finish(job, "done", audience_size=len(audience), delivered=delivered)
+        logger.info(f"Fan-out {job['kind']} {job['item_id']}: {delivered} inbox entries")
+
+    async def _finish(self, job: dict, status: str, **fields):
+        await self.db.fanout_jobs.update_one(
+            {"_id": job["_id"]},
+            {"$set": {"status": status, "finished_at": datetime.now(timezone.utc), **fields}, "$unset": {"audience": ""}}
+        )
@@ -0,0 +1,251 @@
+"""
+Value discovery game data and scoring
+There are only 4^8 complete selections, so every profile is precomputed into a
+lookup table (cached on disk) and scoring a submission is an index lookup
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(os.environ.get('SCORING_CACHE_DIR', Path(__file__).parent / '.cache'))
+
+# 10 core values with representative words for each
+VALUE_WORDS = {
+    "community_oriented": ["community", "together", "belonging", "family"],
+    "independent": ["independence", "autonomy", "self-reliance", "freedom"],
+    "structured": ["organization", "planning", "order", "discipline"],
+    "spontaneous": ["spontaneity", "flexibility", "adventure", "surprise"],
+    "competitive": ["competition", "achievement", "winning", "excellence"],
+    "collaborative": ["cooperation", "teamwork", "harmony", "support"],
+    "intellectual": ["knowledge", "learning", "wisdom", "analysis"],
+    "experiential": ["experience", "action", "doing", "practice"],
+    "tradition": ["tradition", "heritage", "roots", "stability"],
+    "novelty": ["innovation", "creativity", "change", "exploration"],
+}
+
+# 8 rounds of tiles - each with 4 words representing different values
+GAME_TILES = [
+    # Round 1: Adventure vs Security vs Learning vs Connection
+    ["adventure", "stability", "knowledge", "belonging"],
+    # Round 2: Independence vs Teamwork vs Achievement vs Creativity
+    ["autonomy", "cooperation", "winning", "innovation"],
+    # Round 3: Planning vs Flexibility vs Tradition vs Experience
+    ["organization", "spontaneity", "heritage", "action"],
+    # Round 4: Competition vs Harmony vs Wisdom vs Change
+    ["excellence", "harmony", "learning", "exploration"],
+    # Round 5: Freedom vs Community vs Order vs Novelty
+    ["independence", "together", "discipline", "creativity"],
+    # Round 6: Self-reliance vs Support vs Analysis vs Practice
+    ["self-reliance", "support", "analysis", "practice"],
+    # Round 7: Achievement vs Collaboration vs Roots vs Surprise
+    ["achievement", "teamwork", "roots", "surprise"],
+    # Round 8: Family vs Freedom vs Planning vs Doing
+    ["family", "freedom", "planning", "doing"],
+]
+
+# Map words to their primary value
+WORD_TO_VALUE = {
+    # Community-oriented
+    "community": "community_oriented", "together": "community_oriented",
+    "belonging": "community_oriented", "family": "community_oriented",
+    # Independent
+    "independence": "independent", "autonomy": "independent",
+    "self-reliance": "independent", "freedom": "independent",
+    # Structured
+    "organization": "structured", "planning": "structured",
+    "order": "structured", "discipline": "structured",
+    # Spontaneous
+    "spontaneity": "spontaneous", "flexibility": "spontaneous",
+    "adventure": "spontaneous", "surprise": "spontaneous",
+    # Competitive
+    "competition": "competitive", "achievement": "competitive",
+    "winning": "competitive", "excellence": "competitive",
+    # Collaborative
+    "cooperation": "collaborative", "teamwork": "collaborative",
+    "harmony": "collaborative", "support": "collaborative",
+    # Intellectual
+    "knowledge": "intellectual", "learning": "intellectual",
+    "wisdom": "intellectual", "analysis": "intellectual",
+    # Experiential
+    "experience": "experiential", "action": "experiential",
+    "doing": "experiential", "practice": "experiential",
+    # Tradition
+    "tradition": "tradition", "heritage": "tradition",
+    "roots": "tradition", "stability": "tradition",
+    # Novelty
+    "innovation": "novelty", "creativity": "novelty",
+    "change": "novelty", "exploration": "novelty",
+}
+
+# Dimensions stored in a user's value_profile, in table column order
+PROFILE_KEYS = ("community_oriented", "structured", "competitive", "intellectual", "tradition", "experiential")
+
+# environment_preferences labels, in table code order
+PREFERENCE_LABELS = {
+    "group_size": ("small", "medium", "large"),
+    "interaction_style": ("casual mingling", "deep conversations", "activity-based"),
+    "pace": ("balanced", "fast-paced", "relaxed"),
+    "frequency": ("occasional", "regular", "high involvement"),
+    "social_energy": ("low", "medium", "high"),
+}
+PREFERENCE_KEYS = tuple(PREFERENCE_LABELS)
+
+VALUE_KEYS = tuple(VALUE_WORDS)
+NUM_ROUNDS = len(GAME_TILES)
+TILES_PER_ROUND = len(GAME_TILES[0])
+NUM_SELECTIONS = TILES_PER_ROUND ** NUM_ROUNDS
+
+# word -> (round index, tile position), for encoding submissions. Every tile word is
+# unique, so the word alone identifies the round (clients number rounds from 0, older
+# rows and scripts from 1 - the submitted round number is not relied on).
+_TILE_POSITION = {
+    word: (round_index, position)
+    for round_index, words in enumerate(GAME_TILES)
+    for position, word in enumerate(words)
+}
+assert len(_TILE_POSITION) == NUM_ROUNDS * TILES_PER_ROUND, "tile words must be unique"
+
+
+def score_counts(value_counts: Dict[str, int], total_selections: int) -> Tuple[Dict[str, float], Dict[str, str]]:
+    """Reference scoring from raw value counts; used for submissions that don't map onto the tile grid"""
+    # For opposing pairs, normalize to 0-1 scale where 0.5 is neutral
+    value_profile = {key: value_counts[key] / total_selections for key in PROFILE_KEYS}
+    
+    # Determine social energy level
+    community_score = value_counts["community_oriented"]
+    if community_score >= 3:
+        social_energy = "high"
+    elif community_score >= 1:
+        social_energy = "medium"
+    else:
+        social_energy = "low"
+    
+    # Infer environment preferences
+    environment_preferences = {
+        "group_size": "large" if value_profile["community_oriented"] > 0.6 else ("small" if value_profile["community_oriented"] < 0.3 else "medium"),
+        "interaction_style": "deep conversations" if value_profile["intellectual"] > 0.5 else ("activity-based" if value_profile["experiential"] > 0.5 else "casual mingling"),
+        "pace": "fast-paced" if value_profile["competitive"] > 0.5 else ("relaxed" if value_profile["tradition"] > 0.5 else "balanced"),
+        "frequency": "high involvement" if value_profile["community_oriented"] > 0.6 else ("occasional" if value_profile["community_oriented"] < 0.3 else "regular"),
+        "social_energy": social_energy
+    }
+    return value_profile, environment_preferences
+
+
+def _build_table() -> Tuple[np.ndarray, np.ndarray]:
+    """Score every complete selection at once; mirrors score_counts exactly"""
+    codes = np.arange(NUM_SELECTIONS, dtype=np.int64)
+    place = TILES_PER_ROUND ** np.arange(NUM_ROUNDS, dtype=np.int64)
+    choices = (codes[:, None] // place) % TILES_PER_ROUND  # (N, rounds)
+    
+    value_index = {value: i for i, value in enumerate(VALUE_KEYS)}
+    tile_values = np.array(
+        [[value_index.get(WORD_TO_VALUE.get(word), -1) for word in words] for words in GAME_TILES]
+    )
+    selected = tile_values[np.arange(NUM_ROUNDS), choices]  # (N, rounds)
+    counts = (selected[:, :, None] == np.arange(len(VALUE_KEYS))).sum(axis=1)  # (N, values)
+    
+    profiles = counts[:, [value_index[key] for key in PROFILE_KEYS]] / NUM_ROUNDS
+    p = {key: profiles[:, i] for i, key in enumerate(PROFILE_KEYS)}
+    community_count = counts[:, value_index["community_oriented"]]
+    
+    preferences = np.stack([
+        np.where(p["community_oriented"] > 0.6, 2, np.where(p["community_oriented"] < 0.3, 0, 1)),
+        np.where(p["intellectual"] > 0.5, 1, np.where(p["experiential"] > 0.5, 2, 0)),
+        np.where(p["competitive"] > 0.5, 1, np.where(p["tradition"] > 0.5, 2, 0)),
+        np.where(p["community_oriented"] > 0.6, 2, np.where(p["community_oriented"] < 0.3, 0, 1)),
+        np.where(community_count >= 3, 2, np.where(community_count >= 1, 1, 0)),
+    ], axis=1).astype(np.uint8)
+    return profiles, preferences
+
+
+def table_fingerprint() -> str:
+    """Changes whenever the tiles, word mapping or output layout change"""
+    spec = json.dumps([GAME_TILES, WORD_TO_VALUE, PROFILE_KEYS, PREFERENCE_LABELS], sort_keys=True)
+    return hashlib.sha1(spec.encode('utf-8')).hexdigest()[:16]
+
+
+_table: Optional[Tuple[np.ndarray, np.ndarray]] = None
+_table_lock = threading.Lock()
+
+
+def get_table() -> Tuple[np.ndarray, np.ndarray]:
+    """(profiles, preference_codes) for every selection code, built once and cached on disk"""
+    global _table
+    if _table is not None:
+        return _table
+    with _table_lock:
+        if _table is not None:
+            return _table
+        path = CACHE_DIR / f"game_scoring_{table_fingerprint()}.npz"
+        try:
+            with np.load(path) as cached:
+                _table = (cached["profiles"], cached["preferences"])
+            return _table
+        except (OSError, KeyError, ValueError):
+            pass
+        
+        _table = _build_table()
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+            np.savez(tmp_path, profiles=_table[0], preferences=_table[1])
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not cache scoring table at {path}: {e}")
+        return _table
+
+
+def encode_selections(selections: Sequence[Dict[str, Any]]) -> Optional[int]:
+    """Selection code for one pick per round, or None if the submission doesn't fit the grid"""
+    if len(selections) != NUM_ROUNDS:
+        return None
+    code = 0
+    seen_rounds = 0
+    for selection in selections:
+        word = selection.get('word')
+        tile = _TILE_POSITION.get(word) if isinstance(word, str) else None
+        if tile is None:
+            return None
+        round_index, position = tile
+        if seen_rounds & (1 << round_index):
+            return None
+        seen_rounds |= 1 << round_index
+        code += position * TILES_PER_ROUND ** round_index
+    return code
+
+
+def decode_profile(profile_row: np.ndarray) -> Dict[str, float]:
+    return {key: float(value) for key, value in zip(PROFILE_KEYS, profile_row)}
+
+
+def decode_preferences(preference_row: np.ndarray) -> Dict[str, str]:
+    return {key: PREFERENCE_LABELS[key][code] for key, code in zip(PREFERENCE_KEYS, preference_row)}
+
+
+def score_batch(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized scoring: (profiles, preference_codes) rows for an array of selection codes"""
+    profiles, preferences = get_table()
+    return profiles[codes], preferences[codes]
+
+
+def score_selections(selections: List[Dict[str, Any]]) -> Tuple[Dict[str, float], Dict[str, str]]:
+    """Score one submission, via the lookup table when it is a complete grid selection"""
+    code = encode_selections(selections)
+    if code is not None:
+        profiles, preferences = get_table()
+        return decode_profile(profiles[code]), decode_preferences(preferences[code])
+    
+    value_counts = dict.fromkeys(VALUE_KEYS, 0)
+    for selection in selections:
+        value = WORD_TO_VALUE.get(selection['word'])
+        if value:
+            value_counts[value] += 1
+    return score_counts(value_counts, len(selections))
@@ -0,0 +1,292 @@
+"""
+Synthetic data generator for load and scale testing
+Creates users who played the value game (profiles from simulated tile picks,
+scored with the real lookup table), communities and events with power-law
+membership sizes, and matching user_actions / game_responses histories.
+
+    python generate_data.py --users 1000000 --communities 100000 --events 20000
+    python generate_data.py --clean
+
+Synthetic ids carry an "s" right after the prefix (user_s…, comm_s…, event_s…),
+which uuid hex never produces, so --clean removes exactly what was generated.
+Every synthetic user can log in as user<N>@synthetic.example.com / SYNTHETIC_PASSWORD.
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+import bcrypt
+import numpy as np
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from game_scoring import (
+    GAME_TILES, NUM_ROUNDS, PROFILE_KEYS, TILES_PER_ROUND, VALUE_KEYS, WORD_TO_VALUE,
+    decode_preferences, decode_profile, score_batch
+)
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+DB_NAME = os.environ.get('DB_NAME', 'community_matching_db')
+SYNTHETIC_PASSWORD = "synthetic-password"
+
+ADJECTIVES = ["Urban", "Sunrise", "Midnight", "Open", "Curious", "Wild", "Quiet", "Bold", "Local", "Global"]
+TOPICS = ["Hiking", "Coding", "Book", "Chess", "Yoga", "Film", "Cooking", "Cycling", "Language", "Startup",
+          "Photography", "Board Game", "Running", "History", "Climbing", "Music", "Gardening", "Volunteering"]
+KINDS = ["Club", "Collective", "Circle", "Society", "Crew", "Guild", "Meetup", "Lab"]
+EVENT_TYPES = ["workshop", "wellness", "networking", "outdoor", "social", "meetup", "conference", "cultural"]
+LOCATIONS = ["Downtown Hub", "Riverside Park", "Community Center", "Tech Campus", "Old Town", "Public Library"]
+TAGS = ["Outdoors", "Learning", "Tech", "Wellness", "Culture", "Social", "Creative", "Sports", "Food", "Career"]
+ENVIRONMENT_SETTINGS = {
+    "group_size": ["small", "medium", "large"],
+    "interaction_style": ["casual mingling", "deep conversations", "activity-based"],
+    "pace": ["relaxed", "balanced", "fast-paced"],
+}
+
+
+class ChunkWriter:
+    """Unordered insert_many in fixed-size chunks with a bounded number of writes in flight"""
+
+    def __init__(self, db, chunk_size: int, concurrency: int):
+        self.db = db
+        self.chunk_size = chunk_size
+        self._slots = asyncio.Semaphore(concurrency)
+        self._tasks: List[asyncio.Task] = []
+        self.inserted: Dict[str, int] = {}
+
+    async def add(self, collection: str, docs: List[dict]):
+        for start in range(0, len(docs), self.chunk_size):
+            await self._slots.acquire()  # backpressure: generation waits for a free write slot
+            self._tasks.append(asyncio.create_task(self._write(collection, docs[start:start + self.chunk_size])))
+
+    async def _write(self, collection: str, docs: List[dict]):
+        try:
+            await self.db[collection].insert_many(docs, ordered=False)
+            self.inserted[collection] = self.inserted.get(collection, 0) + len(docs)
+        finally:
+            self._slots.release()
+
+    async def flush(self):
+        # Kept until here so a failed chunk surfaces instead of being dropped
+        await asyncio.gather(*self._tasks)
+
+
+def simulate_games(rng: np.random.Generator, count: int) -> np.ndarray:
+    """Selection codes from players who favour a few values each (Dirichlet tastes per player)"""
+    value_index = {value: i for i, value in enumerate(VALUE_KEYS)}
+    tile_values = np.array([[value_index[WORD_TO_VALUE[word]] for word in words] for words in GAME_TILES])
+    tastes = rng.dirichlet(np.full(len(VALUE_KEYS), 0.4), size=count)  # (count, values)
+    weights = tastes[:, tile_values] + 1e-3  # (count, rounds, tiles)
+    cumulative = np.cumsum(weights / weights.sum(axis=2, keepdims=True), axis=2)
+    choices = (rng.random((count, NUM_ROUNDS, 1)) > cumulative).sum(axis=2).clip(0, TILES_PER_ROUND - 1)
+    return (choices * TILES_PER_ROUND ** np.arange(NUM_ROUNDS)).sum(axis=1)
+
+
+def power_law_sizes(rng: np.random.Generator, count: int, mean: float, cap: int) -> np.ndarray:
+    """Pareto(1.5) sizes scaled to `mean`: most groups are small, a few are very large"""
+    alpha = 1.5
+    minimum = mean * (alpha - 1) / alpha
+    return np.clip((rng.pareto(alpha, count) + 1) * minimum, 1, cap).astype(np.int64)
+
+
+def item_profiles(rng: np.random.Generator, user_profiles: np.ndarray, count: int) -> List[Dict[str, float]]:
+    """Profiles near a random user's, each missing one dimension like the hand-written seeds"""
+    anchors = user_profiles[rng.integers(0, len(user_profiles), count)]
+    values = np.clip(anchors + rng.normal(0, 0.1, anchors.shape), 0, 1).round(2)
+    dropped = rng.integers(0, len(PROFILE_KEYS), count)
+    return [
+        {key: float(value) for k, (key, value) in enumerate(zip(PROFILE_KEYS, row)) if k != drop}
+        for row, drop in zip(values, dropped)
+    ]
+
+
+def pick_members(rng: np.random.Generator, size: int, num_users: int) -> np.ndarray:
+    return np.unique(rng.integers(0, num_users, size))
+
+
+def user_id(i: int) -> str:
+    return f"user_s{i:011x}"
+
+
+async def generate(users: int, communities: int, events: int, mean_members: float, mean_attendees: float,
+                   skip_ratio: float, chunk_size: int, concurrency: int, seed: int, game_responses: bool):
+    client = AsyncIOMotorClient(MONGO_URL)
+    db = client[DB_NAME]
+    writer = ChunkWriter(db, chunk_size, concurrency)
+    rng = np.random.default_rng(seed)
+    now = datetime.now(timezone.utc)
+    started = time.perf_counter()
+
+    def elapsed():
+        return f"{time.perf_counter() - started:.1f}s"
+
+    # ---- users + game_responses ----
+    password_hash = bcrypt.hashpw(SYNTHETIC_PASSWORD.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    codes = simulate_games(rng, users)
+    profiles, preferences = score_batch(codes)
+    signup_days = rng.uniform(0, 365, users)
+    for start in range(0, users, chunk_size):
+        stop = min(start + chunk_size, users)
+        user_docs, response_docs = [], []
+        for i in range(start, stop):
+            played_at = now - timedelta(days=float(signup_days[i]))
+            user_docs.append({
+                "user_id": user_id(i),
+                "email": f"user{i}@synthetic.example.com",
+                "name": f"Synthetic User {i}",
+                "picture": None,
+                "password_hash": password_hash,
+                "created_at": played_at,
+                "game_completed": True,
+                "value_profile": decode_profile(profiles[i]),
+                "environment_preferences": decode_preferences(preferences[i]),
+                "profile_updated_at": played_at,
+            })
+            if game_responses:
+                code = int(codes[i])
+                submission_id = f"sub_s{i:011x}"
+                for round_index, words in enumerate(GAME_TILES):
+                    response_docs.append({
+                        "user_id": user_id(i),
+                        "submission_id": submission_id,
+                        "round_number": round_index,  # 0-based, as the app sends it
+                        "selected_word": words[(code // TILES_PER_ROUND ** round_index) % TILES_PER_ROUND],
+                        "timestamp": played_at,
+                    })
+        await writer.add("users", user_docs)
+        if response_docs:
+            await writer.add("game_responses", response_docs)
+    print(f"👤 {users:,} users generated ({elapsed()})")
+
+    # ---- communities + join/skip actions ----
+    sizes = power_law_sizes(rng, communities, mean_members, users)
+    community_profiles = item_profiles(rng, profiles, communities)
+    created_days = rng.uniform(0, 365, communities)
+    memberships = 0
+    community_docs, action_docs = [], []
+    for j in range(communities):
+        community_id = f"comm_s{j:011x}"
+        members = [user_id(i) for i in pick_members(rng, sizes[j], users)]
+        created_at = now - timedelta(days=float(created_days[j]))
+        community_docs.append({
+            "community_id": community_id,
+            "name": f"{ADJECTIVES[j % len(ADJECTIVES)]} {TOPICS[j % len(TOPICS)]} {KINDS[j % len(KINDS)]}",
+            "description": f"A synthetic {TOPICS[j % len(TOPICS)].lower()} community for scale testing.",
+            "image": None,
+            "creator_id": members[0],
+            "created_at": created_at,
+            "members": members,
+            "value_profile": community_profiles[j],
+            "environment_settings": {key: options[rng.integers(len(options))] for key, options in ENVIRONMENT_SETTINGS.items()},
+            "member_count": len(members),
+        })
+        joined_days = rng.uniform(0, created_days[j], len(members))
+        action_docs.extend(
+            {"user_id": member, "community_id": community_id, "action": "join",
+             "timestamp": now - timedelta(days=float(days))}
+            for member, days in zip(members, joined_days)
+        )
+        memberships += len(members)
+        if len(community_docs) >= chunk_size:
+            await writer.add("communities", community_docs)
+            community_docs = []
+        if len(action_docs) >= chunk_size:
+            await writer.add("user_actions", action_docs)
+            action_docs = []
+    await writer.add("communities", community_docs)
+
+    skips = int(memberships * skip_ratio)
+    skip_users = rng.integers(0, users, skips)
+    skip_communities = rng.integers(0, communities, skips) if communities else []
+    skip_days = rng.uniform(0, 180, skips)
+    for k in range(skips):
+        action_docs.append({
+            "user_id": user_id(skip_users[k]), "community_id": f"comm_s{skip_communities[k]:011x}",
+            "action": "skip", "timestamp": now - timedelta(days=float(skip_days[k]))
+        })
+        if len(action_docs) >= chunk_size:
+            await writer.add("user_actions", action_docs)
+            action_docs = []
+    await writer.add("user_actions", action_docs)
+    print(f"🏘️  {communities:,} communities, {memberships:,} memberships, {skips:,} skips ({elapsed()})")
+
+    # ---- events ----
+    sizes = power_law_sizes(rng, events, mean_attendees, users)
+    event_profiles = item_profiles(rng, profiles, events)
+    event_days = rng.uniform(-60, 90, events)
+    event_docs = []
+    for j in range(events):
+        attendees = [user_id(i) for i in pick_members(rng, sizes[j], users)]
+        event_docs.append({
+            "event_id": f"event_s{j:011x}",
+            "name": f"{TOPICS[j % len(TOPICS)]} {EVENT_TYPES[j % len(EVENT_TYPES)].title()} #{j}",
+            "description": f"A synthetic {EVENT_TYPES[j % len(EVENT_TYPES)]} for scale testing.",
+            "event_type": EVENT_TYPES[j % len(EVENT_TYPES)],
+            "date": now + timedelta(days=float(event_days[j])),
+            "location": LOCATIONS[j % len(LOCATIONS)],
+            "image": None,
+            "creator_id": attendees[0],
+            "created_at": now - timedelta(days=float(rng.uniform(0, 60))),
+            "attendees": attendees,
+            "attendee_count": len(attendees),
+            "value_profile": event_profiles[j],
+            "tags": [str(tag) for tag in rng.choice(TAGS, size=int(rng.integers(2, 5)), replace=False)],
+        })
+        if len(event_docs) >= chunk_size:
+            await writer.add("events", event_docs)
+            event_docs = []
+    await writer.add("events", event_docs)
+    await writer.flush()
+    print(f"📅 {events:,} events ({elapsed()})")
+
+    total = sum(writer.inserted.values())
+    seconds = time.perf_counter() - started
+    counts = ", ".join(f"{name} {count:,}" for name, count in writer.inserted.items())
+    print(f"✅ Inserted {total:,} documents in {seconds:.1f}s ({total / seconds:,.0f} docs/s): {counts}")
+    client.close()
+
+
+async def clean():
+    client = AsyncIOMotorClient(MONGO_URL)
+    db = client[DB_NAME]
+    results = await asyncio.gather(
+        db.users.delete_many({"user_id": {"$regex": "^user_s"}}),
+        db.game_responses.delete_many({"user_id": {"$regex": "^user_s"}}),
+        db.user_actions.delete_many({"user_id": {"$regex": "^user_s"}}),
+        db.user_action_summaries.delete_many({"user_id": {"$regex": "^user_s"}}),
+        db.precomputed_matches.delete_many({"user_id": {"$regex": "^user_s"}}),
+        db.inbox.delete_many({"user_id": {"$regex": "^user_s"}}),
+        db.communities.delete_many({"community_id": {"$regex": "^comm_s"}}),
+        db.events.delete_many({"event_id": {"$regex": "^event_s"}}),
+    )
+    print(f"🧹 Removed {sum(result.deleted_count for result in results):,} synthetic documents")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic users, communities and events for load testing")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--communities", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--mean-members", type=float, default=20, help="mean community size (power-law)")
+    parser.add_argument("--mean-attendees", type=float, default=10, help="mean event size (power-law)")
+    parser.add_argument("--skip-ratio", type=float, default=0.5, help="skips per membership")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=8, help="insert_many calls in flight")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-game-responses", action="store_true", help="skip the 8 game_responses rows per user")
+    parser.add_argument("--clean", action="store_true", help="remove previously generated data and exit")
+    args = parser.parse_args()
+    if args.clean:
+        asyncio.run(clean())
+    else:
+        asyncio.run(generate(
+            args.users, args.communities, args.events, args.mean_members, args.mean_attendees,
+            args.skip_ratio, args.chunk_size, args.concurrency, args.seed, not args.no_game_responses
+        ))
@@ -0,0 +1,55 @@
+"""
+Import timing
+ImportTimer records how long each top-level import takes while server.py loads so
+the cost can be reported at startup. Standard library only, so it can be started
+before anything else is imported.
+"""
+from typing import Dict
+import builtins
+import sys
+import time
+
+
+class ImportTimer:
+    """Wraps __import__ and attributes the time of each first-time import to its top-level package
+
+    Nested imports count toward the module that triggered them, so the totals add up to
+    the wall time spent importing.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self.total = 0.0
+        self._depth = 0
+        self._original_import = None
+        self._started = 0.0
+
+    def start(self) -> "ImportTimer":
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+        self._started = time.perf_counter()
+        return self
+
+    def stop(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+            self.total = time.perf_counter() - self._started
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if self._depth or level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        self._depth += 1
+        started = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            self._depth -= 1
+            top_level = name.partition('.')[0]
+            self.timings[top_level] = self.timings.get(top_level, 0.0) + time.perf_counter() - started
+
+    def report(self, limit: int = 15) -> str:
+        slowest = sorted(self.timings.items(), key=lambda item: item[1], reverse=True)[:limit]
+        lines = [f"Imports and module setup took {self.total * 1000:.0f} ms; slowest imports:"]
+        lines += [f"  {seconds * 1000:8.1f} ms  {name}" for name, seconds in slowest]
+        return "\n".join(lines)
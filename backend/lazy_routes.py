@@ -0,0 +1,58 @@
+"""
+Lazily mounted routers
+LazyRouter stands in for a router whose module is only imported when the first
+request under its prefix arrives, keeping rarely used admin pages off the
+cold-start path.
+"""
+from typing import Optional
+import importlib
+import logging
+import time
+
+from starlette.routing import BaseRoute, Match
+from starlette.types import Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class LazyRouter(BaseRoute):
+    """Placeholder route for `module:attribute` router that imports it on the first matching path
+
+    Routes loaded this way don't appear in the OpenAPI schema.
+    """
+
+    def __init__(self, prefix: str, target: str):
+        self.prefix = prefix
+        self.target = target
+        self._routes = None
+
+    @property
+    def routes(self):
+        if self._routes is None:
+            module_name, _, attribute = self.target.partition(':')
+            started = time.perf_counter()
+            router = getattr(importlib.import_module(module_name), attribute)
+            self._routes = router.routes
+            logger.info(f"Loaded {self.target} on first request in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return self._routes
+
+    def _match(self, scope: Scope):
+        partial: Optional[tuple] = None
+        for route in self.routes:
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                return match, child_scope, route
+            if match == Match.PARTIAL and partial is None:
+                partial = (match, child_scope, route)
+        return partial or (Match.NONE, {}, None)
+
+    def matches(self, scope: Scope):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            return Match.NONE, {}
+        match, child_scope, _ = self._match(scope)
+        return match, child_scope
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send):
+        _, child_scope, route = self._match(scope)
+        scope.update(child_scope)
+        await route.handle(scope, receive, send)
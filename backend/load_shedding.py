@@ -0,0 +1,159 @@
+"""
+Load shedding
+Watches event-loop lag (how late a periodic timer fires) and MongoDB connection
+pool wait (time from check-out request to connection). When either passes its
+threshold, a growing share of non-critical requests is answered 503 straight
+away, so matching and health checks keep their latency during spikes.
+"""
+from typing import Optional
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+
+from pymongo import monitoring
+from starlette.responses import JSONResponse
+
+from metrics import REGISTRY, Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+LOAD_SHED_LOOP_LAG_MS = float(os.environ.get('LOAD_SHED_LOOP_LAG_MS', '200'))
+LOAD_SHED_POOL_WAIT_MS = float(os.environ.get('LOAD_SHED_POOL_WAIT_MS', '100'))
+LOOP_LAG_INTERVAL = 0.1  # seconds between lag probes
+SIGNAL_HALF_LIFE = 1.0  # seconds; smoothing for both signals
+POOL_WAIT_STALE_SECONDS = 5.0  # no check-outs for this long counts as no waiting
+
+# Never shed: probes, scraping and the paths shedding exists to protect
+CRITICAL_PATHS = ("/api/health", "/api/ready", "/metrics", "/api/matches", "/api/events/matches")
+
+EVENT_LOOP_LAG = REGISTRY.register(Gauge("event_loop_lag_seconds", "Smoothed event-loop lag"))
+POOL_WAIT = REGISTRY.register(Gauge("mongo_pool_wait_seconds", "Smoothed MongoDB connection check-out wait"))
+SHED_REQUESTS = REGISTRY.register(Counter("load_shed_total", "Requests answered 503 by load shedding", ("reason",)))
+
+
+def smooth(previous: float, sample: float, elapsed: float) -> float:
+    """Exponentially weighted moving average with a time-based half-life"""
+    weight = 0.5 ** (elapsed / SIGNAL_HALF_LIFE)
+    return previous * weight + sample * (1 - weight)
+
+
+class LoopLagMonitor:
+    """Sleeps LOOP_LAG_INTERVAL at a time; anything beyond that is time the loop was busy"""
+
+    def __init__(self):
+        self.lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            elapsed = loop.time() - started
+            self.lag = smooth(self.lag, max(0.0, elapsed - LOOP_LAG_INTERVAL), elapsed)
+            EVENT_LOOP_LAG.set(self.lag)
+
+
+class PoolWaitMonitor(monitoring.ConnectionPoolListener):
+    """Check-out wait per operation; check-outs happen on Motor's executor threads"""
+
+    def __init__(self):
+        self._started = threading.local()
+        self._lock = threading.Lock()
+        self._wait = 0.0
+        self._updated_at = time.monotonic()
+
+    @property
+    def wait(self) -> float:
+        if time.monotonic() - self._updated_at > POOL_WAIT_STALE_SECONDS:
+            return 0.0
+        return self._wait
+
+    def _record(self, seconds: float):
+        now = time.monotonic()
+        with self._lock:
+            self._wait = smooth(self._wait, seconds, now - self._updated_at)
+            self._updated_at = now
+        POOL_WAIT.set(self._wait)
+
+    def connection_check_out_started(self, event):
+        self._started.at = time.monotonic()
+
+    def connection_checked_out(self, event):
+        started = getattr(self._started, "at", None)
+        if started is not None:
+            self._record(time.monotonic() - started)
+            self._started.at = None
+
+    def connection_check_out_failed(self, event):
+        self.connection_checked_out(event)
+
+    # Remaining pool events are not needed
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_created(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): pass
+    def connection_checked_in(self, event): pass
+
+
+loop_lag_monitor = LoopLagMonitor()
+pool_wait_monitor = PoolWaitMonitor()
+
+
+def shed_probability(value: float, threshold: float) -> float:
+    """0 below the threshold, rising linearly to 1 at twice the threshold"""
+    if threshold <= 0 or value <= threshold:
+        return 0.0
+    return min(1.0, value / threshold - 1)
+
+
+class LoadSheddingMiddleware:
+    """ASGI middleware answering 503 (Retry-After: 1) to a share of non-critical requests while overloaded"""
+
+    def __init__(self, app, loop_lag_ms: float = LOAD_SHED_LOOP_LAG_MS, pool_wait_ms: float = LOAD_SHED_POOL_WAIT_MS):
+        self.app = app
+        self.loop_lag_ms = loop_lag_ms
+        self.pool_wait_ms = pool_wait_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(CRITICAL_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        reason = None
+        lag_probability = shed_probability(loop_lag_monitor.lag * 1000, self.loop_lag_ms)
+        pool_probability = shed_probability(pool_wait_monitor.wait * 1000, self.pool_wait_ms)
+        if lag_probability and random.random() < lag_probability:
+            reason = "event_loop_lag"
+        elif pool_probability and random.random() < pool_probability:
+            reason = "mongo_pool_wait"
+        if reason is None:
+            await self.app(scope, receive, send)
+            return
+
+        SHED_REQUESTS.inc((reason,))
+        response = JSONResponse(
+            {"detail": "Server is overloaded, please retry"},
+            status_code=503,
+            headers={"Retry-After": "1"}
+        )
+        await response(scope, receive, send)
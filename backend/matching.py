@@ -0,0 +1,153 @@
+"""
+Vectorized value matching
+Scores one value profile against many items in a single NumPy pass and applies
+the user's action summary (joined items masked out, time-decayed skip penalty)
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Mapping, Optional, Sequence
+import os
+
+import numpy as np
+
+# A fresh skip keeps 80% of the score; the penalty halves every half-life
+SKIP_PENALTY = 0.2
+SKIP_PENALTY_HALF_LIFE_DAYS = float(os.environ.get('SKIP_PENALTY_HALF_LIFE_DAYS', '30'))
+
+# Maximal-marginal-relevance re-ranking: 1.0 keeps the pure score order, lower values
+# push items that look like ones already ranked above them further down
+MMR_LAMBDA = float(os.environ.get('MMR_LAMBDA', '0.7'))
+MMR_CANDIDATES = int(os.environ.get('MMR_CANDIDATES', '50'))
+
+
+def profile_matrix(profiles: Sequence[Mapping[str, float]], keys: Sequence[str]) -> np.ndarray:
+    """(items, keys) matrix of profile values, NaN where an item lacks a dimension"""
+    matrix = np.full((len(profiles), len(keys)), np.nan)
+    for row, profile in enumerate(profiles):
+        for col, key in enumerate(keys):
+            value = profile.get(key)
+            if value is not None:
+                matrix[row, col] = value
+    return matrix
+
+
+def value_similarity(user_profile: Mapping[str, float], item_profiles: Sequence[Mapping[str, float]]) -> np.ndarray:
+    """0-100 score per item: mean of 1 - |difference| over shared dimensions (50 when none are shared)"""
+    keys = list(user_profile.keys())
+    if not item_profiles:
+        return np.zeros(0)
+    user_vector = np.array([user_profile[key] for key in keys], dtype=float)
+    items = profile_matrix(item_profiles, keys)
+    similarities = 1 - np.abs(items - user_vector)
+    shared = ~np.isnan(similarities)
+    counts = shared.sum(axis=1)
+    totals = np.where(shared, similarities, 0.0).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scores = np.where(counts > 0, totals / counts * 100, 50.0)
+    return scores
+
+
+def skip_penalty(item_ids: Sequence[str], skipped: Mapping[str, Optional[datetime]],
+                 now: Optional[datetime] = None,
+                 half_life_days: float = SKIP_PENALTY_HALF_LIFE_DAYS) -> np.ndarray:
+    """Multiplier per item: 1 if never skipped, 1 - SKIP_PENALTY decaying back toward 1 with age"""
+    factors = np.ones(len(item_ids))
+    if not skipped:
+        return factors
+    now = now or datetime.now(timezone.utc)
+    for i, item_id in enumerate(item_ids):
+        if item_id not in skipped:
+            continue
+        skipped_at = skipped[item_id]
+        if half_life_days <= 0 or skipped_at is None:
+            factors[i] = 1 - SKIP_PENALTY
+            continue
+        if skipped_at.tzinfo is None:
+            skipped_at = skipped_at.replace(tzinfo=timezone.utc)
+        age_days = max((now - skipped_at).total_seconds() / 86400, 0.0)
+        factors[i] = 1 - SKIP_PENALTY * 0.5 ** (age_days / half_life_days)
+    return factors
+
+
+def membership_mask(item_ids: Sequence[str], joined: Mapping[str, object]) -> np.ndarray:
+    """True for items the user has already joined"""
+    if not joined:
+        return np.zeros(len(item_ids), dtype=bool)
+    return np.fromiter((item_id in joined for item_id in item_ids), dtype=bool, count=len(item_ids))
+
+
+def blend_scores(value_scores: np.ndarray, cf_scores: Optional[np.ndarray], cf_weight: float) -> np.ndarray:
+    """Mix in collaborative-filtering scores where the model has one; value scores elsewhere"""
+    if cf_scores is None or cf_weight <= 0:
+        return value_scores
+    blended = (1 - cf_weight) * value_scores + cf_weight * cf_scores
+    return np.where(np.isnan(cf_scores), value_scores, blended)
+
+
+def score_items(user_profile: Mapping[str, float], items: List[Dict], id_field: str,
+                summary: Optional[Mapping[str, Mapping]] = None,
+                cf_scores: Optional[np.ndarray] = None, cf_weight: float = 0.0) -> np.ndarray:
+    """Scores for `items` with skip penalties applied; joined items come back as NaN"""
+    scores = value_similarity(user_profile, [item['value_profile'] for item in items])
+    scores = blend_scores(scores, cf_scores, cf_weight)
+    if summary:
+        item_ids = [item[id_field] for item in items]
+        scores = scores * skip_penalty(item_ids, summary.get('skipped') or {})
+        scores[membership_mask(item_ids, summary.get('joined') or {})] = np.nan
+    return scores
+
+
+def similarity_matrix(user_matrix: np.ndarray, item_matrix: np.ndarray) -> np.ndarray:
+    """(users, items) scores with the value_similarity formula, for NaN-padded profile matrices
+
+    Accumulates one dimension at a time so memory stays at a few (users, items) arrays.
+    """
+    users, items = len(user_matrix), len(item_matrix)
+    totals = np.zeros((users, items), dtype=np.float32)
+    counts = np.zeros((users, items), dtype=np.float32)
+    for col in range(user_matrix.shape[1]):
+        similarities = 1 - np.abs(user_matrix[:, col, None] - item_matrix[None, :, col])
+        shared = ~np.isnan(similarities)
+        totals += np.where(shared, similarities, 0)
+        counts += shared
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, totals / counts * 100, 50.0).astype(np.float32)
+
+
+def top_k_per_row(scores: np.ndarray, k: int):
+    """(indices, scores) of each row's k best columns, best first"""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        empty = np.zeros((len(scores), 0))
+        return empty.astype(np.int64), empty
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind='stable')
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+def mmr_order(scores: np.ndarray, item_matrix: np.ndarray, mmr_lambda: float = MMR_LAMBDA,
+              candidates: int = MMR_CANDIDATES) -> np.ndarray:
+    """Ranking of item indices: the top `candidates` by score re-ranked with MMR, the rest by score
+
+    Each pick maximises lambda * relevance - (1 - lambda) * max similarity to the items
+    already picked, with relevance and similarity both on a 0-1 scale.
+    """
+    order = np.argsort(-scores, kind='stable')
+    if mmr_lambda >= 1 or len(order) < 3:
+        return order
+    head, tail = order[:candidates], order[candidates:]
+    relevance = scores[head] / 100
+    pairwise = similarity_matrix(item_matrix[head], item_matrix[head]) / 100
+
+    picked = [0]  # the best-scoring item always leads
+    available = np.ones(len(head), dtype=bool)
+    available[0] = False
+    max_similarity = pairwise[0].copy()
+    for _ in range(len(head) - 1):
+        marginal = mmr_lambda * relevance - (1 - mmr_lambda) * max_similarity
+        marginal[~available] = -np.inf
+        best = int(np.argmax(marginal))
+        picked.append(best)
+        available[best] = False
+        np.maximum(max_similarity, pairwise[best], out=max_similarity)
+    return np.concatenate([head[picked], tail])
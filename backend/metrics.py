@@ -0,0 +1,227 @@
+"""
+Lightweight Prometheus-style metrics
+Per-route latency histograms, status counts, in-flight gauge and response sizes,
+rendered in Prometheus text format on /metrics
+"""
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+import threading
+import time
+
+metrics_router = APIRouter()
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """Monotonic counter keyed by a tuple of label values"""
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: Tuple = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+            for labels, value in list(self._values.items())
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+    kind = "gauge"
+
+    def dec(self, labels: Tuple = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+    def set(self, value: float, labels: Tuple = ()):
+        with self._lock:
+            self._values[labels] = value
+
+
+class HistogramSeries:
+    """Bucket counts for one label combination; buckets are allocated once up front"""
+
+    __slots__ = ("upper_bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.upper_bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Histogram:
+    """Histogram keyed by a tuple of label values"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple, HistogramSeries] = {}
+        self._lock = threading.Lock()
+
+    def series(self, labels: Tuple = ()) -> HistogramSeries:
+        """Return the series for a label combination, creating it on first use"""
+        series = self._series.get(labels)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(labels, HistogramSeries(self.buckets))
+        return series
+
+    def observe(self, value: float, labels: Tuple = ()):
+        self.series(labels).observe(value)
+
+    def render(self) -> List[str]:
+        lines = []
+        for labels, series in list(self._series.items()):
+            cumulative = 0
+            for upper, bucket_count in zip(self.buckets, series.counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels(self.labelnames, labels, 'le="%s"' % upper)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            inf_labels = _format_labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf_labels} {series.count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series.sum}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {series.count}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Request latency by route template",
+    ("method", "route")
+))
+REQUEST_COUNT = REGISTRY.register(Counter(
+    "http_requests_total", "Requests by route template and status code",
+    ("method", "route", "status")
+))
+RESPONSE_SIZE = REGISTRY.register(Histogram(
+    "http_response_size_bytes", "Response body size by route template",
+    ("method", "route"), buckets=SIZE_BUCKETS
+))
+REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "Requests currently being served"
+))
+
+
+class _RouteStats:
+    """Pre-resolved series for one (method, route) so the hot path does no label lookups"""
+
+    __slots__ = ("latency", "size", "statuses")
+
+    def __init__(self, method: str, route: str):
+        self.latency = REQUEST_LATENCY.series((method, route))
+        self.size = RESPONSE_SIZE.series((method, route))
+        self.statuses: Dict[int, Tuple] = {}
+
+    def status_labels(self, method: str, route: str, status: int) -> Tuple:
+        labels = self.statuses.get(status)
+        if labels is None:
+            labels = self.statuses[status] = (method, route, str(status))
+        return labels
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status, size and in-flight requests"""
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Dict[Tuple[str, str], _RouteStats] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            elapsed = time.perf_counter() - started
+            # The router stores the matched route in the scope; use its template, never the raw path
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            key = (method, template)
+            stats = self._routes.get(key)
+            if stats is None:
+                stats = self._routes[key] = _RouteStats(method, template)
+            stats.latency.observe(elapsed)
+            stats.size.observe(response_size)
+            REQUEST_COUNT.inc(stats.status_labels(method, template, status_code))
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of all registered metrics"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
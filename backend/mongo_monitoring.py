@@ -0,0 +1,182 @@
+"""
+MongoDB command monitoring
+Per-command latency by collection and operation, per-request attribution via a
+contextvar and a slow-query log with filter shapes
+"""
+from pymongo import monitoring
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+import logging
+import os
+import threading
+
+from metrics import REGISTRY, Counter, Histogram
+
+logger = logging.getLogger("mongo.slow")
+
+SLOW_QUERY_MS = float(os.environ.get('MONGO_SLOW_QUERY_MS', '100'))
+
+# Handshake, auth and topology chatter is not interesting per request
+IGNORED_COMMANDS = frozenset({
+    "hello", "isMaster", "ismaster", "ping", "saslStart", "saslContinue",
+    "authenticate", "endSessions", "buildInfo", "getnonce",
+})
+
+COMMAND_LATENCY = REGISTRY.register(Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency by collection and operation",
+    ("collection", "command")
+))
+COMMAND_COUNT = REGISTRY.register(Counter(
+    "mongo_commands_total", "MongoDB commands by collection, operation and outcome",
+    ("collection", "command", "outcome")
+))
+SLOW_COMMANDS = REGISTRY.register(Counter(
+    "mongo_slow_commands_total", "MongoDB commands slower than MONGO_SLOW_QUERY_MS",
+    ("collection", "command")
+))
+COMMANDS_PER_REQUEST = REGISTRY.register(Histogram(
+    "mongo_commands_per_request", "MongoDB commands issued while serving one request",
+    ("route",), buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+))
+MONGO_TIME_PER_REQUEST = REGISTRY.register(Histogram(
+    "mongo_time_per_request_seconds", "Total MongoDB command time spent while serving one request",
+    ("route",)
+))
+
+
+class RequestMongoStats:
+    """Mongo commands attributed to the request currently being served"""
+
+    __slots__ = ("scope", "commands", "duration")
+
+    def __init__(self, scope: Optional[Dict[str, Any]] = None):
+        self.scope = scope
+        self.commands = 0
+        self.duration = 0.0
+
+    @property
+    def route(self) -> str:
+        if not self.scope:
+            return "background"
+        # The template, never the raw path: every distinct 404 path would be a new label value
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+
+# Motor copies the caller's context into its executor threads, so listener
+# callbacks see the stats object of the request that issued the command
+current_request_stats: ContextVar[Optional[RequestMongoStats]] = ContextVar(
+    "mongo_request_stats", default=None
+)
+
+
+def filter_shape(value: Any, depth: int = 0) -> Any:
+    """Replace literal values with their type names, keeping field names and operators"""
+    if depth > 6:
+        return "..."
+    if isinstance(value, dict):
+        return {key: filter_shape(item, depth + 1) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return []
+        if all(not isinstance(item, (dict, list, tuple)) for item in value):
+            return f"<{len(value)} x {type(value[0]).__name__}>"
+        return [filter_shape(item, depth + 1) for item in value[:5]]
+    return type(value).__name__
+
+
+def command_shape(command_name: str, command: Dict[str, Any]) -> Any:
+    """Shape of the part of a command that determines index usage"""
+    if "filter" in command:
+        return filter_shape(command["filter"])
+    if "query" in command:
+        return filter_shape(command["query"])
+    if command_name == "aggregate":
+        pipeline = command.get("pipeline", [])
+        match = next((stage["$match"] for stage in pipeline if "$match" in stage), None)
+        return {
+            "pipeline": " > ".join(next(iter(stage), "?") for stage in pipeline),
+            "$match": filter_shape(match)
+        }
+    if command_name in ("update", "delete"):
+        statements = command.get("updates" if command_name == "update" else "deletes") or []
+        return filter_shape(statements[0].get("q")) if statements else None
+    if command_name == "insert":
+        return {"documents": len(command.get("documents", []))}
+    return None
+
+
+class CommandMonitor(monitoring.CommandListener):
+    """Records per-command latency, attributes commands to requests and logs slow ones"""
+
+    def __init__(self, slow_query_ms: float = SLOW_QUERY_MS):
+        self.slow_query_ms = slow_query_ms
+        self._pending: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        command = event.command
+        collection = command.get(event.command_name)
+        if event.command_name == "getMore":
+            collection = command.get("collection")
+        if not isinstance(collection, str):
+            collection = "-"
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (collection, command)
+
+    def _finish(self, event, outcome: str):
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        collection, command = pending
+        seconds = event.duration_micros / 1e6
+        labels = (collection, event.command_name)
+        COMMAND_LATENCY.observe(seconds, labels)
+        COMMAND_COUNT.inc((collection, event.command_name, outcome))
+
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.commands += 1
+            stats.duration += seconds
+
+        if seconds * 1000 >= self.slow_query_ms:
+            SLOW_COMMANDS.inc(labels)
+            logger.warning(
+                f"Slow Mongo {event.command_name} on {collection}: {seconds * 1000:.1f}ms "
+                f"filter={command_shape(event.command_name, command)} "
+                f"route={stats.route if stats else 'background'}"
+            )
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
+
+
+command_monitor = CommandMonitor()
+
+
+class MongoRequestMiddleware:
+    """ASGI middleware that opens a per-request Mongo stats scope and exports its totals"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestMongoStats(scope)
+        token = current_request_stats.set(stats)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_request_stats.reset(token)
+            route = (stats.route,)
+            COMMANDS_PER_REQUEST.observe(stats.commands, route)
+            MONGO_TIME_PER_REQUEST.observe(stats.duration, route)
@@ -0,0 +1,142 @@
+"""
+Nightly match precomputation
+Scores every user against every community and upcoming event in (users x items)
+matrix blocks and stores each user's top-k ids in `precomputed_matches`.
+
+    python precompute_matches.py [--top-k 100] [--block-size 0] [--dry-run]
+
+/api/matches and /api/events/matches re-rank these candidates (plus anything
+created since the run) instead of scanning the catalogue, and fall back to
+on-demand scoring when a user's entry is missing, older than
+PRECOMPUTED_MATCHES_MAX_AGE, or predates their latest profile update.
+"""
+import argparse
+import asyncio
+import os
+import resource
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from game_scoring import PROFILE_KEYS
+from matching import profile_matrix, similarity_matrix, top_k_per_row
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+DB_NAME = os.environ.get('DB_NAME', 'community_matching_db')
+
+# Upper bound on (users x items) cells scored per block when --block-size is 0
+BLOCK_CELLS = 4_000_000
+
+
+def peak_memory_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def load_catalogue(collection, id_field: str, query: dict):
+    items = await collection.find(query, {"_id": 0, id_field: 1, "value_profile": 1}).to_list(None)
+    ids = [item[id_field] for item in items]
+    return ids, profile_matrix([item.get("value_profile") or {} for item in items], PROFILE_KEYS).astype(np.float32)
+
+
+def top_entries(user_block: np.ndarray, ids, items: np.ndarray, id_field: str, top_k: int):
+    if not ids:
+        return [[] for _ in range(len(user_block))]
+    top, scores = top_k_per_row(similarity_matrix(user_block, items), top_k)
+    return [
+        [{id_field: ids[i], "score": round(float(score), 1)} for i, score in zip(row, row_scores)]
+        for row, row_scores in zip(top, scores)
+    ]
+
+
+async def precompute_matches(top_k: int = 100, block_size: int = 0, dry_run: bool = False):
+    client = AsyncIOMotorClient(MONGO_URL)
+    db = client[DB_NAME]
+
+    await db.precomputed_matches.create_index("user_id", unique=True)
+
+    # Snapshot time: serving also considers items created after this
+    computed_at = datetime.now(timezone.utc)
+    started = time.perf_counter()
+    (community_ids, communities), (event_ids, events) = await asyncio.gather(
+        load_catalogue(db.communities, "community_id", {"community_id": {"$exists": True}}),
+        load_catalogue(db.events, "event_id", {"event_id": {"$exists": True}, "date": {"$gte": computed_at}}),
+    )
+    if not block_size:
+        block_size = max(1, BLOCK_CELLS // max(len(community_ids), len(event_ids), 1))
+    print(f"📚 {len(community_ids):,} communities, {len(event_ids):,} upcoming events; blocks of {block_size:,} users")
+
+    async def write_block(user_ids, community_entries, event_entries):
+        if dry_run:
+            return
+        await db.precomputed_matches.bulk_write([
+            UpdateOne(
+                {"user_id": user_id},
+                {"$set": {"communities": top_communities, "events": top_events, "computed_at": computed_at}},
+                upsert=True
+            )
+            for user_id, top_communities, top_events in zip(user_ids, community_entries, event_entries)
+        ], ordered=False)
+
+    def score_block(user_ids, profiles):
+        user_block = profile_matrix(profiles, PROFILE_KEYS).astype(np.float32)
+        return (
+            top_entries(user_block, community_ids, communities, "community_id", top_k),
+            top_entries(user_block, event_ids, events, "event_id", top_k),
+        )
+
+    cursor = db.users.find(
+        {"value_profile": {"$type": "object"}},
+        {"_id": 0, "user_id": 1, "value_profile": 1},
+        batch_size=block_size
+    )
+    processed = 0
+    pending = None
+    user_ids, profiles = [], []
+
+    async def flush():
+        nonlocal pending, processed, user_ids, profiles
+        community_entries, event_entries = score_block(user_ids, profiles)
+        processed += len(user_ids)
+        # One write in flight: the next block is read and scored while this one is written
+        if pending:
+            await pending
+        pending = asyncio.create_task(write_block(user_ids, community_entries, event_entries))
+        user_ids, profiles = [], []
+        elapsed = time.perf_counter() - started
+        print(f"  … {processed:,} users ({processed / elapsed:,.0f} users/s, peak {peak_memory_mb():,.0f} MB)")
+
+    async for user in cursor:
+        user_ids.append(user["user_id"])
+        profiles.append(user["value_profile"])
+        if len(user_ids) >= block_size:
+            await flush()
+    if user_ids:
+        await flush()
+    if pending:
+        await pending
+
+    elapsed = time.perf_counter() - started
+    rate = processed / elapsed if elapsed else 0
+    print(
+        f"✅ Precomputed top-{top_k} matches for {processed:,} users in {elapsed:.1f}s "
+        f"({rate:,.0f} users/s, peak memory {peak_memory_mb():,.0f} MB){' [dry run]' if dry_run else ''}"
+    )
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute every user's top community and event matches")
+    parser.add_argument("--top-k", type=int, default=100)
+    parser.add_argument("--block-size", type=int, default=0, help="users per block (0 = size to the catalogue)")
+    parser.add_argument("--dry-run", action="store_true", help="score without writing")
+    args = parser.parse_args()
+    asyncio.run(precompute_matches(args.top_k, args.block_size, args.dry_run))
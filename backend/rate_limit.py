@@ -0,0 +1,99 @@
+"""
+Rate limiting
+Token buckets keyed by user or client IP. Each active key costs one small list;
+buckets that have refilled completely are equivalent to no bucket, so they are
+evicted every RATE_LIMIT_EVICT_SECONDS without changing any decision.
+"""
+from typing import Callable, Dict, List
+import math
+import os
+import time
+
+from fastapi import HTTPException, Request
+
+from metrics import REGISTRY, Counter, Gauge
+
+RATE_LIMIT_EVICT_SECONDS = float(os.environ.get('RATE_LIMIT_EVICT_SECONDS', '60'))
+# Number of reverse proxies in front of the app that append to X-Forwarded-For. 0 ignores
+# the header (clients can put anything in it); N takes the N-th address from the right,
+# the one the outermost trusted proxy saw.
+RATE_LIMIT_TRUSTED_PROXIES = int(os.environ.get('RATE_LIMIT_TRUSTED_PROXIES', '0'))
+
+RATE_LIMITED = REGISTRY.register(Counter("rate_limited_total", "Requests rejected with 429", ("limiter",)))
+RATE_LIMIT_KEYS = REGISTRY.register(Gauge("rate_limit_keys", "Keys with a partially drained bucket", ("limiter",)))
+
+
+class RateLimiter:
+    """`rate` tokens per second refilling up to `burst`; each request takes `cost` tokens.
+    A rate of 0 (or less) disables the limiter"""
+
+    def __init__(self, name: str, rate: float, burst: float):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self._labels = (name,)
+        self._buckets: Dict[str, List[float]] = {}  # key -> [tokens, updated_at]
+        self._next_eviction = time.monotonic() + RATE_LIMIT_EVICT_SECONDS
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def acquire(self, key: str, cost: float = 1.0) -> float:
+        """0 if allowed, otherwise seconds until `cost` tokens are available"""
+        if not self.enabled:
+            return 0.0
+        now = time.monotonic()
+        if now >= self._next_eviction:
+            self.evict(now)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now]
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            return 0.0
+        RATE_LIMITED.inc(self._labels)
+        return (cost - bucket[0]) / self.rate
+
+    def evict(self, now: float = None) -> int:
+        """Drop buckets that have refilled to `burst` since their last request"""
+        now = now if now is not None else time.monotonic()
+        idle = [key for key, (tokens, updated_at) in self._buckets.items()
+                if tokens + (now - updated_at) * self.rate >= self.burst]
+        for key in idle:
+            del self._buckets[key]
+        self._next_eviction = now + RATE_LIMIT_EVICT_SECONDS
+        RATE_LIMIT_KEYS.set(len(self._buckets), self._labels)
+        return len(idle)
+
+    def check(self, key: str, cost: float = 1.0):
+        """Raise 429 with Retry-After when `key` is over its limit"""
+        retry_after = self.acquire(key, cost)
+        if retry_after:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+            )
+
+
+def client_ip(request: Request, trusted_proxies: int = None) -> str:
+    trusted_proxies = RATE_LIMIT_TRUSTED_PROXIES if trusted_proxies is None else trusted_proxies
+    if trusted_proxies > 0:
+        hops = [hop.strip() for hop in request.headers.get('x-forwarded-for', '').split(',') if hop.strip()]
+        if len(hops) >= trusted_proxies:
+            return hops[-trusted_proxies]
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(limiter: RateLimiter, key: Callable[[Request], str]):
+    """Dependency applying `limiter` to the key derived from the request"""
+    async def dependency(request: Request):
+        limiter.check(key(request))
+    return dependency
@@ -0,0 +1,183 @@
+"""
+Bulk profile re-scoring job
+Recomputes every user's value_profile / environment_preferences from their stored
+game_responses after VALUE_WORDS, WORD_TO_VALUE or the preference thresholds change.
+
+    python rescore_profiles.py [--chunk-size 5000] [--restart] [--dry-run]
+
+Progress is checkpointed per chunk in `job_checkpoints`, so an interrupted run
+resumes after the last user written.
+
+Running servers keep the old profiles in their reverse-matching index (used for
+fan-out) until its next reload, at most REVERSE_MATCH_REFRESH_SECONDS later;
+restart them to pick the new profiles up at once. Match results need nothing:
+they are cached per profile.
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from game_scoring import (
+    GAME_TILES, decode_preferences, decode_profile, encode_selections, score_batch,
+    score_selections, table_fingerprint
+)
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+DB_NAME = os.environ.get('DB_NAME', 'community_matching_db')
+JOB_ID = "rescore_profiles"
+
+
+def selections_pipeline(after_user_id=None):
+    """Latest pick per (user, round), grouped into one row per user in user_id order. The round
+    is derived from the word (stored round_number is 0- or 1-based depending on the client)"""
+    pipeline = []
+    if after_user_id:
+        pipeline.append({"$match": {"user_id": {"$gt": after_user_id}}})
+    word_round = {"$switch": {
+        "branches": [
+            {"case": {"$in": ["$selected_word", words]}, "then": round_index}
+            for round_index, words in enumerate(GAME_TILES)
+        ],
+        "default": -1  # unknown words; the user is then scored by counting
+    }}
+    pipeline += [
+        {"$sort": {"user_id": 1, "timestamp": 1}},
+        {"$group": {
+            "_id": {"user_id": "$user_id", "round": word_round},
+            "word": {"$last": "$selected_word"}
+        }},
+        {"$group": {
+            "_id": "$_id.user_id",
+            "selections": {"$push": {"round": "$_id.round", "word": "$word"}}
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+    return pipeline
+
+
+def score_chunk(rows, scored_at):
+    """Build profile updates for a chunk of {_id: user_id, selections: [...]} rows"""
+    codes = np.array([encode_selections(row["selections"]) for row in rows], dtype=object)
+    on_grid = np.array([code is not None for code in codes], dtype=bool)
+
+    updates = [None] * len(rows)
+    if on_grid.any():
+        grid_indices = np.flatnonzero(on_grid)
+        profiles, preferences = score_batch(codes[grid_indices].astype(np.int64))
+        for i, profile_row, preference_row in zip(grid_indices, profiles, preferences):
+            updates[i] = (decode_profile(profile_row), decode_preferences(preference_row))
+    for i in np.flatnonzero(~on_grid):
+        updates[i] = score_selections(rows[i]["selections"])
+
+    return [
+        UpdateOne(
+            {"user_id": row["_id"]},
+            {"$set": {
+                "value_profile": value_profile,
+                "environment_preferences": environment_preferences,
+                "game_completed": True,
+                "profile_updated_at": scored_at
+            }}
+        )
+        for row, (value_profile, environment_preferences) in zip(rows, updates)
+    ]
+
+
+async def rescore_profiles(chunk_size: int = 5000, restart: bool = False, dry_run: bool = False):
+    client = AsyncIOMotorClient(MONGO_URL)
+    db = client[DB_NAME]
+    fingerprint = table_fingerprint()
+
+    await db.game_responses.create_index([("user_id", 1), ("timestamp", 1)])
+
+    checkpoint = None if restart else await db.job_checkpoints.find_one({"_id": JOB_ID})
+    if checkpoint and checkpoint.get("fingerprint") != fingerprint:
+        print("⚠️  Scoring rules changed since the last checkpoint; starting over")
+        checkpoint = None
+    if checkpoint and checkpoint.get("completed"):
+        checkpoint = None
+    after_user_id = checkpoint["last_user_id"] if checkpoint else None
+    processed = checkpoint.get("processed", 0) if checkpoint else 0
+    if after_user_id:
+        print(f"↪️  Resuming after {after_user_id} ({processed:,} users already done)")
+
+    scored_at = datetime.now(timezone.utc)
+    started = time.perf_counter()
+    run_processed = 0
+
+    async def write_chunk(operations, last_user_id, total):
+        if not dry_run:
+            await db.users.bulk_write(operations, ordered=False)
+            await db.job_checkpoints.update_one(
+                {"_id": JOB_ID},
+                {"$set": {
+                    "last_user_id": last_user_id,
+                    "processed": total,
+                    "fingerprint": fingerprint,
+                    "completed": False,
+                    "updated_at": datetime.now(timezone.utc)
+                }},
+                upsert=True
+            )
+
+    cursor = db.game_responses.aggregate(
+        selections_pipeline(after_user_id), allowDiskUse=True, batchSize=chunk_size
+    )
+    pending = None
+    rows = []
+    async for row in cursor:
+        rows.append(row)
+        if len(rows) < chunk_size:
+            continue
+        operations = score_chunk(rows, scored_at)
+        processed += len(rows)
+        run_processed += len(rows)
+        # Only one write in flight: scoring the next chunk overlaps with writing this one,
+        # and the checkpoint never gets ahead of what has been written
+        if pending:
+            await pending
+        pending = asyncio.create_task(write_chunk(operations, rows[-1]["_id"], processed))
+        rows = []
+        elapsed = time.perf_counter() - started
+        print(f"  … {processed:,} users ({run_processed / elapsed:,.0f} users/s)")
+
+    if rows:
+        operations = score_chunk(rows, scored_at)
+        processed += len(rows)
+        run_processed += len(rows)
+        if pending:
+            await pending
+        pending = asyncio.create_task(write_chunk(operations, rows[-1]["_id"], processed))
+    if pending:
+        await pending
+
+    if not dry_run:
+        await db.job_checkpoints.update_one({"_id": JOB_ID}, {"$set": {"completed": True}}, upsert=True)
+
+    elapsed = time.perf_counter() - started
+    rate = run_processed / elapsed if elapsed else 0
+    print(f"✅ Re-scored {run_processed:,} users in {elapsed:.1f}s ({rate:,.0f} users/s){' [dry run]' if dry_run else ''}")
+    if run_processed and not dry_run:
+        print("ℹ️  Running servers use the new profiles for reverse matching after their next index "
+              "reload (REVERSE_MATCH_REFRESH_SECONDS); restart them to apply now")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute stored value profiles from game_responses")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--restart", action="store_true", help="ignore any saved checkpoint")
+    parser.add_argument("--dry-run", action="store_true", help="score without writing")
+    args = parser.parse_args()
+    asyncio.run(rescore_profiles(args.chunk_size, args.restart, args.dry_run))
@@ -0,0 +1,104 @@
+"""
+Resident indexes
+Shared reload logic for the in-memory indexes built from MongoDB (search,
+reverse matching). A reload scans into a fresh copy while the current one keeps
+answering queries; writes made during the scan are recorded and replayed onto
+the copy before it is swapped in.
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Hashable, Optional
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ResidentIndex(ABC):
+    """Subclasses set `refresh_seconds` and implement the abstract hooks below"""
+
+    refresh_seconds: float = 600.0
+
+    def __init__(self):
+        self.loaded_at: Optional[float] = None
+        self._load_lock = asyncio.Lock()
+        self._pending: Optional[Dict[Hashable, Any]] = None
+        self._reload_task: Optional[asyncio.Task] = None
+
+    def _record(self, key: Hashable, value: Any):
+        """Call from every write; while a reload is scanning, keeps the write for replay"""
+        if self._pending is not None:
+            self._pending[key] = value
+
+    @abstractmethod
+    def _empty(self) -> "ResidentIndex":
+        """New, empty index of the same kind to scan into"""
+
+    @abstractmethod
+    async def _scan(self, db, fresh: "ResidentIndex"):
+        """Fill `fresh` from MongoDB"""
+
+    @abstractmethod
+    def _replay(self, fresh: "ResidentIndex", key: Hashable, value: Any):
+        """Apply one write recorded during the scan to `fresh`"""
+
+    @abstractmethod
+    def _swap(self, fresh: "ResidentIndex"):
+        """Take over the contents of `fresh`"""
+
+    @abstractmethod
+    def _describe(self) -> str:
+        """Log line for a finished load"""
+
+    @property
+    def is_stale(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at >= self.refresh_seconds
+
+    async def load(self, db):
+        """Rebuild from MongoDB and swap the result in"""
+        started = time.perf_counter()
+        fresh = self._empty()
+        self._pending = {}
+        try:
+            await self._scan(db, fresh)
+            for key, value in self._pending.items():
+                self._replay(fresh, key, value)
+        finally:
+            self._pending = None
+        self._swap(fresh)
+        self.loaded_at = time.monotonic()
+        logger.info(f"{self._describe()} in {time.perf_counter() - started:.2f}s")
+
+    async def ensure_loaded(self, db):
+        """Load on first use (callers wait for it); once older than refresh_seconds, reload in
+        the background and keep serving the current index until the swap (picks up writes
+        made through other replicas)"""
+        if self.loaded_at is None:
+            async with self._load_lock:
+                if self.loaded_at is None:
+                    await self.load(db)
+            return
+        if self.is_stale and not self.reloading:
+            self._reload_task = asyncio.create_task(self._reload(db))
+
+    @property
+    def reloading(self) -> bool:
+        return self._reload_task is not None and not self._reload_task.done()
+
+    async def _reload(self, db):
+        try:
+            await self.load(db)
+        except Exception:
+            # Retry after another refresh interval rather than on every request
+            self.loaded_at = time.monotonic()
+            logger.exception(f"Background reload of {type(self).__name__} failed")
+
+    async def stop(self):
+        """Cancel a background reload (shutdown)"""
+        if self.reloading:
+            self._reload_task.cancel()
+            try:
+                await self._reload_task
+            except asyncio.CancelledError:
+                pass
+        self._reload_task = None
@@ -0,0 +1,120 @@
+"""
+Reverse matching
+Keeps every user's value_profile in one resident float32 matrix so the best
+users for a new community or event are found in a single vectorized pass
+"""
+from typing import Dict, Iterable, List, Mapping, Tuple
+import logging
+import os
+
+import numpy as np
+
+from game_scoring import PROFILE_KEYS
+from resident_index import ResidentIndex
+
+logger = logging.getLogger(__name__)
+
+REVERSE_MATCH_REFRESH_SECONDS = float(os.environ.get('REVERSE_MATCH_REFRESH_SECONDS', '600'))
+
+
+class UserProfileIndex(ResidentIndex):
+    """Users x PROFILE_KEYS matrix (NaN for missing dimensions) with O(1) in-place updates"""
+
+    refresh_seconds = REVERSE_MATCH_REFRESH_SECONDS
+
+    def __init__(self, keys: Tuple[str, ...] = PROFILE_KEYS, initial_capacity: int = 1024):
+        super().__init__()
+        self.keys = keys
+        self._key_index = {key: i for i, key in enumerate(keys)}
+        self._matrix = np.full((initial_capacity, len(keys)), np.nan, dtype=np.float32)
+        self._user_ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._has_gaps = False
+
+    def __len__(self) -> int:
+        return len(self._user_ids)
+
+    def _vector(self, profile: Mapping[str, float]) -> np.ndarray:
+        vector = np.full(len(self.keys), np.nan, dtype=np.float32)
+        for key, value in profile.items():
+            col = self._key_index.get(key)
+            if col is not None and value is not None:
+                vector[col] = value
+        return vector
+
+    def upsert(self, user_id: str, profile: Mapping[str, float]):
+        """Insert or replace one user's profile (called from submit_game)"""
+        self._record(user_id, profile)
+        vector = self._vector(profile)
+        row = self._rows.get(user_id)
+        if row is None:
+            row = len(self._user_ids)
+            if row >= len(self._matrix):
+                grown = np.full((len(self._matrix) * 2, len(self.keys)), np.nan, dtype=np.float32)
+                grown[:row] = self._matrix[:row]
+                self._matrix = grown
+            self._user_ids.append(user_id)
+            self._rows[user_id] = row
+        self._matrix[row] = vector
+        if np.isnan(vector).any():
+            self._has_gaps = True
+
+    def _empty(self) -> "UserProfileIndex":
+        return UserProfileIndex(self.keys, initial_capacity=max(1024, len(self._user_ids)))
+
+    async def _scan(self, db, fresh: "UserProfileIndex", batch_size: int = 10000):
+        cursor = db.users.find(
+            {"value_profile": {"$type": "object"}},
+            {"_id": 0, "user_id": 1, "value_profile": 1},
+            batch_size=batch_size
+        )
+        async for user in cursor:
+            fresh.upsert(user["user_id"], user["value_profile"])
+
+    def _replay(self, fresh: "UserProfileIndex", user_id: str, profile: Mapping[str, float]):
+        fresh.upsert(user_id, profile)
+
+    def _swap(self, fresh: "UserProfileIndex"):
+        self._matrix, self._user_ids, self._rows, self._has_gaps = (
+            fresh._matrix, fresh._user_ids, fresh._rows, fresh._has_gaps
+        )
+
+    def _describe(self) -> str:
+        return f"Loaded {len(self):,} user profiles for reverse matching"
+
+    def scores(self, item_profile: Mapping[str, float]) -> np.ndarray:
+        """0-100 score per user, same formula as forward matching (50 when nothing is shared)"""
+        n = len(self._user_ids)
+        cols = [self._key_index[key] for key in item_profile if key in self._key_index and item_profile[key] is not None]
+        if not cols:
+            return np.full(n, 50.0, dtype=np.float32)
+        item_vector = np.array([item_profile[self.keys[col]] for col in cols], dtype=np.float32)
+        similarities = 1 - np.abs(self._matrix[:n, cols] - item_vector)
+        if not self._has_gaps:
+            return similarities.mean(axis=1) * 100
+        shared = ~np.isnan(similarities)
+        counts = shared.sum(axis=1)
+        totals = np.nansum(similarities, axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, totals / counts * 100, 50.0).astype(np.float32)
+
+    def top_k(self, item_profile: Mapping[str, float], k: int,
+              exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        """Best-matching users for an item, highest score first"""
+        scores = self.scores(item_profile)
+        for user_id in exclude:
+            row = self._rows.get(user_id)
+            if row is not None:
+                scores[row] = -np.inf
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [
+            (self._user_ids[row], round(float(scores[row]), 1))
+            for row in top if scores[row] != -np.inf
+        ]
+
+
+user_profile_index = UserProfileIndex()
@@ -0,0 +1,240 @@
+"""
+Catalogue search
+In-process inverted index over community and event names, descriptions and tags,
+scored with BM25 (name and tag matches weigh more than description matches).
+The last query word is matched as a prefix for typeahead: sorted vocabulary +
+bisect finds its completions without scanning the postings.
+"""
+from bisect import bisect_left, insort
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+import logging
+import math
+import os
+import re
+
+import numpy as np
+
+from matching import value_similarity
+from resident_index import ResidentIndex
+
+logger = logging.getLogger(__name__)
+
+SEARCH_REFRESH_SECONDS = float(os.environ.get('SEARCH_REFRESH_SECONDS', '600'))
+
+# Items searched: kind -> (collection, id field)
+SEARCH_KINDS = {
+    "community": ("communities", "community_id"),
+    "event": ("events", "event_id"),
+}
+KIND_CODES = {kind: code for code, kind in enumerate(SEARCH_KINDS)}
+FIELD_WEIGHTS = {"name": 3.0, "tags": 2.0, "description": 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_PREFIX_EXPANSIONS = 50  # most frequent completions of the last word that are scored
+RERANK_CANDIDATES = 200  # text hits re-scored when blending in value similarity
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("a an and are as at be by for from in is it of on or the to with".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def weighted_terms(doc: Mapping[str, Any], kind: str) -> Dict[str, float]:
+    """Term -> field-weighted frequency"""
+    tags = list(doc.get("tags") or [])
+    if kind == "event" and doc.get("event_type"):
+        tags.append(doc["event_type"])
+    fields = {"name": doc.get("name") or "", "description": doc.get("description") or "", "tags": " ".join(tags)}
+    terms: Dict[str, float] = {}
+    for field, text in fields.items():
+        for token in tokenize(text):
+            terms[token] = terms.get(token, 0.0) + FIELD_WEIGHTS[field]
+    return terms
+
+
+class SearchIndex(ResidentIndex):
+    """BM25 inverted index; documents are appended (a re-added id replaces the old entry)"""
+
+    refresh_seconds = SEARCH_REFRESH_SECONDS
+
+    def __init__(self, initial_capacity: int = 1024):
+        super().__init__()
+        self._postings: Dict[str, Tuple[List[int], List[float]]] = {}
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}  # postings as arrays, built on first query
+        self._terms: List[str] = []  # sorted, for prefix lookups
+        self._lengths = np.zeros(initial_capacity, dtype=np.float32)
+        self._kinds = np.zeros(initial_capacity, dtype=np.int8)
+        self._alive = np.zeros(initial_capacity, dtype=bool)
+        self._docs: List[Dict[str, Any]] = []
+        self._rows: Dict[Tuple[str, str], int] = {}
+        self._total_length = 0.0
+        self._live = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    def _grow(self):
+        capacity = len(self._lengths) * 2
+        for name in ("_lengths", "_kinds", "_alive"):
+            old = getattr(self, name)
+            grown = np.zeros(capacity, dtype=old.dtype)
+            grown[:len(old)] = old
+            setattr(self, name, grown)
+
+    def add(self, kind: str, doc: Mapping[str, Any], _sort_terms: bool = True):
+        """Index (or re-index) one community or event (called from create_community/create_event)"""
+        item_id = doc[SEARCH_KINDS[kind][1]]
+        self._record((kind, item_id), doc)
+        previous = self._rows.get((kind, item_id))
+        if previous is not None and self._alive[previous]:
+            self._alive[previous] = False
+            self._total_length -= float(self._lengths[previous])
+            self._live -= 1
+
+        row = len(self._docs)
+        if row >= len(self._lengths):
+            self._grow()
+        terms = weighted_terms(doc, kind)
+        length = sum(terms.values())
+        self._lengths[row] = length
+        self._kinds[row] = KIND_CODES[kind]
+        self._alive[row] = True
+        self._docs.append({
+            "kind": kind,
+            "id": item_id,
+            "name": doc.get("name"),
+            "image": doc.get("image"),
+            "date": doc.get("date"),
+            "value_profile": doc.get("value_profile") or {},
+        })
+        self._rows[(kind, item_id)] = row
+        self._total_length += length
+        self._live += 1
+
+        for term, frequency in terms.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = ([], [])
+                if _sort_terms:
+                    insort(self._terms, term)
+            posting[0].append(row)
+            posting[1].append(frequency)
+            self._arrays.pop(term, None)
+
+    def _empty(self) -> "SearchIndex":
+        return SearchIndex(initial_capacity=max(1024, len(self._docs)))
+
+    async def _scan(self, db, fresh: "SearchIndex", batch_size: int = 1000):
+        """Indexing runs between cursor batches, so batches stay small to keep each
+        stretch of event-loop time short"""
+        for kind, (collection, id_field) in SEARCH_KINDS.items():
+            cursor = db[collection].find(
+                {id_field: {"$exists": True}},
+                {"_id": 0, id_field: 1, "name": 1, "description": 1, "tags": 1, "event_type": 1,
+                 "image": 1, "date": 1, "value_profile": 1},
+                batch_size=batch_size
+            )
+            async for doc in cursor:
+                fresh.add(kind, doc, _sort_terms=False)
+        fresh._terms = sorted(fresh._postings)
+
+    def _replay(self, fresh: "SearchIndex", key: Tuple[str, str], doc: Mapping[str, Any]):
+        fresh.add(key[0], doc)
+
+    def _swap(self, fresh: "SearchIndex"):
+        (self._postings, self._arrays, self._terms, self._lengths, self._kinds, self._alive,
+         self._docs, self._rows, self._total_length, self._live) = (
+            fresh._postings, fresh._arrays, fresh._terms, fresh._lengths, fresh._kinds, fresh._alive,
+            fresh._docs, fresh._rows, fresh._total_length, fresh._live
+        )
+
+    def _describe(self) -> str:
+        return f"Indexed {len(self):,} communities and events ({len(self._terms):,} terms) for search"
+
+    def _posting_arrays(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            rows, frequencies = self._postings[term]
+            arrays = self._arrays[term] = (np.array(rows, dtype=np.int64), np.array(frequencies, dtype=np.float32))
+        return arrays
+
+    def _completions(self, prefix: str) -> List[str]:
+        start = bisect_left(self._terms, prefix)
+        end = bisect_left(self._terms, prefix + "\uffff", lo=start)
+        terms = self._terms[start:end]
+        if len(terms) > MAX_PREFIX_EXPANSIONS:
+            terms = sorted(terms, key=lambda term: len(self._postings[term][0]), reverse=True)[:MAX_PREFIX_EXPANSIONS]
+        return terms
+
+    def _term_scores(self, term: str, avg_length: float) -> Tuple[np.ndarray, np.ndarray]:
+        rows, frequencies = self._posting_arrays(term)
+        # Replaced entries stay in the postings until the next reload; they must not count
+        frequency = int(np.count_nonzero(self._alive[rows]))
+        idf = math.log(1 + (self._live - frequency + 0.5) / (frequency + 0.5))
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[rows] / avg_length)
+        return rows, (idf * frequencies * (BM25_K1 + 1) / (frequencies + norm)).astype(np.float32)
+
+    def text_scores(self, query: str, prefix: bool = True) -> np.ndarray:
+        """BM25 score per indexed row (0 where nothing matches); with prefix=True the last
+        word also matches longer terms (best completion per document counts)"""
+        n = len(self._docs)
+        scores = np.zeros(n, dtype=np.float32)
+        words = tokenize(query)
+        if not words or not self._live:
+            return scores
+        avg_length = max(self._total_length / self._live, 1.0)
+        for position, word in enumerate(words):
+            is_prefix = prefix and position == len(words) - 1
+            terms = self._completions(word) if is_prefix else ([word] if word in self._postings else [])
+            if len(terms) == 1:
+                rows, contribution = self._term_scores(terms[0], avg_length)
+                scores[rows] += contribution
+            elif terms:
+                best = np.zeros(n, dtype=np.float32)
+                for term in terms:
+                    rows, contribution = self._term_scores(term, avg_length)
+                    best[rows] = np.maximum(best[rows], contribution)
+                scores += best
+        scores[~self._alive[:n]] = 0
+        return scores
+
+    def search(self, query: str, kind: Optional[str] = None, limit: int = 20, prefix: bool = True,
+               value_profile: Optional[Mapping[str, float]] = None,
+               profile_weight: float = 0.0) -> List[Dict[str, Any]]:
+        """Best hits, highest score first. With a value profile and profile_weight > 0, the top text
+        hits are re-ranked by (1 - w) * text score + w * value similarity (both 0-100)"""
+        scores = self.text_scores(query, prefix)
+        if kind is not None:
+            scores[self._kinds[:len(scores)] != KIND_CODES[kind]] = 0
+        hits = np.flatnonzero(scores > 0)
+        if not len(hits) or limit <= 0:
+            return []
+        blend = bool(value_profile) and profile_weight > 0
+        k = min(len(hits), max(limit, RERANK_CANDIDATES) if blend else limit)
+        top = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        text_score = scores[top] / scores[top].max() * 100
+        final = text_score
+        if blend:
+            similarity = value_similarity(value_profile, [self._docs[row]["value_profile"] for row in top])
+            final = (1 - profile_weight) * text_score + profile_weight * similarity
+        order = np.argsort(-final, kind='stable')[:limit]
+        results = []
+        for i in order:
+            doc = self._docs[top[i]]
+            result = {
+                "kind": doc["kind"],
+                SEARCH_KINDS[doc["kind"]][1]: doc["id"],
+                "name": doc["name"],
+                "image": doc["image"],
+                "score": round(float(final[i]), 1),
+                "text_score": round(float(text_score[i]), 1),
+            }
+            if doc["kind"] == "event":
+                result["date"] = doc["date"]
+            results.append(result)
+        return results
+
+
+search_index = SearchIndex()
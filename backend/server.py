@@ -1,27 +1,52 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, Request, Response
-from fastapi.responses import JSONResponse
+# Started before anything else so the startup report covers every import below
+from import_timing import ImportTimer
+import_timer = ImportTimer().start()
+
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, Request, Response, Query
+from fastapi.responses import JSONResponse, ORJSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable
 import uuid
+import time
+import hashlib
 from datetime import datetime, timezone, timedelta
-import httpx
-import bcrypt
+from urllib.parse import unquote
 import jwt
-import requests
 import numpy as np
+import orjson
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+from mongo_monitoring import command_monitor, MongoRequestMiddleware
+from load_shedding import LoadSheddingMiddleware, loop_lag_monitor, pool_wait_monitor
+from rate_limit import RateLimiter, client_ip, rate_limit
+from game_scoring import GAME_TILES, PROFILE_KEYS, score_selections
+from cache import TTLCache, MISSING, catalogue_versions
+from singleflight import SingleFlight
+from matching import MMR_LAMBDA, mmr_order, profile_matrix, score_items
+from compression import CompressionMiddleware
+import collaborative_filtering
+from reverse_matching import user_profile_index
+from search import search_index
+from fanout import FanoutWorker
+from lazy_routes import LazyRouter
+from warmup import WarmUp
+import game_scoring
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '10'))
+client = AsyncIOMotorClient(
+    mongo_url, event_listeners=[command_monitor, pool_wait_monitor], minPoolSize=MONGO_MIN_POOL_SIZE
+)
 db = client[os.environ['DB_NAME']]
 
 # Environment variables
@@ -29,9 +54,21 @@ JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-change-in-production'
 JWT_ALGORITHM = 'HS256'
 HUGGINGFACE_TOKEN = os.environ.get('HUGGINGFACE_TOKEN')
 HUGGINGFACE_API_URL = "https://router.huggingface.co/pipeline/feature-extraction/BAAI/bge-base-en-v1.5"
+MATCH_CACHE_SIZE = int(os.environ.get('MATCH_CACHE_SIZE', '10000'))
+MATCH_CACHE_TTL = float(os.environ.get('MATCH_CACHE_TTL', '300'))
+DETAIL_CACHE_SIZE = int(os.environ.get('DETAIL_CACHE_SIZE', '10000'))
+DETAIL_CACHE_TTL = float(os.environ.get('DETAIL_CACHE_TTL', '60'))
+MAX_BATCH_IDS = 100
+CF_BLEND_WEIGHT = float(os.environ.get('CF_BLEND_WEIGHT', '0.3'))
+PRECOMPUTED_MATCHES_MAX_AGE = float(os.environ.get('PRECOMPUTED_MATCHES_MAX_AGE', str(36 * 3600)))
+LISTING_ETAG_TTL = int(os.environ.get('LISTING_ETAG_TTL', '60'))
+LOGIN_RATE_PER_MINUTE = float(os.environ.get('LOGIN_RATE_PER_MINUTE', '10'))
+LOGIN_EMAIL_RATE_PER_MINUTE = float(os.environ.get('LOGIN_EMAIL_RATE_PER_MINUTE', '30'))
+SKIP_RATE_PER_SECOND = float(os.environ.get('SKIP_RATE_PER_SECOND', '2'))
+TRACK_RATE_PER_SECOND = float(os.environ.get('TRACK_RATE_PER_SECOND', '5'))
 
 # Create the main app
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 api_router = APIRouter(prefix="/api")
 
 # Configure logging
@@ -53,6 +90,7 @@ class User(BaseModel):
     value_profile: Optional[Dict[str, Any]] = None
     environment_preferences: Optional[Dict[str, Any]] = None
     game_completed: bool = False
+    profile_updated_at: Optional[datetime] = None
 
 class UserRegister(BaseModel):
     email: EmailStr
@@ -104,6 +142,9 @@ class UserAction(BaseModel):
     action: str  # 'join' or 'skip'
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+# Response shapes of the match endpoints. The match loops build plain dicts with these
+# fields and return them through ORJSONResponse, skipping model validation and
+# jsonable_encoder for data we produced ourselves.
 class CommunityMatch(BaseModel):
     community_id: str
     community_name: str
@@ -156,80 +197,12 @@ class EventMatch(BaseModel):
     attendee_count: int
     tags: List[str]
 
-# ==================== VALUE DISCOVERY GAME DATA ====================
-
-# 10 core values with representative words for each
-VALUE_WORDS = {
-    "community_oriented": ["community", "together", "belonging", "family"],
-    "independent": ["independence", "autonomy", "self-reliance", "freedom"],
-    "structured": ["organization", "planning", "order", "discipline"],
-    "spontaneous": ["spontaneity", "flexibility", "adventure", "surprise"],
-    "competitive": ["competition", "achievement", "winning", "excellence"],
-    "collaborative": ["cooperation", "teamwork", "harmony", "support"],
-    "intellectual": ["knowledge", "learning", "wisdom", "analysis"],
-    "experiential": ["experience", "action", "doing", "practice"],
-    "tradition": ["tradition", "heritage", "roots", "stability"],
-    "novelty": ["innovation", "creativity", "change", "exploration"],
-}
-
-# 8 rounds of tiles - each with 4 words representing different values
-GAME_TILES = [
-    # Round 1: Adventure vs Security vs Learning vs Connection
-    ["adventure", "stability", "knowledge", "belonging"],
-    # Round 2: Independence vs Teamwork vs Achievement vs Creativity
-    ["autonomy", "cooperation", "winning", "innovation"],
-    # Round 3: Planning vs Flexibility vs Tradition vs Experience
-    ["organization", "spontaneity", "heritage", "action"],
-    # Round 4: Competition vs Harmony vs Wisdom vs Change
-    ["excellence", "harmony", "learning", "exploration"],
-    # Round 5: Freedom vs Community vs Order vs Novelty
-    ["independence", "together", "discipline", "creativity"],
-    # Round 6: Self-reliance vs Support vs Analysis vs Practice
-    ["self-reliance", "support", "analysis", "practice"],
-    # Round 7: Achievement vs Collaboration vs Roots vs Surprise
-    ["achievement", "teamwork", "roots", "surprise"],
-    # Round 8: Family vs Freedom vs Planning vs Doing
-    ["family", "freedom", "planning", "doing"],
-]
-
-# Map words to their primary value
-WORD_TO_VALUE = {
-    # Community-oriented
-    "community": "community_oriented", "together": "community_oriented",
-    "belonging": "community_oriented", "family": "community_oriented",
-    # Independent
-    "independence": "independent", "autonomy": "independent",
-    "self-reliance": "independent", "freedom": "independent",
-    # Structured
-    "organization": "structured", "planning": "structured",
-    "order": "structured", "discipline": "structured",
-    # Spontaneous
-    "spontaneity": "spontaneous", "flexibility": "spontaneous",
-    "adventure": "spontaneous", "surprise": "spontaneous",
-    # Competitive
-    "competition": "competitive", "achievement": "competitive",
-    "winning": "competitive", "excellence": "competitive",
-    # Collaborative
-    "cooperation": "collaborative", "teamwork": "collaborative",
-    "harmony": "collaborative", "support": "collaborative",
-    # Intellectual
-    "knowledge": "intellectual", "learning": "intellectual",
-    "wisdom": "intellectual", "analysis": "intellectual",
-    # Experiential
-    "experience": "experiential", "action": "experiential",
-    "doing": "experiential", "practice": "experiential",
-    # Tradition
-    "tradition": "tradition", "heritage": "tradition",
-    "roots": "tradition", "stability": "tradition",
-    # Novelty
-    "innovation": "novelty", "creativity": "novelty",
-    "change": "novelty", "exploration": "novelty",
-}
-
 # ==================== HUGGINGFACE INTEGRATION ====================
 
 def get_embedding(text: str) -> Optional[List[float]]:
     """Get embedding from HuggingFace API"""
+    import requests  # deferred: only needed when embeddings are requested
+    
     try:
         headers = {"Authorization": f"Bearer {HUGGINGFACE_TOKEN}"}
         response = requests.post(
@@ -262,10 +235,12 @@ def cosine_similarity(a: List[float], b: List[float]) -> float:
 
 def hash_password(password: str) -> str:
     """Hash password using bcrypt"""
+    import bcrypt  # deferred to the first register/login
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
 def verify_password(password: str, hashed: str) -> bool:
     """Verify password against hash"""
+    import bcrypt
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
 def create_access_token(data: dict) -> str:
@@ -310,6 +285,71 @@ async def get_current_user(request: Request) -> User:
     
     raise HTTPException(status_code=401, detail="Not authenticated")
 
+# ==================== CONDITIONAL GETS ====================
+
+# Listing ETags are built from the per-process catalogue versions, so they carry a
+# process id (another replica's counters mean nothing here) and a time bucket that
+# bounds how long a 304 can hide writes made through other replicas.
+ETAG_PROCESS_ID = uuid.uuid4().hex[:8]
+
+def catalogue_etag(*catalogues: str) -> str:
+    bucket = int(time.time() // LISTING_ETAG_TTL)
+    versions = "-".join(str(catalogue_versions.get(catalogue)) for catalogue in catalogues)
+    return f'"{ETAG_PROCESS_ID}-{bucket}-{versions}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return etag in candidates or '*' in candidates
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+def jwt_user_id(request: Request) -> Optional[str]:
+    """user_id from a valid Bearer token - signature/expiry check only, no database reads"""
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return None
+    try:
+        return jwt.decode(auth_header.split(' ')[1], JWT_SECRET, algorithms=[JWT_ALGORITHM]).get('user_id')
+    except jwt.InvalidTokenError:
+        return None
+
+def has_valid_jwt(request: Request) -> bool:
+    return bool(jwt_user_id(request))
+
+def conditional_get(current_etag: Callable[[], str]):
+    """Dependency answering 304 Not Modified before get_current_user runs, so a revalidation
+    with a valid JWT costs no Mongo round trip. Declare it ahead of get_current_user; it returns
+    the ETag for the endpoint (session-cookie clients are checked again after auth).
+    `ids=` requests are batched detail lookups, which the listing ETag doesn't describe:
+    they are never conditional and the dependency returns None."""
+    async def dependency(request: Request) -> Optional[str]:
+        if "ids" in request.query_params:
+            return None
+        etag = current_etag()
+        if etag_matches(request, etag) and has_valid_jwt(request):
+            raise HTTPException(status_code=304, headers=cache_headers(etag))
+        return etag
+    return dependency
+
+# ==================== RATE LIMITS ====================
+
+# Checked before get_current_user, so rejected requests cost no Mongo reads
+def user_or_ip(request: Request) -> str:
+    user_id = jwt_user_id(request)
+    return f"user:{user_id}" if user_id else f"ip:{client_ip(request)}"
+
+login_ip_limiter = RateLimiter("login_ip", LOGIN_RATE_PER_MINUTE / 60, LOGIN_RATE_PER_MINUTE)
+# Per account across all addresses, against guessing one password from many IPs. Trade-off:
+# anyone can spend an account's budget and block its logins for up to a minute, so the
+# budget is kept well above what the owner needs; 0 disables it.
+login_email_limiter = RateLimiter("login_email", LOGIN_EMAIL_RATE_PER_MINUTE / 60, LOGIN_EMAIL_RATE_PER_MINUTE)
+skip_limiter = RateLimiter("skip", SKIP_RATE_PER_SECOND, SKIP_RATE_PER_SECOND * 10)
+track_limiter = RateLimiter("track", TRACK_RATE_PER_SECOND, TRACK_RATE_PER_SECOND * 10)
+
 # ==================== AUTH ENDPOINTS ====================
 
 @api_router.post("/auth/register")
@@ -322,7 +362,8 @@ async def register(user_data: UserRegister):
     
     # Create new user
     user_id = f"user_{uuid.uuid4().hex[:12]}"
-    password_hash = hash_password(user_data.password)
+    # bcrypt takes ~0.3s of CPU; off the event loop so other requests aren't stalled behind it
+    password_hash = await asyncio.to_thread(hash_password, user_data.password)
     
     user_doc = {
         "user_id": user_id,
@@ -349,14 +390,15 @@ async def register(user_data: UserRegister):
         "token": token
     }
 
-@api_router.post("/auth/login")
+@api_router.post("/auth/login", dependencies=[Depends(rate_limit(login_ip_limiter, client_ip))])
 async def login(credentials: UserLogin):
     """Login with email/password"""
+    login_email_limiter.check(credentials.email.lower())
     user_doc = await db.users.find_one({"email": credentials.email}, {"_id": 0})
     if not user_doc or not user_doc.get('password_hash'):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    if not verify_password(credentials.password, user_doc['password_hash']):
+    if not await asyncio.to_thread(verify_password, credentials.password, user_doc['password_hash']):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     # Create JWT token
@@ -378,6 +420,7 @@ async def get_session_data(request: Request, response: Response):
         raise HTTPException(status_code=400, detail="X-Session-ID header required")
     
     # Call Emergent Auth API
+    import httpx  # deferred to the first OAuth login
     async with httpx.AsyncClient() as client:
         try:
             auth_response = await client.get(
@@ -449,87 +492,62 @@ async def logout(request: Request, response: Response):
 
 # ==================== GAME ENDPOINTS ====================
 
+# GAME_TILES never changes at runtime: serialize once and let clients cache it for a day
+GAME_TILES_BODY = orjson.dumps({"rounds": GAME_TILES, "total_rounds": len(GAME_TILES)})
+GAME_TILES_ETAG = f'"tiles-{hashlib.sha256(GAME_TILES_BODY).hexdigest()[:16]}"'
+GAME_TILES_HEADERS = {"ETag": GAME_TILES_ETAG, "Cache-Control": "private, max-age=86400"}
+
 @api_router.get("/game/tiles")
-async def get_game_tiles(current_user: User = Depends(get_current_user)):
+async def get_game_tiles(
+    request: Request,
+    etag: str = Depends(conditional_get(lambda: GAME_TILES_ETAG)),
+    current_user: User = Depends(get_current_user)
+):
     """Get all game tiles for the value discovery game"""
-    return {
-        "rounds": GAME_TILES,
-        "total_rounds": len(GAME_TILES)
-    }
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=GAME_TILES_HEADERS)
+    return Response(content=GAME_TILES_BODY, media_type="application/json", headers=GAME_TILES_HEADERS)
 
 @api_router.post("/game/submit")
 async def submit_game(submission: GameSubmission, current_user: User = Depends(get_current_user)):
     """Process game submissions and generate value profile"""
     try:
-        # Save each selection
-        for selection in submission.selections:
-            await db.game_responses.insert_one({
+        # Build all selection rows up front; they are written with one insert_many below
+        submitted_at = datetime.now(timezone.utc)
+        submission_id = f"sub_{uuid.uuid4().hex[:12]}"
+        response_docs = [
+            {
                 "user_id": current_user.user_id,
+                "submission_id": submission_id,
                 "round_number": selection['round'],
                 "selected_word": selection['word'],
-                "timestamp": datetime.now(timezone.utc)
-            })
-        
-        # Calculate value scores based on selections
-        value_counts = {
-            "community_oriented": 0, "independent": 0,
-            "structured": 0, "spontaneous": 0,
-            "competitive": 0, "collaborative": 0,
-            "intellectual": 0, "experiential": 0,
-            "tradition": 0, "novelty": 0
-        }
-        
-        # Count selections for each value
-        for selection in submission.selections:
-            word = selection['word']
-            value = WORD_TO_VALUE.get(word)
-            if value:
-                value_counts[value] += 1
-        
-        # Get embeddings for selected words to enhance inference (reserved for future use)
-        # selected_words = [s['word'] for s in submission.selections]
-        # words_text = ", ".join(selected_words)  # Reserved for future enhancement
-        # user_embedding = get_embedding(words_text)  # Reserved for future enhancement
-        
-        # Calculate normalized scores (0-1 scale) with embedding influence
-        total_selections = len(submission.selections)
-        value_profile = {}
-        
-        # For opposing pairs, normalize to 0-1 scale where 0.5 is neutral
-        value_profile["community_oriented"] = value_counts["community_oriented"] / total_selections
-        value_profile["structured"] = value_counts["structured"] / total_selections
-        value_profile["competitive"] = value_counts["competitive"] / total_selections
-        value_profile["intellectual"] = value_counts["intellectual"] / total_selections
-        value_profile["tradition"] = value_counts["tradition"] / total_selections
-        value_profile["experiential"] = value_counts["experiential"] / total_selections
-        
-        # Determine social energy level
-        community_score = value_counts["community_oriented"]
-        if community_score >= 3:
-            social_energy = "high"
-        elif community_score >= 1:
-            social_energy = "medium"
-        else:
-            social_energy = "low"
+                "timestamp": submitted_at
+            }
+            for selection in submission.selections
+        ]
         
-        # Infer environment preferences
-        environment_preferences = {
-            "group_size": "large" if value_profile["community_oriented"] > 0.6 else ("small" if value_profile["community_oriented"] < 0.3 else "medium"),
-            "interaction_style": "deep conversations" if value_profile["intellectual"] > 0.5 else ("activity-based" if value_profile["experiential"] > 0.5 else "casual mingling"),
-            "pace": "fast-paced" if value_profile["competitive"] > 0.5 else ("relaxed" if value_profile["tradition"] > 0.5 else "balanced"),
-            "frequency": "high involvement" if value_profile["community_oriented"] > 0.6 else ("occasional" if value_profile["community_oriented"] < 0.3 else "regular"),
-            "social_energy": social_energy
-        }
+        # Score via the precomputed table (falls back to counting for partial submissions)
+        value_profile, environment_preferences = score_selections(submission.selections)
         
-        # Update user profile
-        await db.users.update_one(
+        # Write the responses and the profile concurrently (2 round trips instead of one per selection)
+        profile_update = db.users.update_one(
             {"user_id": current_user.user_id},
             {"$set": {
                 "value_profile": value_profile,
                 "environment_preferences": environment_preferences,
-                "game_completed": True
+                "game_completed": True,
+                "profile_updated_at": submitted_at
             }}
         )
+        if response_docs:
+            await asyncio.gather(
+                db.game_responses.insert_many(response_docs, ordered=False),
+                profile_update
+            )
+        else:
+            await profile_update
+        match_cache.invalidate(current_user.user_id)
+        user_profile_index.upsert(current_user.user_id, value_profile)
         
         return {
             "value_profile": value_profile,
@@ -543,6 +561,127 @@ async def submit_game(submission: GameSubmission, current_user: User = Depends(g
 
 # ==================== COMMUNITY ENDPOINTS ====================
 
+# user_action_summaries keeps one document per user:
+#   {user_id, skipped: {community_id: last_skipped_at}, joined: {community_id: joined_at}, backfilled}
+# maintained on write so matching needs a single indexed point read instead of
+# scanning raw user_actions rows. Writes may create a partial document; `backfilled`
+# marks that the history from before summaries existed has been merged in.
+# Community ids come from request paths, so they are escaped before being used as
+# field names ("." would nest a sub-document and a leading "$" is rejected).
+
+def summary_field(field: str, community_id: str) -> str:
+    escaped = community_id.replace("%", "%25").replace(".", "%2E").replace("$", "%24")
+    return f"{field}.{escaped}"
+
+def summary_entries(entries: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """community_id -> timestamp from a stored summary map (drops sub-documents that
+    unescaped ids created before keys were escaped)"""
+    return {unquote(key): value for key, value in (entries or {}).items() if not isinstance(value, dict)}
+
+async def record_community_action(user_id: str, community_id: str, action: str):
+    """Append to user_actions (feedback log) and update the user's action summary"""
+    now = datetime.now(timezone.utc)
+    if action == "leave":
+        summary_update = {"$unset": {summary_field("joined", community_id): ""}}
+    else:
+        field = "joined" if action == "join" else "skipped"
+        summary_update = {"$set": {summary_field(field, community_id): now}}
+    writes = [db.user_action_summaries.update_one({"user_id": user_id}, summary_update, upsert=True)]
+    if action in ("join", "skip"):
+        writes.append(db.user_actions.insert_one({
+            "user_id": user_id,
+            "community_id": community_id,
+            "action": action,
+            "timestamp": now
+        }))
+    await asyncio.gather(*writes)
+
+# Community and event detail documents, without the members/attendees arrays (which grow
+# with popularity and aren't shown). Joins, leaves, attends and cancels drop the item's
+# entry; the TTL bounds staleness from writes made through other replicas.
+detail_cache = TTLCache("details", DETAIL_CACHE_SIZE, DETAIL_CACHE_TTL)
+detail_flights = SingleFlight("details")
+DETAIL_PROJECTIONS = {
+    "communities": {"_id": 0, "members": 0},
+    "events": {"_id": 0, "attendees": 0},
+}
+
+async def get_detail(collection, id_field: str, item_id: str) -> Optional[Dict]:
+    """Read-through: one document by id (None if it doesn't exist)"""
+    key = (collection.name, item_id)
+    generation = detail_cache.generation(key)
+    doc = detail_cache.get(key, generation)
+    if doc is not MISSING:
+        return doc
+    doc = await detail_flights.do(
+        key + (generation,), lambda: collection.find_one({id_field: item_id}, DETAIL_PROJECTIONS[collection.name])
+    )
+    if doc is not None:
+        detail_cache.set(key, doc, generation)
+    return doc
+
+async def get_details(collection, id_field: str, item_ids: List[str]) -> List[Dict]:
+    """Read-through for many ids: cache hits plus one $in query for the misses, in request order"""
+    found = {}
+    missing = []
+    generations = {item_id: detail_cache.generation((collection.name, item_id)) for item_id in item_ids}
+    for item_id in item_ids:
+        doc = detail_cache.get((collection.name, item_id), generations[item_id])
+        if doc is MISSING:
+            missing.append(item_id)
+        else:
+            found[item_id] = doc
+    if missing:
+        docs = await collection.find(
+            {id_field: {"$in": missing}}, DETAIL_PROJECTIONS[collection.name]
+        ).to_list(len(missing))
+        for doc in docs:
+            detail_cache.set((collection.name, doc[id_field]), doc, generations[doc[id_field]])
+            found[doc[id_field]] = doc
+    return [found[item_id] for item_id in item_ids if item_id in found]
+
+def parse_ids(ids: str) -> List[str]:
+    item_ids = list(dict.fromkeys(item_id.strip() for item_id in ids.split(",") if item_id.strip()))
+    if len(item_ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    return item_ids
+
+async def get_action_summary(user_id: str) -> Dict[str, Any]:
+    """Load the user's action summary, merging in their earlier history the first time"""
+    summary = await db.user_action_summaries.find_one({"user_id": user_id}, {"_id": 0})
+    if summary is not None and summary.get("backfilled"):
+        return {
+            "user_id": user_id,
+            "skipped": summary_entries(summary.get("skipped")),
+            "joined": summary_entries(summary.get("joined")),
+            "backfilled": True
+        }
+    
+    # Backfill from the raw action log and current memberships
+    actions, memberships = await asyncio.gather(
+        db.user_actions.aggregate([
+            {"$match": {"user_id": user_id}},
+            {"$group": {
+                "_id": {"community_id": "$community_id", "action": "$action"},
+                "at": {"$max": "$timestamp"}
+            }}
+        ]).to_list(None),
+        db.communities.find({"members": user_id}, {"_id": 0, "community_id": 1}).to_list(None)
+    )
+    skipped = {a["_id"]["community_id"]: a["at"] for a in actions if a["_id"]["action"] == "skip"}
+    joined_at = {a["_id"]["community_id"]: a["at"] for a in actions if a["_id"]["action"] == "join"}
+    joined = {c["community_id"]: joined_at.get(c["community_id"]) for c in memberships}
+    
+    # Entries written since summaries existed are newer; per-field $set so concurrent writes survive
+    summary = summary or {}
+    skipped.update(summary_entries(summary.get("skipped")))
+    joined.update({cid: at for cid, at in summary_entries(summary.get("joined")).items() if cid in joined})
+    backfill = {summary_field("skipped", cid): at for cid, at in skipped.items()}
+    backfill.update({summary_field("joined", cid): at for cid, at in joined.items()})
+    backfill["backfilled"] = True
+    await db.user_action_summaries.update_one({"user_id": user_id}, {"$set": backfill}, upsert=True)
+    return {"user_id": user_id, "skipped": skipped, "joined": joined, "backfilled": True}
+
 @api_router.post("/communities")
 async def create_community(community: CommunityCreate, current_user: User = Depends(get_current_user)):
     """Create a new community"""
@@ -561,22 +700,43 @@ async def create_community(community: CommunityCreate, current_user: User = Depe
         "member_count": 1
     }
     
-    await db.communities.insert_one(community_doc)
+    await asyncio.gather(
+        db.communities.insert_one(community_doc),
+        record_community_action(current_user.user_id, community_id, "join")
+    )
+    catalogue_versions.bump("communities")
+    search_index.add("community", community_doc)
+    await enqueue_fanout("community", community_id)
     return {"community_id": community_id, "message": "Community created successfully"}
 
 @api_router.get("/communities")
-async def get_communities(current_user: User = Depends(get_current_user)):
-    """Get all communities (optimized with limit)"""
-    communities = await db.communities.find({}, {"_id": 0}).limit(100).to_list(100)
-    return communities
+async def get_communities(
+    request: Request,
+    etag: Optional[str] = Depends(conditional_get(lambda: catalogue_etag("communities", "community_members"))),
+    ids: Optional[str] = Query(None, description="Comma-separated community ids (batched detail lookup)"),
+    current_user: User = Depends(get_current_user)
+):
+    """Get all communities (optimized with limit), or the given ids"""
+    if ids is not None:
+        # No validator: entries come from the detail cache, not the versioned listing
+        communities = await get_details(db.communities, "community_id", parse_ids(ids))
+        return ORJSONResponse(communities)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    # Every user gets the same listing, so concurrent requests share one query
+    communities = await listing_flights.do(
+        ("communities", etag),
+        lambda: db.communities.find({}, {"_id": 0}).limit(100).to_list(100)
+    )
+    return ORJSONResponse(communities, headers=cache_headers(etag))
 
 @api_router.get("/communities/{community_id}")
 async def get_community(community_id: str, current_user: User = Depends(get_current_user)):
     """Get community details"""
-    community = await db.communities.find_one({"community_id": community_id}, {"_id": 0})
+    community = await get_detail(db.communities, "community_id", community_id)
     if not community:
         raise HTTPException(status_code=404, detail="Community not found")
-    return community
+    return ORJSONResponse(community)
 
 @api_router.post("/communities/{community_id}/join")
 async def join_community(community_id: str, current_user: User = Depends(get_current_user)):
@@ -598,12 +758,10 @@ async def join_community(community_id: str, current_user: User = Depends(get_cur
     )
     
     # Record action for feedback loop
-    await db.user_actions.insert_one({
-        "user_id": current_user.user_id,
-        "community_id": community_id,
-        "action": "join",
-        "timestamp": datetime.now(timezone.utc)
-    })
+    await record_community_action(current_user.user_id, community_id, "join")
+    match_cache.invalidate(current_user.user_id)
+    detail_cache.invalidate(("communities", community_id))
+    catalogue_versions.bump("community_members")
     
     return {"message": "Joined successfully"}
 
@@ -617,18 +775,20 @@ async def leave_community(community_id: str, current_user: User = Depends(get_cu
             "$inc": {"member_count": -1}
         }
     )
+    await record_community_action(current_user.user_id, community_id, "leave")
+    match_cache.invalidate(current_user.user_id)
+    detail_cache.invalidate(("communities", community_id))
+    catalogue_versions.bump("community_members")
     return {"message": "Left successfully"}
 
-@api_router.post("/communities/{community_id}/skip")
+@api_router.post("/communities/{community_id}/skip", dependencies=[Depends(rate_limit(skip_limiter, user_or_ip))])
 async def skip_community(community_id: str, current_user: User = Depends(get_current_user)):
     """Skip a community (for feedback loop)"""
-    # Record skip action
-    await db.user_actions.insert_one({
-        "user_id": current_user.user_id,
-        "community_id": community_id,
-        "action": "skip",
-        "timestamp": datetime.now(timezone.utc)
-    })
+    # Only real communities, so the summary can't be grown with made-up ids
+    if not await get_detail(db.communities, "community_id", community_id):
+        raise HTTPException(status_code=404, detail="Community not found")
+    await record_community_action(current_user.user_id, community_id, "skip")
+    match_cache.invalidate(current_user.user_id)
     return {"message": "Skipped"}
 
 @api_router.get("/communities/my/joined")
@@ -638,10 +798,67 @@ async def get_my_communities(current_user: User = Depends(get_current_user)):
         {"members": current_user.user_id},
         {"_id": 0}
     ).to_list(1000)
-    return communities
+    return ORJSONResponse(communities)
 
 # ==================== MATCHING ENDPOINTS ====================
 
+# Per-user match results. Entries are versioned on the community catalogue and the
+# user's profile, so new communities or a re-scored profile miss automatically;
+# joins, leaves, skips and game submissions drop the user's entry explicitly.
+match_cache = TTLCache("matches", MATCH_CACHE_SIZE, MATCH_CACHE_TTL)
+
+# Concurrent identical computations (same user, same catalogue version) share one run
+match_flights = SingleFlight("matches")
+listing_flights = SingleFlight("listings")
+
+def match_cache_version(user: User) -> tuple:
+    return (
+        catalogue_versions.get("communities"),
+        match_cache.generation(user.user_id),  # bumped by the user's joins, leaves and skips
+        tuple(sorted(user.value_profile.items()))
+    )
+
+def diversify(matches: List[Dict], mmr_lambda: float) -> List[Dict]:
+    """Re-rank score-sorted matches so near-identical profiles don't crowd the top slots"""
+    if mmr_lambda >= 1 or len(matches) < 3:
+        return matches
+    scores = np.array([match['compatibility_score'] for match in matches])
+    item_matrix = profile_matrix([match['value_profile'] for match in matches], PROFILE_KEYS)
+    return [matches[i] for i in mmr_order(scores, item_matrix, mmr_lambda)]
+
+def as_utc(value: datetime) -> datetime:
+    """Mongo returns naive datetimes; they are stored as UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+async def precomputed_candidates(current_user: User, catalogue: str, collection, id_field: str,
+                                 projection: Dict[str, int],
+                                 item_filter: Optional[Dict] = None) -> Optional[List[Dict]]:
+    """Items from the user's precomputed top-k (see precompute_matches.py) plus any created since
+    the run; None when there is no usable entry and the whole catalogue has to be scored.
+    Only documents with an `id_field` are returned (analytics rows share the events collection),
+    further narrowed by `item_filter`."""
+    entry = await db.precomputed_matches.find_one(
+        {"user_id": current_user.user_id},
+        {"_id": 0, catalogue: 1, "computed_at": 1}
+    )
+    if not entry:
+        return None
+    computed_at = as_utc(entry["computed_at"])
+    if (datetime.now(timezone.utc) - computed_at).total_seconds() > PRECOMPUTED_MATCHES_MAX_AGE:
+        return None
+    if current_user.profile_updated_at and as_utc(current_user.profile_updated_at) > computed_at:
+        return None
+    
+    ids = [item[id_field] for item in entry.get(catalogue, [])]
+    return await collection.find(
+        {
+            id_field: {"$exists": True},
+            **(item_filter or {}),
+            "$or": [{id_field: {"$in": ids}}, {"created_at": {"$gt": computed_at}}]
+        },
+        projection
+    ).to_list(None)
+
 def generate_profile_text(value_profile: Dict[str, float], environment_prefs: Optional[Dict[str, str]] = None) -> str:
     """Generate descriptive text from value profile for embedding"""
     texts = []
@@ -680,69 +897,200 @@ def generate_profile_text(value_profile: Dict[str, float], environment_prefs: Op
     return " ".join(texts)
 
 @api_router.get("/matches")
-async def get_matches(current_user: User = Depends(get_current_user)):
-    """Get AI-matched communities for user"""
+async def get_matches(
+    mode: str = Query("values", pattern="^(values|cf|blend)$"),
+    cf_weight: float = Query(CF_BLEND_WEIGHT, ge=0, le=1),
+    mmr_lambda: float = Query(MMR_LAMBDA, ge=0, le=1),
+    current_user: User = Depends(get_current_user)
+):
+    """Get AI-matched communities for user
+    
+    mode=values scores by value-profile similarity, mode=cf by the collaborative-filtering
+    model trained from user_actions, mode=blend mixes the two with cf_weight.
+    mmr_lambda < 1 trades score for variety in the ordering (1 = sort by score only).
+    """
     if not current_user.value_profile:
         raise HTTPException(status_code=400, detail="Complete value discovery game first")
     
-    # Use simple fallback matching (embeddings were causing timeout issues)
-    return await get_matches_fallback(current_user)
+    if mode == "values":
+        cf_weight = 0.0
+    elif mode == "cf":
+        cf_weight = 1.0
+    
+    # CF blends also depend on the deployed model, which is swapped when a retrained file appears
+    model_version = collaborative_filtering.model_version() if cf_weight > 0 else None
+    version = match_cache_version(current_user) + (cf_weight, mmr_lambda, model_version)
+    cached = match_cache.get(current_user.user_id, version)
+    if cached is not MISSING:
+        return ORJSONResponse(cached)
+    
+    async def compute():
+        # Value-only matches start from the nightly candidates when they are fresh
+        candidates = None
+        if cf_weight == 0:
+            candidates = await precomputed_candidates(
+                current_user, "communities", db.communities, "community_id", {"_id": 0, "members": 0}
+            )
+        # Use simple fallback matching (embeddings were causing timeout issues)
+        matches = await get_matches_fallback(current_user, cf_weight, candidates, mmr_lambda)
+        match_cache.set(current_user.user_id, matches, version)
+        return matches
+    
+    return ORJSONResponse(await match_flights.do(("communities", current_user.user_id, version), compute))
+
+async def get_matches_fallback(current_user: User, cf_weight: float = 0.0,
+                               communities: Optional[List[Dict]] = None, mmr_lambda: float = 1.0):
+    """Fallback matching without embeddings, optionally blended with collaborative filtering"""
+    # Membership comes from the action summary, so the members arrays are never loaded
+    if communities is None:
+        all_communities, summary = await asyncio.gather(
+            db.communities.find({}, {"_id": 0, "members": 0}).limit(100).to_list(100),
+            get_action_summary(current_user.user_id)
+        )
+    else:
+        all_communities, summary = communities, await get_action_summary(current_user.user_id)
+    
+    cf_scores = None
+    if cf_weight > 0:
+        cf_model = collaborative_filtering.get_model()
+        if cf_model is not None:
+            cf_scores = cf_model.score(current_user.user_id, [c['community_id'] for c in all_communities])
+    
+    return rank_community_matches(current_user.value_profile, all_communities, summary, cf_scores, cf_weight, mmr_lambda)
+
+def rank_community_matches(value_profile: Dict[str, float], communities: List[Dict], summary: Optional[Dict] = None,
+                           cf_scores: Optional[np.ndarray] = None, cf_weight: float = 0.0,
+                           mmr_lambda: float = 1.0) -> List[Dict]:
+    """Scored, sorted and diversified community matches (pure CPU; see benchmarks.py)"""
+    # One vectorized pass: value similarity (+ CF), time-decayed skip penalty, joined mask (NaN)
+    scores = score_items(value_profile, communities, 'community_id', summary, cf_scores, cf_weight)
+    
+    matches = []
+    for community, base_score in zip(communities, scores.tolist()):
+        if base_score != base_score:  # NaN: already a member
+            continue
+        
+        matches.append({
+            "community_id": community['community_id'],
+            "community_name": community['name'],
+            "description": community['description'],
+            "image": community.get('image'),
+            "compatibility_score": round(base_score, 1),
+            "why_it_matches": "Based on your value profile alignment",
+            "possible_friction": None,
+            "value_profile": community['value_profile'],
+            "environment_settings": community['environment_settings'],
+            "member_count": community.get('member_count', 0)
+        })
+    
+    matches.sort(key=lambda x: x['compatibility_score'], reverse=True)
+    return diversify(matches, mmr_lambda)
+
+# ==================== EVENT ENDPOINTS ====================
 
-async def get_matches_fallback(current_user: User):
-    """Fallback matching without embeddings"""
-    all_communities = await db.communities.find({}, {"_id": 0}).limit(100).to_list(100)
-    user_actions = await db.user_actions.find({"user_id": current_user.user_id}, {"_id": 0}).limit(100).to_list(100)
-    skipped_communities = [a['community_id'] for a in user_actions if a['action'] == 'skip']
+@api_router.get("/events")
+async def get_events(
+    request: Request,
+    etag: Optional[str] = Depends(conditional_get(lambda: catalogue_etag("events", "event_attendees"))),
+    ids: Optional[str] = Query(None, description="Comma-separated event ids (batched detail lookup)"),
+    current_user: User = Depends(get_current_user)
+):
+    """Get all events (optimized with limit), or the given ids"""
+    if ids is not None:
+        # No validator: entries come from the detail cache, not the versioned listing
+        events = await get_details(db.events, "event_id", parse_ids(ids))
+        return ORJSONResponse(events)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    events = await listing_flights.do(
+        ("events", etag),
+        lambda: db.events.find({}, {"_id": 0}).limit(50).to_list(50)
+    )
+    return ORJSONResponse(events, headers=cache_headers(etag))
+
+# Declared before /events/{event_id} so "matches" isn't captured as an event id
+@api_router.get("/events/matches")
+async def get_event_matches(
+    mmr_lambda: float = Query(MMR_LAMBDA, ge=0, le=1),
+    current_user: User = Depends(get_current_user)
+):
+    """Get AI-matched events for user"""
+    if not current_user.value_profile:
+        raise HTTPException(status_code=400, detail="Complete value discovery game first")
+    
+    version = (catalogue_versions.get("events"), tuple(sorted(current_user.value_profile.items())), mmr_lambda)
     
+    async def compute():
+        candidates = await precomputed_candidates(
+            current_user, "events", db.events, "event_id", {"_id": 0},
+            {"date": {"$gte": datetime.now(timezone.utc)}}
+        )
+        return await compute_event_matches(current_user, candidates, mmr_lambda)
+    
+    return ORJSONResponse(await match_flights.do(("events", current_user.user_id, version), compute))
+
+async def compute_event_matches(current_user: User, events: Optional[List[Dict]] = None,
+                                mmr_lambda: float = 1.0):
+    """Score upcoming events the user isn't attending (all of them unless candidates are given)"""
+    # Get all events - use simple matching without embeddings
+    # (analytics rows share the collection but have no event_id)
+    if events is None:
+        events = await db.events.find({"event_id": {"$exists": True}}, {"_id": 0}).to_list(1000)
+    return rank_event_matches(current_user, events, datetime.now(timezone.utc), mmr_lambda)
+
+def rank_event_matches(current_user: User, events: List[Dict], now: datetime, mmr_lambda: float = 1.0) -> List[Dict]:
+    """Scored, sorted and diversified matches among events still to come (pure CPU; see benchmarks.py)"""
     matches = []
-    for community in all_communities:
-        if current_user.user_id in community.get('members', []):
+    
+    for event in events:
+        # Skip past events
+        if as_utc(event['date']) < now:
+            continue
+        
+        # Skip if already attending
+        if current_user.user_id in event.get('attendees', []):
             continue
         
+        # Simple value-based matching
         user_values = current_user.value_profile
-        comm_values = community['value_profile']
+        event_values = event['value_profile']
         similarities = []
         for key in user_values.keys():
-            if key in comm_values:
-                diff = abs(user_values[key] - comm_values[key])
+            if key in event_values:
+                diff = abs(user_values[key] - event_values[key])
                 similarity = 1 - diff
                 similarities.append(similarity)
         
         base_score = (sum(similarities) / len(similarities)) * 100 if similarities else 50
-        if community['community_id'] in skipped_communities:
-            base_score *= 0.8
         
-        matches.append(CommunityMatch(
-            community_id=community['community_id'],
-            community_name=community['name'],
-            description=community['description'],
-            image=community.get('image'),
-            compatibility_score=round(base_score, 1),
-            why_it_matches="Based on your value profile alignment",
-            possible_friction=None,
-            value_profile=community['value_profile'],
-            environment_settings=community['environment_settings'],
-            member_count=community.get('member_count', 0)
-        ))
-    
-    matches.sort(key=lambda x: x.compatibility_score, reverse=True)
-    return matches
-
-# ==================== EVENT ENDPOINTS ====================
-
-@api_router.get("/events")
-async def get_events(current_user: User = Depends(get_current_user)):
-    """Get all events (optimized with limit)"""
-    events = await db.events.find({}, {"_id": 0}).limit(50).to_list(50)
-    return events
+        why_matches = f"This {event['event_type']} event aligns with your interests. "
+        
+        matches.append({
+            "event_id": event['event_id'],
+            "event_name": event['name'],
+            "description": event['description'],
+            "event_type": event['event_type'],
+            "date": event['date'],
+            "location": event['location'],
+            "image": event.get('image'),
+            "compatibility_score": round(base_score, 1),
+            "why_it_matches": why_matches,
+            "possible_friction": None,
+            "value_profile": event['value_profile'],
+            "attendee_count": event.get('attendee_count', 0),
+            "tags": event.get('tags', [])
+        })
+    
+    matches.sort(key=lambda x: x['compatibility_score'], reverse=True)
+    return diversify(matches, mmr_lambda)
 
 @api_router.get("/events/{event_id}")
 async def get_event(event_id: str, current_user: User = Depends(get_current_user)):
     """Get event details"""
-    event = await db.events.find_one({"event_id": event_id}, {"_id": 0})
+    event = await get_detail(db.events, "event_id", event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
-    return event
+    return ORJSONResponse(event)
 
 @api_router.post("/events")
 async def create_event(event: EventCreate, current_user: User = Depends(get_current_user)):
@@ -766,6 +1114,9 @@ async def create_event(event: EventCreate, current_user: User = Depends(get_curr
     }
     
     await db.events.insert_one(event_doc)
+    catalogue_versions.bump("events")
+    search_index.add("event", event_doc)
+    await enqueue_fanout("event", event_id)
     return {"event_id": event_id, "message": "Event created successfully"}
 
 @api_router.post("/events/{event_id}/attend")
@@ -785,6 +1136,8 @@ async def attend_event(event_id: str, current_user: User = Depends(get_current_u
             "$inc": {"attendee_count": 1}
         }
     )
+    detail_cache.invalidate(("events", event_id))
+    catalogue_versions.bump("event_attendees")
     return {"message": "Attending event"}
 
 @api_router.post("/events/{event_id}/cancel")
@@ -797,60 +1150,79 @@ async def cancel_event_attendance(event_id: str, current_user: User = Depends(ge
             "$inc": {"attendee_count": -1}
         }
     )
+    detail_cache.invalidate(("events", event_id))
+    catalogue_versions.bump("event_attendees")
     return {"message": "Attendance cancelled"}
 
-@api_router.get("/events/matches")
-async def get_event_matches(current_user: User = Depends(get_current_user)):
-    """Get AI-matched events for user"""
-    if not current_user.value_profile:
-        raise HTTPException(status_code=400, detail="Complete value discovery game first")
-    
-    # Get all events - use simple matching without embeddings
-    all_events = await db.events.find({}, {"_id": 0}).to_list(1000)
+# ==================== REVERSE MATCHING ====================
+
+async def find_audience(collection, id_field: str, item_id: str, member_field: str,
+                        current_user: User, k: int) -> Dict[str, Any]:
+    """Top-k users for an item's value profile, excluding people already in it (creator only)"""
+    item = await collection.find_one(
+        {id_field: item_id},
+        {"_id": 0, "creator_id": 1, "value_profile": 1, member_field: 1}
+    )
+    if not item:
+        raise HTTPException(status_code=404, detail="Not found")
+    if item.get("creator_id") != current_user.user_id:
+        raise HTTPException(status_code=403, detail="Only the creator can view the audience")
     
-    matches = []
+    await user_profile_index.ensure_loaded(db)
+    top = user_profile_index.top_k(item.get("value_profile") or {}, k, exclude=item.get(member_field) or [])
+    return {
+        id_field: item_id,
+        "users": [{"user_id": user_id, "compatibility_score": score} for user_id, score in top]
+    }
+
+@api_router.get("/communities/{community_id}/audience")
+async def get_community_audience(community_id: str, k: int = Query(50, ge=1, le=1000),
+                                 current_user: User = Depends(get_current_user)):
+    """Best-matching users who haven't joined a community"""
+    return await find_audience(db.communities, "community_id", community_id, "members", current_user, k)
+
+@api_router.get("/events/{event_id}/audience")
+async def get_event_audience(event_id: str, k: int = Query(50, ge=1, le=1000),
+                             current_user: User = Depends(get_current_user)):
+    """Best-matching users who aren't attending an event"""
+    return await find_audience(db.events, "event_id", event_id, "attendees", current_user, k)
+
+# New items are announced to their best-matching users by a background worker
+# (see fanout.py); the request only records the job.
+fanout_worker = FanoutWorker(user_profile_index)
+
+async def enqueue_fanout(kind: str, item_id: str):
+    try:
+        await fanout_worker.enqueue(kind, item_id)
+    except Exception as e:
+        logger.error(f"Failed to enqueue fan-out for {kind} {item_id}: {str(e)}")
+
+@api_router.get("/inbox")
+async def get_inbox(limit: int = Query(50, ge=1, le=200), current_user: User = Depends(get_current_user)):
+    """Match notifications for the current user, newest first"""
+    return await db.inbox.find(
+        {"user_id": current_user.user_id},
+        {"_id": 0}
+    ).sort("created_at", -1).limit(limit).to_list(limit)
+
+# ==================== SEARCH ====================
+
+@api_router.get("/search")
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: Optional[str] = Query(None, pattern="^(community|event)$"),
+    limit: int = Query(20, ge=1, le=100),
+    prefix: bool = Query(True),
+    profile_weight: float = Query(0.0, ge=0, le=1),
+    current_user: User = Depends(get_current_user)
+):
+    """Search communities and events by name, description and tags
     
-    for event in all_events:
-        # Skip past events
-        if event['date'] < datetime.now(timezone.utc):
-            continue
-        
-        # Skip if already attending
-        if current_user.user_id in event.get('attendees', []):
-            continue
-        
-        # Simple value-based matching
-        user_values = current_user.value_profile
-        event_values = event['value_profile']
-        similarities = []
-        for key in user_values.keys():
-            if key in event_values:
-                diff = abs(user_values[key] - event_values[key])
-                similarity = 1 - diff
-                similarities.append(similarity)
-        
-        base_score = (sum(similarities) / len(similarities)) * 100 if similarities else 50
-        
-        why_matches = f"This {event['event_type']} event aligns with your interests. "
-        
-        matches.append(EventMatch(
-            event_id=event['event_id'],
-            event_name=event['name'],
-            description=event['description'],
-            event_type=event['event_type'],
-            date=event['date'],
-            location=event['location'],
-            image=event.get('image'),
-            compatibility_score=round(base_score, 1),
-            why_it_matches=why_matches,
-            possible_friction=None,
-            value_profile=event['value_profile'],
-            attendee_count=event.get('attendee_count', 0),
-            tags=event.get('tags', [])
-        ))
-    
-    matches.sort(key=lambda x: x.compatibility_score, reverse=True)
-    return matches
+    The last word of q also matches as a prefix (typeahead) unless prefix=false.
+    profile_weight > 0 blends value-profile similarity into the text relevance.
+    """
+    await search_index.ensure_loaded(db)
+    return ORJSONResponse(search_index.search(q, kind, limit, prefix, current_user.value_profile, profile_weight))
 
 # ==================== ANALYTICS ENDPOINTS ====================
 
@@ -858,7 +1230,7 @@ class AnalyticsEvent(BaseModel):
     event_name: str
     metadata: Optional[Dict[str, Any]] = {}
 
-@api_router.post("/analytics/track")
+@api_router.post("/analytics/track", dependencies=[Depends(rate_limit(track_limiter, user_or_ip))])
 async def track_event(event: AnalyticsEvent, request: Request):
     """Track analytics event (non-blocking, fails silently)"""
     try:
@@ -929,20 +1301,27 @@ async def health_check():
         "huggingface_configured": HUGGINGFACE_TOKEN is not None
     }
 
+@api_router.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until the startup warm-up has finished"""
+    return ORJSONResponse(warmup.status(), status_code=200 if warmup.ready else 503)
+
 # Include router
 app.include_router(api_router)
 
-# Include MongoDB UI router
-from mongo_ui import mongo_ui_router
-app.include_router(mongo_ui_router)
+# MongoDB UI, proxy and admin interface: mounted only when enabled, and their modules
+# (db_admin carries the admin CSS and HTML builders) are imported on first use
+ENABLE_ADMIN_ROUTERS = os.environ.get('ENABLE_ADMIN_ROUTERS', 'true').lower() == 'true'
+if ENABLE_ADMIN_ROUTERS:
+    app.router.routes.append(LazyRouter("/api/mongo-ui", "mongo_ui:mongo_ui_router"))
+    app.router.routes.append(LazyRouter("/mongo-proxy", "mongo_proxy:mongo_proxy_router"))
+    app.router.routes.append(LazyRouter("/api/db-admin", "db_admin:db_admin_router"))
 
-# Include MongoDB Proxy router
-from mongo_proxy import mongo_proxy_router
-app.include_router(mongo_proxy_router)
+# Prometheus metrics endpoint
+from metrics import metrics_router, MetricsMiddleware
+app.include_router(metrics_router)
 
-# Include MongoDB Admin Interface
-from db_admin import db_admin_router
-app.include_router(db_admin_router)
+import_timer.stop()
 
 # Root route for health checks and load balancer probes
 @app.get("/")
@@ -968,6 +1347,80 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Attributes Mongo commands to the request being served (see mongo_monitoring)
+app.add_middleware(MongoRequestMiddleware)
+
+# gzip/brotli above COMPRESSION_MIN_SIZE; inside the metrics middleware so response sizes are wire sizes
+app.add_middleware(CompressionMiddleware)
+
+# 503s for non-critical routes while the event loop or the Mongo pool is saturated
+app.add_middleware(LoadSheddingMiddleware)
+
+# Added last so it wraps every other middleware and times the full request
+app.add_middleware(MetricsMiddleware)
+
+# ==================== STARTUP ====================
+
+# Warm-up runs in the background after startup (liveness on / answers immediately);
+# /api/ready turns 200 once every step below has run, in order.
+warmup = WarmUp()
+
+@warmup.step("mongo_pool", retry=True)
+async def open_mongo_pool():
+    """Open minPoolSize connections now instead of on the first requests"""
+    await asyncio.gather(*(db.command("ping") for _ in range(max(MONGO_MIN_POOL_SIZE, 1))))
+
+@warmup.step("indexes")
+async def ensure_indexes():
+    """Indexes backing the per-user point reads used by matching"""
+    await asyncio.gather(
+        db.user_action_summaries.create_index("user_id", unique=True),
+        db.user_actions.create_index("user_id"),
+        db.communities.create_index("members"),
+        db.communities.create_index("created_at"),
+        db.events.create_index("created_at"),
+        db.precomputed_matches.create_index("user_id", unique=True),
+        db.fanout_jobs.create_index([("status", 1), ("lease_until", 1), ("created_at", 1)]),
+        db.inbox.create_index([("user_id", 1), ("kind", 1), ("item_id", 1)], unique=True),
+        db.inbox.create_index([("user_id", 1), ("created_at", -1)]),
+    )
+
+@warmup.step("scoring_table")
+async def load_scoring_table():
+    await asyncio.to_thread(game_scoring.get_table)
+
+@warmup.step("profile_index")
+async def load_profile_index():
+    await user_profile_index.ensure_loaded(db)
+
+@warmup.step("search_index")
+async def load_search_index():
+    await search_index.ensure_loaded(db)
+
+@warmup.step("cf_model")
+async def load_cf_model():
+    await asyncio.to_thread(collaborative_filtering.get_model)
+
+@warmup.step("catalogues")
+async def prime_catalogues():
+    """Pull the listing queries' documents and plans into Mongo's cache"""
+    await asyncio.gather(
+        db.communities.find({}, {"_id": 0}).limit(100).to_list(100),
+        db.events.find({}, {"_id": 0}).limit(50).to_list(50),
+    )
+
+@app.on_event("startup")
+async def start_background_tasks():
+    logger.info(import_timer.report())
+    warmup.start()
+    fanout_worker.start(db)
+    loop_lag_monitor.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await warmup.stop()
+    await fanout_worker.stop()
+    await loop_lag_monitor.stop()
+    await search_index.stop()
+    await user_profile_index.stop()
     client.close()
@@ -0,0 +1,42 @@
+"""
+Request coalescing
+Concurrent callers asking for the same key share one in-flight computation
+instead of each running it (thundering herd after deploys and screen mounts)
+"""
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import asyncio
+
+from metrics import REGISTRY, Counter
+
+SINGLEFLIGHT_CALLS = REGISTRY.register(Counter(
+    "singleflight_calls_total", "Calls through a single-flight group, by whether they ran or joined one",
+    ("group", "outcome")
+))
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls per key; the result (or exception) is shared by every waiter"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._executed = (name, "executed")
+        self._shared = (name, "shared")
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is not None:
+            SINGLEFLIGHT_CALLS.inc(self._shared)
+        else:
+            SINGLEFLIGHT_CALLS.inc(self._executed)
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        # Shielded so one disconnecting client doesn't cancel the work the others are waiting on
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every waiter went away
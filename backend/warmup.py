@@ -0,0 +1,84 @@
+"""
+Startup warm-up
+Named steps (open the Mongo pool, build indexes and in-memory models) run in the
+background after startup; /api/ready reports 503 until all of them have finished,
+so load balancers only route traffic to warm replicas. Each step's duration is
+logged and exported as a gauge.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
+from metrics import REGISTRY, Gauge
+
+logger = logging.getLogger(__name__)
+
+WARMUP_STEP_SECONDS = REGISTRY.register(Gauge("warmup_step_seconds", "Duration of each startup warm-up step", ("step",)))
+APP_READY = REGISTRY.register(Gauge("app_ready", "1 once startup warm-up has finished"))
+
+
+class WarmUp:
+    """Ordered warm-up steps; steps registered with retry=True are retried with backoff until they succeed"""
+
+    def __init__(self):
+        self._steps: List[Tuple[str, Callable[[], Awaitable[Any]], bool]] = []
+        self._task: Optional[asyncio.Task] = None
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.total_ms: Optional[float] = None
+        self.ready = False
+
+    def step(self, name: str, retry: bool = False):
+        def register(fn: Callable[[], Awaitable[Any]]):
+            self._steps.append((name, fn, retry))
+            return fn
+        return register
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def run(self):
+        started = time.perf_counter()
+        for name, fn, retry in self._steps:
+            step_started = time.perf_counter()
+            attempt = 0
+            while True:
+                try:
+                    await fn()
+                    break
+                except Exception as e:
+                    if not retry:
+                        self.errors[name] = str(e)
+                        logger.error(f"Warm-up step {name} failed: {str(e)}")
+                        break
+                    attempt += 1
+                    delay = min(30.0, 0.5 * 2 ** attempt)
+                    logger.warning(f"Warm-up step {name} failed (attempt {attempt}), retrying in {delay:.0f}s: {str(e)}")
+                    await asyncio.sleep(delay)
+            elapsed = time.perf_counter() - step_started
+            self.timings[name] = round(elapsed * 1000, 1)
+            WARMUP_STEP_SECONDS.set(elapsed, (name,))
+
+        self.total_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.ready = True
+        APP_READY.set(1)
+        steps = ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.timings.items())
+        logger.info(f"Warm-up finished in {self.total_ms:.0f} ms ({steps})")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "steps_ms": self.timings,
+            "total_ms": self.total_ms,
+            "errors": self.errors,
+        }
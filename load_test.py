@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Load testing for the AI Community Matching backend
+Runs realistic user journeys (register, play the game, browse matches, join,
+browse events) with many concurrent async clients and reports throughput and
+latency percentiles per route.
+
+    # In-process: the FastAPI app is driven through httpx's ASGI transport
+    # (MONGO_URL from backend/.env; --db names a scratch database for the load_* users)
+    python load_test.py --db community_matching_load --users 200 --sessions 5
+
+    # Against a running server
+    python load_test.py --base-url http://localhost:8001/api --users 200
+
+Results are written as JSON to test_reports/load/ (or --output); pass
+--baseline <previous.json> to print the change per route.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+ROOT_DIR = Path(__file__).parent
+REPORT_DIR = ROOT_DIR / "test_reports" / "load"
+PASSWORD = "LoadTest123!"
+
+
+class RouteStats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Dict[str, int] = {}
+        self.errors = 0
+
+    def record(self, seconds: float, status: Optional[int]):
+        self.latencies.append(seconds)
+        key = str(status) if status is not None else "exception"
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+        if status is None or status >= 400:
+            self.errors += 1
+
+    def summary(self, wall_seconds: float) -> Dict:
+        latencies = np.array(self.latencies) * 1000
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) if len(latencies) else (0, 0, 0)
+        return {
+            "requests": len(latencies),
+            "errors": self.errors,
+            "rps": round(len(latencies) / wall_seconds, 1) if wall_seconds else 0,
+            "mean_ms": round(float(latencies.mean()), 2) if len(latencies) else 0,
+            "p50_ms": round(float(p50), 2),
+            "p90_ms": round(float(p90), 2),
+            "p99_ms": round(float(p99), 2),
+            "max_ms": round(float(latencies.max()), 2) if len(latencies) else 0,
+            "statuses": self.statuses,
+        }
+
+
+class LoadTester:
+    def __init__(self, client: httpx.AsyncClient, users: int, sessions: int, ramp_up: float):
+        self.client = client
+        self.users = users
+        self.sessions = sessions
+        self.ramp_up = ramp_up
+        self.stats: Dict[str, RouteStats] = {}
+
+    async def call(self, route: str, method: str, path: str, **kwargs) -> Optional[httpx.Response]:
+        """Timed request; `route` is the label results are grouped under"""
+        started = time.perf_counter()
+        response = None
+        try:
+            response = await self.client.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            pass
+        self.stats.setdefault(route, RouteStats()).record(
+            time.perf_counter() - started, response.status_code if response is not None else None
+        )
+        return response
+
+    async def user_journey(self, index: int):
+        await asyncio.sleep(self.ramp_up * index / max(self.users, 1))
+        rng = random.Random(index)
+        email = f"load_{uuid.uuid4().hex[:10]}@example.com"
+
+        response = await self.call("POST /auth/register", "POST", "/auth/register",
+                                   json={"email": email, "password": PASSWORD, "name": f"Load User {index}"})
+        if response is None or response.status_code != 200:
+            return
+        headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+        response = await self.call("GET /game/tiles", "GET", "/game/tiles", headers=headers)
+        if response is None or response.status_code != 200:
+            return
+        rounds = response.json()["rounds"]
+        selections = [{"round": i, "word": rng.choice(words)} for i, words in enumerate(rounds)]
+        await self.call("POST /game/submit", "POST", "/game/submit", json={"selections": selections}, headers=headers)
+
+        joined = attending = False
+        for _ in range(self.sessions):
+            # A returning session: matches first, then browse
+            matches = await self.call("GET /matches", "GET", "/matches", headers=headers)
+            await self.call("GET /communities", "GET", "/communities", headers=headers)
+            if not joined and matches is not None and matches.status_code == 200 and matches.json():
+                community_id = matches.json()[0]["community_id"]
+                await self.call("POST /communities/{id}/join", "POST", f"/communities/{community_id}/join", headers=headers)
+                joined = True
+            elif matches is not None and matches.status_code == 200 and len(matches.json()) > 1:
+                community_id = rng.choice(matches.json()[1:])["community_id"]
+                await self.call("POST /communities/{id}/skip", "POST", f"/communities/{community_id}/skip", headers=headers)
+            await self.call("GET /events", "GET", "/events", headers=headers)
+            event_matches = await self.call("GET /events/matches", "GET", "/events/matches", headers=headers)
+            if not attending and event_matches is not None and event_matches.status_code == 200 and event_matches.json():
+                event_id = event_matches.json()[0]["event_id"]
+                await self.call("POST /events/{id}/attend", "POST", f"/events/{event_id}/attend", headers=headers)
+                attending = True
+            await self.call("GET /communities/my/joined", "GET", "/communities/my/joined", headers=headers)
+
+    async def run(self) -> Dict:
+        started = time.perf_counter()
+        await asyncio.gather(*(self.user_journey(i) for i in range(self.users)))
+        wall = time.perf_counter() - started
+
+        routes = {route: stats.summary(wall) for route, stats in sorted(self.stats.items())}
+        total_requests = sum(route["requests"] for route in routes.values())
+        all_latencies = np.concatenate([np.array(stats.latencies) for stats in self.stats.values()]) * 1000
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "config": {"users": self.users, "sessions": self.sessions, "ramp_up": self.ramp_up},
+            "duration_s": round(wall, 2),
+            "total_requests": total_requests,
+            "total_errors": sum(route["errors"] for route in routes.values()),
+            "throughput_rps": round(total_requests / wall, 1),
+            "p50_ms": round(float(np.percentile(all_latencies, 50)), 2) if total_requests else 0,
+            "p99_ms": round(float(np.percentile(all_latencies, 99)), 2) if total_requests else 0,
+            "routes": routes,
+        }
+
+
+def print_report(report: Dict, baseline: Optional[Dict] = None):
+    print("\n" + "=" * 96)
+    print("🏁 LOAD TEST SUMMARY")
+    print("=" * 96)
+    print(f"👥 {report['config']['users']} users x {report['config']['sessions']} sessions in {report['duration_s']}s")
+    print(f"📊 {report['total_requests']:,} requests, {report['throughput_rps']:,} req/s, "
+          f"p50 {report['p50_ms']} ms, p99 {report['p99_ms']} ms, {report['total_errors']} errors\n")
+    print(f"{'route':34} {'reqs':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    for route, stats in report["routes"].items():
+        line = (f"{route:34} {stats['requests']:>7} {stats['errors']:>5} {stats['rps']:>8} "
+                f"{stats['p50_ms']:>8} {stats['p90_ms']:>8} {stats['p99_ms']:>8} {stats['max_ms']:>8}")
+        previous = (baseline or {}).get("routes", {}).get(route)
+        if previous and previous["p50_ms"] and previous["p99_ms"]:
+            line += (f"   p50 {(stats['p50_ms'] / previous['p50_ms'] - 1) * 100:+.0f}%"
+                     f" p99 {(stats['p99_ms'] / previous['p99_ms'] - 1) * 100:+.0f}%")
+        print(line)
+    if baseline:
+        change = (report["throughput_rps"] / baseline["throughput_rps"] - 1) * 100 if baseline["throughput_rps"] else 0
+        print(f"\n📈 Throughput vs baseline: {change:+.1f}%")
+
+
+async def main(args):
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout,
+                                     limits=httpx.Limits(max_connections=args.users)) as client:
+            report = await LoadTester(client, args.users, args.sessions, args.ramp_up).run()
+    else:
+        # Set before server is imported: it connects to DB_NAME at import (.env does not override it)
+        os.environ['DB_NAME'] = args.db
+        sys.path.insert(0, str(ROOT_DIR / "backend"))
+        import server
+
+        # ASGITransport doesn't send lifespan events, so run startup/shutdown here
+        await server.app.router.startup()
+        try:
+            transport = httpx.ASGITransport(app=server.app, raise_app_exceptions=False)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest/api", timeout=args.timeout) as client:
+                report = await LoadTester(client, args.users, args.sessions, args.ramp_up).run()
+        finally:
+            await server.app.router.shutdown()
+    report["target"] = args.base_url or "in-process"
+
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    print_report(report, baseline)
+
+    output = Path(args.output) if args.output else REPORT_DIR / f"load_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\n💾 Saved results to {output}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent user-journey load test")
+    parser.add_argument("--base-url", help="e.g. http://localhost:8001/api; default runs the app in-process")
+    parser.add_argument("--users", type=int, default=50, help="concurrent virtual users")
+    parser.add_argument("--sessions", type=int, default=3, help="returning sessions per user after onboarding")
+    parser.add_argument("--ramp-up", type=float, default=2.0, help="seconds over which users start")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="JSON report path")
+    parser.add_argument("--baseline", help="previous JSON report to compare against")
+    parser.add_argument("--db", help="database for in-process runs (required then; never the app's own)")
+    args = parser.parse_args()
+    if not args.base_url:
+        if not args.db:
+            parser.error("in-process runs write load_* users; pass --db with a scratch database name")
+        from dotenv import dotenv_values
+        if args.db == dotenv_values(ROOT_DIR / "backend" / ".env").get("DB_NAME"):
+            parser.error(f"--db {args.db} is the app's database from backend/.env; use a scratch one")
+    report = asyncio.run(main(args))
+    sys.exit(1 if report["total_errors"] else 0)
@@ -0,0 +1,54 @@
+"""
+Shared fixtures. Backend modules are imported the way server.py imports them
+(flat, from backend/); API tests run the app against an in-memory mongomock
+database so they need no MongoDB server.
+"""
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "community_matching_test")
+
+SELECTIONS = [
+    {"round": i, "word": word}
+    for i, word in enumerate(["adventure", "cooperation", "action", "learning",
+                              "together", "support", "teamwork", "family"])
+]
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """TestClient for server.app backed by a fresh mongomock database"""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    from fastapi.testclient import TestClient
+    import server
+    from reverse_matching import UserProfileIndex
+    from search import SearchIndex
+
+    db = mongomock_motor.AsyncMongoMockClient()[f"test_{uuid.uuid4().hex[:8]}"]
+    monkeypatch.setattr(server, "db", db)
+    server.match_cache.clear()
+    server.detail_cache.clear()
+    # Fresh indexes per test: the process-wide ones would hold the previous test's database
+    profile_index = UserProfileIndex()
+    monkeypatch.setattr(server, "user_profile_index", profile_index)
+    monkeypatch.setattr(server.fanout_worker, "index", profile_index)
+    monkeypatch.setattr(server, "search_index", SearchIndex())
+    with TestClient(server.app) as client:
+        client.db = db
+        yield client
+
+
+def register(client, email: str = "user@example.com"):
+    """Register a user; returns (auth headers, user_id)"""
+    response = client.post("/api/auth/register", json={"email": email, "password": "password", "name": "Test"})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    return {"Authorization": f"Bearer {body['token']}"}, body["user"]["user_id"]
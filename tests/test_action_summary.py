@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta, timezone
+
+from tests.conftest import SELECTIONS, register
+
+
+def create_community(client, headers, name):
+    response = client.post("/api/communities", headers=headers, json={
+        "name": name, "description": "d", "value_profile": {"structured": 0.5},
+        "environment_settings": {"size": "small"},
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["community_id"]
+
+
+def test_legacy_history_is_backfilled_after_a_partial_write(api):
+    import server
+
+    creator, _ = register(api, "creator@example.com")
+    headers, user_id = register(api)
+    assert api.post("/api/game/submit", json={"selections": SELECTIONS}, headers=headers).status_code == 200
+    joined, skipped, fresh = (create_community(api, creator, name) for name in ("Joined", "Skipped", "Fresh"))
+
+    # History from before summaries existed: raw actions and membership only
+    joined_at = datetime.now(timezone.utc) - timedelta(days=30)
+    api.portal.call(api.db.user_actions.insert_many, [
+        {"user_id": user_id, "community_id": joined, "action": "join", "timestamp": joined_at},
+        {"user_id": user_id, "community_id": skipped, "action": "skip", "timestamp": joined_at},
+    ])
+    api.portal.call(api.db.communities.update_one, {"community_id": joined}, {"$push": {"members": user_id}})
+    api.portal.call(api.db.user_action_summaries.delete_many, {"user_id": user_id})
+
+    # First write after deploy creates a partial summary document
+    assert api.post(f"/api/communities/{fresh}/skip", headers=headers).status_code == 200
+
+    matches = api.get("/api/matches", headers=headers).json()
+    assert joined not in {match["community_id"] for match in matches}
+
+    summary = api.portal.call(server.get_action_summary, user_id)
+    assert summary["backfilled"] is True
+    assert set(summary["skipped"]) == {skipped, fresh}
+    assert set(summary["joined"]) == {joined}
+    assert server.as_utc(summary["joined"][joined]) - joined_at < timedelta(milliseconds=1)
+
+
+def test_skipping_an_unknown_community_is_rejected(api):
+    headers, user_id = register(api)
+    assert api.post("/api/communities/comm_made_up/skip", headers=headers).status_code == 404
+    assert api.portal.call(api.db.user_action_summaries.find_one, {"user_id": user_id}) is None
+
+
+def test_ids_with_dots_and_dollars_stay_flat_keys(api):
+    import server
+
+    headers, user_id = register(api)
+    assert api.post("/api/game/submit", json={"selections": SELECTIONS}, headers=headers).status_code == 200
+    odd_ids = ["comm.dotted", "$comm", "comm.$x"]
+    api.portal.call(api.db.communities.insert_many, [
+        {"community_id": community_id, "name": community_id, "description": "d", "members": [],
+         "member_count": 0, "value_profile": {"structured": 0.5}, "environment_settings": {}}
+        for community_id in odd_ids
+    ])
+    # A sub-document left by an unescaped id before keys were escaped
+    api.portal.call(api.db.user_action_summaries.insert_one, {
+        "user_id": user_id, "backfilled": True, "skipped": {"legacy": {"nested": datetime.now(timezone.utc)}}
+    })
+    for community_id in odd_ids:
+        assert api.post(f"/api/communities/{community_id}/skip", headers=headers).status_code == 200
+    assert api.post("/api/communities/comm.dotted/join", headers=headers).status_code == 200
+
+    assert api.get("/api/matches", headers=headers).status_code == 200
+    summary = api.portal.call(server.get_action_summary, user_id)
+    assert set(summary["skipped"]) == set(odd_ids)
+    assert set(summary["joined"]) == {"comm.dotted"}
+
+
+def test_summary_keys_round_trip():
+    import server
+
+    for community_id in ("plain", "a.b", "$a", "50%", "a%2Eb"):
+        key = server.summary_field("skipped", community_id).removeprefix("skipped.")
+        assert "." not in key and not key.startswith("$")
+        assert server.summary_entries({key: 1}) == {community_id: 1}
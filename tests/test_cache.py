@@ -0,0 +1,73 @@
+import pytest
+
+import cache
+from cache import MISSING, CatalogueVersions, TTLCache
+from tests.conftest import SELECTIONS, register
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    lru = TTLCache("test", maxsize=2, ttl=60)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1  # "b" is now the least recently used
+    lru.set("c", 3)
+    assert lru.get("b") is MISSING
+    assert (lru.get("a"), lru.get("c")) == (1, 3)
+
+
+def test_entries_expire_and_are_checked_against_their_version(clock):
+    lru = TTLCache("test", maxsize=10, ttl=60)
+    lru.set("a", 1, version=("v", 1))
+    assert lru.get("a", ("v", 2)) is MISSING
+    assert lru.get("a", ("v", 1)) is MISSING  # a stale read drops the entry
+    lru.set("a", 1, version=("v", 1))
+    clock[0] += 59
+    assert lru.get("a", ("v", 1)) == 1
+    clock[0] += 1
+    assert lru.get("a", ("v", 1)) is MISSING
+
+
+def test_value_computed_across_an_invalidation_is_not_served(clock):
+    lru = TTLCache("test", maxsize=10, ttl=60)
+    generation = lru.generation("user")
+    lru.invalidate("user")  # a write lands while the value is being computed
+    lru.set("user", "before the write", version=generation)
+    assert lru.get("user", lru.generation("user")) is MISSING
+    lru.set("user", "after the write", version=lru.generation("user"))
+    assert lru.get("user", lru.generation("user")) == "after the write"
+    assert lru.generation("other") == 0
+
+
+def test_catalogue_versions_count_bumps():
+    versions = CatalogueVersions()
+    assert versions.get("communities") == 0
+    assert versions.bump("communities") == 1
+    assert (versions.get("communities"), versions.get("events")) == (1, 0)
+
+
+def test_matches_computed_during_a_join_are_not_cached(api, monkeypatch):
+    import server
+
+    headers, user_id = register(api)
+    assert api.post("/api/game/submit", json={"selections": SELECTIONS}, headers=headers).status_code == 200
+    compute = server.get_matches_fallback
+    calls = []
+
+    async def racing_compute(current_user, *args, **kwargs):
+        calls.append(current_user.user_id)
+        matches = await compute(current_user, *args, **kwargs)
+        if len(calls) == 1:
+            server.match_cache.invalidate(user_id)  # e.g. a join finishing meanwhile
+        return matches
+
+    monkeypatch.setattr(server, "get_matches_fallback", racing_compute)
+    for _ in range(3):
+        assert api.get("/api/matches", headers=headers).status_code == 200
+    assert len(calls) == 2
@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+
+import collaborative_filtering
+from collaborative_filtering import CFModel
+from tests.conftest import SELECTIONS, register
+
+
+def model(user_ids, item_ids, factors=2, seed=0):
+    rng = np.random.default_rng(seed)
+    return CFModel(np.array(sorted(user_ids)), np.array(sorted(item_ids)),
+                   rng.random((len(user_ids), factors), dtype=np.float32),
+                   rng.random((len(item_ids), factors), dtype=np.float32))
+
+
+def test_positions_compare_whole_ids():
+    trained = np.array(["comm_a", "comm_b"])  # <U6
+    positions = CFModel._positions(trained, ["comm_b", "comm_a_longer", "comm_bb", "comm", "comm_c"])
+    assert positions.tolist() == [1, -1, -1, -1, -1]
+    assert CFModel._positions(trained, []).tolist() == []
+
+
+def test_unknown_user_and_items_score_as_missing():
+    cf = model(["user_1"], ["comm_a"])
+    assert cf.score("user_1_suffix", ["comm_a"]) is None
+    scores = cf.score("user_1", ["comm_a", "comm_a_suffix"])
+    assert not np.isnan(scores[0]) and np.isnan(scores[1])
+
+
+def test_cf_matches_are_recomputed_when_a_retrained_model_is_deployed(api, monkeypatch, tmp_path):
+    import server
+
+    path = tmp_path / "cf_model.npz"
+    for name, value in (("CF_MODEL_PATH", path), ("CF_RELOAD_INTERVAL", 0), ("_model", None),
+                        ("_model_mtime", None), ("_model_checked_at", None)):
+        monkeypatch.setattr(collaborative_filtering, name, value)
+    headers, user_id = register(api)
+    assert api.post("/api/game/submit", json={"selections": SELECTIONS}, headers=headers).status_code == 200
+
+    compute = server.get_matches_fallback
+    calls = []
+
+    async def counting_compute(*args, **kwargs):
+        calls.append(1)
+        return await compute(*args, **kwargs)
+
+    monkeypatch.setattr(server, "get_matches_fallback", counting_compute)
+    model([user_id], ["comm_a"], seed=1).save(path)
+    for _ in range(2):
+        assert api.get("/api/matches?mode=cf", headers=headers).status_code == 200
+    assert len(calls) == 1
+
+    model([user_id], ["comm_a"], seed=2).save(path)
+    os.utime(path, (path.stat().st_atime, path.stat().st_mtime + 10))
+    assert api.get("/api/matches?mode=cf", headers=headers).status_code == 200
+    assert len(calls) == 2
@@ -0,0 +1,92 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+import compression
+from compression import CompressionMiddleware, choose_encoding
+
+BODY = b'{"rows": [' + b",".join(b'{"n": %d}' % i for i in range(500)) + b"]}"
+ETAG = '"listing-1"'
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)  # gzip only, whether or not brotli is installed
+    app = FastAPI()
+
+    @app.get("/large")
+    async def large(request: Request):
+        if request.headers.get("if-none-match", "").removeprefix("W/") == ETAG:
+            return Response(status_code=304, headers={"ETag": ETAG})
+        return Response(BODY, media_type="application/json", headers={"ETag": ETAG})
+
+    @app.get("/small")
+    async def small():
+        return Response(b'{"ok": true}', media_type="application/json")
+
+    @app.get("/image")
+    async def image():
+        return Response(b"\x89PNG" + b"\x00" * 4096, media_type="image/png")
+
+    @app.get("/stream")
+    async def stream():
+        async def rows():
+            for i in range(3):
+                yield b'{"chunk": %d}\n' % i
+        return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    return TestClient(app)
+
+
+def raw(client, path, accept_encoding, **headers):
+    """Response with the body as sent (httpx would otherwise decode it)"""
+    with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding, **headers}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate", "gzip"),
+    ("*", "gzip"),
+    ("gzip;q=0, identity", None),
+    ("identity", None),
+    ("", None),
+])
+def test_choose_encoding(monkeypatch, header, expected):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert choose_encoding(header) == expected
+
+
+def test_large_json_is_gzipped(client):
+    response, body = raw(client, "/large", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-length"] == str(len(body))
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert gzip.decompress(body) == BODY
+
+
+@pytest.mark.parametrize("path", ["/small", "/image"])
+def test_small_and_binary_responses_pass_through(client, path):
+    response, _ = raw(client, path, "gzip")
+    assert "content-encoding" not in response.headers
+
+
+def test_stream_is_compressed_chunk_by_chunk(client):
+    response, body = raw(client, "/stream", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(body) == b'{"chunk": 0}\n{"chunk": 1}\n{"chunk": 2}\n'
+
+
+def test_etag_differs_between_encoded_and_identity_representations(client):
+    encoded, _ = raw(client, "/large", "gzip")
+    identity, body = raw(client, "/large", "identity")
+    assert identity.headers["etag"] == ETAG and body == BODY
+    assert encoded.headers["etag"] == f"W/{ETAG}"
+
+    revalidated, _ = raw(client, "/large", "gzip", **{"If-None-Match": encoded.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == encoded.headers["etag"]
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from db_admin import AGGREGATE_MAX_BATCH_SIZE, AGGREGATE_MAX_TIME_MS, HyperLogLog, aggregate_limits
+
+
+@pytest.mark.parametrize("requested, expected", [
+    ((0, 0), (1, 1)),  # maxTimeMS 0 would disable the server-side limit
+    ((-5, -5), (1, 1)),
+    ((10 ** 9, 10 ** 9), (AGGREGATE_MAX_TIME_MS, AGGREGATE_MAX_BATCH_SIZE)),
+    ((500, 50), (500, 50)),
+])
+def test_aggregate_limits_are_clamped(requested, expected):
+    assert aggregate_limits(*requested) == expected
+
+
+@pytest.mark.parametrize("distinct", [0, 1, 50, 1000, 20000, 200000])
+def test_hyperloglog_estimates_distinct_counts(distinct):
+    hll = HyperLogLog()
+    for i in range(distinct):
+        hll.add(f"value-{i}")
+        hll.add(f"value-{i}")  # repeats don't count
+    # Standard error is 1.04 / sqrt(1024) ~ 3.3%; allow four of them
+    assert abs(hll.estimate() - distinct) <= max(2, 0.13 * distinct)
+
+
+def test_schema_cache_is_bounded_and_refresh_recomputes(monkeypatch):
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    import db_admin
+
+    client = mongomock_motor.AsyncMongoMockClient()
+    monkeypatch.setattr(db_admin, "client", client)
+    monkeypatch.setattr(db_admin, "_schema_cache", db_admin.TTLCache("schema", db_admin.SCHEMA_CACHE_SIZE, 300))
+
+    async def scenario():
+        await client.shop.orders.insert_many([{"n": i} for i in range(5)])
+        first = await db_admin.infer_schema("shop", "orders", sample_size=3)
+        assert await db_admin.infer_schema("shop", "orders", sample_size=3) is first
+        assert await db_admin.infer_schema("shop", "orders", sample_size=3, refresh=True) is not first
+        for sample_size in range(1, db_admin.SCHEMA_CACHE_SIZE + 10):
+            await db_admin.infer_schema("shop", "orders", sample_size=sample_size)
+        assert len(db_admin._schema_cache._entries) == db_admin.SCHEMA_CACHE_SIZE
+
+    asyncio.run(scenario())
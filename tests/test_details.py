@@ -0,0 +1,34 @@
+from tests.conftest import register
+
+
+def create_community(client, headers, name):
+    response = client.post("/api/communities", headers=headers, json={
+        "name": name, "description": "d", "value_profile": {"structured": 0.5},
+        "environment_settings": {"size": "small"},
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["community_id"]
+
+
+def test_batched_lookup_returns_requested_ids_in_order(api):
+    headers, _ = register(api)
+    first, second = create_community(api, headers, "First"), create_community(api, headers, "Second")
+    response = api.get(f"/api/communities?ids={second},comm_missing,{first},{second}", headers=headers)
+    assert [community["community_id"] for community in response.json()] == [second, first]
+    assert "members" not in response.json()[0]
+
+
+def test_batched_lookup_is_never_conditional(api):
+    headers, _ = register(api)
+    community_id = create_community(api, headers, "Club")
+    listing_etag = api.get("/api/communities", headers=headers).headers["etag"]
+
+    response = api.get(f"/api/communities?ids={community_id}", headers={**headers, "If-None-Match": listing_etag})
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+    assert [community["community_id"] for community in response.json()] == [community_id]
+
+    response = api.get("/api/events?ids=event_missing", headers={**headers, "If-None-Match": "*"})
+    assert (response.status_code, response.json()) == (200, [])
+    assert "etag" not in response.headers
+    assert api.get("/api/communities", headers={**headers, "If-None-Match": listing_etag}).status_code == 304
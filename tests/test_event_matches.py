@@ -0,0 +1,36 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from tests.conftest import SELECTIONS, register
+
+
+def create_event(client, headers, name, days):
+    response = client.post("/api/events", headers=headers, json={
+        "name": name, "description": "d", "event_type": "meetup",
+        "date": (datetime.now(timezone.utc) + timedelta(days=days)).isoformat(),
+        "location": "here", "value_profile": {"structured": 0.5},
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["event_id"]
+
+
+def test_precomputed_event_candidates_ignore_analytics_rows(api):
+    creator, _ = register(api, "creator@example.com")
+    headers, user_id = register(api)
+    assert api.post("/api/game/submit", json={"selections": SELECTIONS}, headers=headers).status_code == 200
+    precomputed = create_event(api, creator, "Precomputed", 3)
+
+    # Nightly run after the profile was scored; everything below happens after it
+    api.portal.call(api.db.precomputed_matches.insert_one, {
+        "user_id": user_id,
+        "events": [{"event_id": precomputed, "score": 80.0}],
+        "computed_at": datetime.now(timezone.utc),
+    })
+    api.portal.call(asyncio.sleep, 0.01)
+    assert api.post("/api/analytics/track", json={"event_name": "screen_view", "metadata": {}}).status_code == 200
+    created_since = create_event(api, creator, "Created since", 5)
+    create_event(api, creator, "Already over", -1)
+
+    response = api.get("/api/events/matches", headers=headers)
+    assert response.status_code == 200, response.text
+    assert {match["event_id"] for match in response.json()} == {precomputed, created_since}
@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import fanout
+from fanout import FANOUT_MAX_ATTEMPTS, FanoutWorker
+from reverse_matching import UserProfileIndex
+
+
+@pytest.fixture
+def db():
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    return mongomock_motor.AsyncMongoMockClient()["fanout_test"]
+
+
+def worker(db, profiles):
+    index = UserProfileIndex()
+    for user_id, profile in profiles.items():
+        index.upsert(user_id, profile)
+    index.loaded_at = float("inf")  # already loaded; never stale
+    worker = FanoutWorker(index)
+    worker.db = db
+    return worker
+
+
+def test_retry_resumes_the_stored_audience_at_its_offset(db, monkeypatch):
+    monkeypatch.setattr(fanout, "FANOUT_CHUNK_SIZE", 2)
+    audience = [[f"user_{i}", 90.0 - i] for i in range(5)]
+
+    async def scenario():
+        await db.communities.insert_one({"community_id": "c1", "name": "Club",
+                                         "value_profile": {"experiential": 1.0}, "members": []})
+        fan = worker(db, {})  # an empty index: the retry must not recompute the audience
+        job_id = await fan.enqueue("community", "c1")
+        # The previous attempt delivered the first chunk, then its worker died (its inbox
+        # entries are left out here, so a replay from the start would show up)
+        await db.fanout_jobs.update_one({"_id": job_id}, {"$set": {"audience": audience, "offset": 2, "delivered": 2}})
+
+        await fan._process(await fan._claim())
+        job = await db.fanout_jobs.find_one({"_id": job_id})
+        inbox = await db.inbox.distinct("user_id", {"item_id": "c1"})
+        return job, sorted(inbox)
+
+    job, inbox = asyncio.run(scenario())
+    assert inbox == ["user_2", "user_3", "user_4"]
+    assert (job["status"], job["delivered"], job["offset"]) == ("done", 5, 5)
+    assert "audience" not in job
+
+
+def test_first_attempt_stores_the_audience(db, monkeypatch):
+    profiles = {f"user_{i}": {"experiential": 1.0 - i / 100} for i in range(3)}
+
+    async def scenario():
+        await db.communities.insert_one({"community_id": "c1", "name": "Club",
+                                         "value_profile": {"experiential": 1.0}, "members": ["user_0"]})
+        fan = worker(db, profiles)
+        job_id = await fan.enqueue("community", "c1")
+        stored = []
+        finish = fan._finish
+
+        async def recording_finish(job, status, **fields):
+            stored.append((await db.fanout_jobs.find_one({"_id": job_id}))["audience"])
+            await finish(job, status, **fields)
+
+        monkeypatch.setattr(fan, "_finish", recording_finish)
+        await fan._process(await fan._claim())
+        return stored, await db.inbox.distinct("user_id", {"item_id": "c1"})
+
+    stored, inbox = asyncio.run(scenario())
+    assert stored == [[["user_1", 99.0], ["user_2", 98.0]]]
+    assert sorted(inbox) == ["user_1", "user_2"]
+
+
+def test_claim_fails_jobs_whose_last_attempt_died(db):
+    async def scenario():
+        fan = worker(db, {})
+        job_id = await fan.enqueue("community", "c1")
+        # A worker died holding it on its last attempt; the lease has since expired
+        await db.fanout_jobs.update_one({"_id": job_id}, {"$set": {
+            "status": "running", "attempts": FANOUT_MAX_ATTEMPTS,
+            "lease_until": datetime.now(timezone.utc) - timedelta(seconds=1),
+        }})
+        return await fan._claim(), await db.fanout_jobs.find_one({"_id": job_id})
+
+    claimed, job = asyncio.run(scenario())
+    assert claimed is None
+    assert job["status"] == "failed"
@@ -0,0 +1,67 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import game_scoring
+from game_scoring import (
+    GAME_TILES, NUM_ROUNDS, PREFERENCE_KEYS, PREFERENCE_LABELS, PROFILE_KEYS, TILES_PER_ROUND, VALUE_KEYS,
+    WORD_TO_VALUE, decode_preferences, decode_profile, encode_selections, get_table, score_counts,
+    score_selections,
+)
+
+
+def counted(words):
+    value_counts = dict.fromkeys(VALUE_KEYS, 0)
+    for word in words:
+        value_counts[WORD_TO_VALUE[word]] += 1
+    return score_counts(value_counts, len(words))
+
+
+def test_table_matches_counting_for_every_selection():
+    profiles, preferences = get_table()
+    assert len(profiles) == TILES_PER_ROUND ** NUM_ROUNDS
+    for choices in itertools.product(range(TILES_PER_ROUND), repeat=NUM_ROUNDS):
+        words = [GAME_TILES[round_index][choice] for round_index, choice in enumerate(choices)]
+        code = sum(choice * TILES_PER_ROUND ** round_index for round_index, choice in enumerate(choices))
+        expected_profile, expected_preferences = counted(words)
+        assert decode_preferences(preferences[code]) == expected_preferences, words
+        np.testing.assert_allclose([expected_profile[key] for key in PROFILE_KEYS], profiles[code], atol=1e-9)
+
+
+@pytest.mark.parametrize("rounds", [
+    list(range(NUM_ROUNDS)),  # the app sends 0-based rounds
+    list(range(1, NUM_ROUNDS + 1)),
+    [str(i) for i in range(NUM_ROUNDS)],
+    [None] * NUM_ROUNDS,
+])
+def test_encoding_ignores_the_submitted_round_number(rounds):
+    selections = [{"round": round_number, "word": words[2]} for round_number, words in zip(rounds, GAME_TILES)]
+    assert encode_selections(selections) == sum(2 * TILES_PER_ROUND ** i for i in range(NUM_ROUNDS))
+    assert encode_selections(list(reversed(selections))) == encode_selections(selections)
+
+
+def test_encoding_rejects_submissions_off_the_grid():
+    full = [{"round": i, "word": words[0]} for i, words in enumerate(GAME_TILES)]
+    assert encode_selections(full[:-1]) is None
+    assert encode_selections(full[:-1] + [{"round": 7, "word": GAME_TILES[0][1]}]) is None  # round 0 twice
+    assert encode_selections(full[:-1] + [{"round": 7, "word": "not-a-tile"}]) is None
+    assert encode_selections(full[:-1] + [{"round": 7, "word": ["list"]}]) is None
+
+
+def test_score_selections_uses_the_table_for_client_submissions(monkeypatch):
+    words = [words[1] for words in GAME_TILES]
+    selections = [{"round": i, "word": word} for i, word in enumerate(words)]
+    monkeypatch.setattr(game_scoring, "score_counts", lambda *args: pytest.fail("fell back to counting"))
+    profile, preferences = score_selections(selections)
+    expected_profile, expected_preferences = counted(words)
+    assert preferences == expected_preferences
+    assert profile == pytest.approx(expected_profile)
+    assert set(preferences) == set(PREFERENCE_KEYS)
+    assert all(preferences[key] in PREFERENCE_LABELS[key] for key in PREFERENCE_KEYS)
+
+
+def test_partial_submissions_fall_back_to_counting():
+    selections = [{"round": 0, "word": GAME_TILES[0][0]}, {"round": 1, "word": GAME_TILES[1][1]}]
+    assert score_selections(selections) == counted([GAME_TILES[0][0], GAME_TILES[1][1]])
+    assert decode_profile(get_table()[0][0]).keys() == set(PROFILE_KEYS)
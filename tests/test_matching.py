@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from matching import mmr_order, similarity_matrix
+
+
+def reference_mmr(scores, item_matrix, mmr_lambda, candidates):
+    """Textbook MMR over the top `candidates`, one pairwise similarity at a time"""
+    order = list(np.argsort(-scores, kind='stable'))
+    head, tail = order[:candidates], order[candidates:]
+    similarity = similarity_matrix(item_matrix, item_matrix) / 100
+    picked = [head[0]]
+    remaining = head[1:]
+    while remaining:
+        best = max(remaining, key=lambda i: mmr_lambda * scores[i] / 100
+                   - (1 - mmr_lambda) * max(similarity[i, j] for j in picked))
+        picked.append(best)
+        remaining.remove(best)
+    return picked + tail
+
+
+@pytest.mark.parametrize("mmr_lambda", [0.0, 0.3, 0.7, 0.95])
+def test_mmr_order_matches_the_textbook_definition(mmr_lambda):
+    rng = np.random.default_rng(7)
+    scores = rng.uniform(40, 100, 60)
+    item_matrix = rng.random((60, 6))
+    expected = reference_mmr(scores, item_matrix, mmr_lambda, candidates=25)
+    assert mmr_order(scores, item_matrix, mmr_lambda, candidates=25).tolist() == expected
+
+
+def test_near_duplicates_are_spread_out():
+    scores = np.array([90.0, 89.0, 80.0])
+    item_matrix = np.array([[0.9, 0.1], [0.9, 0.1], [0.1, 0.9]])  # the top two are identical
+    assert mmr_order(scores, item_matrix, mmr_lambda=0.7).tolist() == [0, 2, 1]
+
+
+def test_lambda_one_and_short_lists_keep_score_order():
+    rng = np.random.default_rng(0)
+    scores = rng.uniform(0, 100, 10)
+    item_matrix = rng.random((10, 6))
+    assert mmr_order(scores, item_matrix, mmr_lambda=1.0).tolist() == np.argsort(-scores).tolist()
+    assert mmr_order(scores[:2], item_matrix[:2], mmr_lambda=0.0).tolist() == np.argsort(-scores[:2]).tolist()
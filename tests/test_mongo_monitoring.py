@@ -0,0 +1,15 @@
+from mongo_monitoring import COMMANDS_PER_REQUEST, MONGO_TIME_PER_REQUEST, RequestMongoStats
+
+
+def test_unknown_paths_share_one_route_series(api):
+    for path in ("/api/no-such-page", "/api/another/missing/page"):
+        assert api.get(path).status_code == 404
+    for histogram in (COMMANDS_PER_REQUEST, MONGO_TIME_PER_REQUEST):
+        assert ("unmatched",) in histogram._series
+        assert not any("missing" in labels[0] or "no-such" in labels[0] for labels in histogram._series)
+
+
+def test_matched_requests_use_the_route_template(api):
+    api.get("/api/communities/comm_missing")  # 401 without a token; the route still matched
+    assert ("/api/communities/{community_id}",) in COMMANDS_PER_REQUEST._series
+    assert RequestMongoStats().route == "background"
@@ -0,0 +1,69 @@
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import rate_limit
+from rate_limit import RateLimiter, client_ip
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def request(forwarded=None, host="10.0.0.1"):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded is not None else []
+    return Request({"type": "http", "headers": headers, "client": (host, 1234)})
+
+
+def test_bucket_allows_burst_then_refills_at_rate(clock):
+    limiter = RateLimiter("test", rate=2, burst=3)
+    assert [limiter.acquire("a") for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire("a") == pytest.approx(0.5)
+    assert limiter.acquire("b") == 0  # keys are independent
+    clock[0] += 0.5
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") > 0
+
+
+def test_check_raises_429_with_retry_after(clock):
+    limiter = RateLimiter("test", rate=0.1, burst=1)
+    limiter.check("a")
+    with pytest.raises(HTTPException) as error:
+        limiter.check("a")
+    assert error.value.status_code == 429
+    assert error.value.headers["Retry-After"] == "10"
+
+
+def test_evict_drops_only_refilled_buckets(clock):
+    limiter = RateLimiter("test", rate=1, burst=2)
+    limiter.acquire("idle")
+    clock[0] += 0.5
+    limiter.acquire("busy")
+    limiter.acquire("busy")
+    clock[0] += 0.6
+    assert limiter.evict() == 1
+    assert len(limiter) == 1
+    assert limiter.acquire("busy") > 0  # the remaining bucket kept its state
+
+
+def test_forwarded_header_is_ignored_without_trusted_proxies():
+    assert client_ip(request("1.2.3.4"), trusted_proxies=0) == "10.0.0.1"
+
+
+def test_forwarded_hop_is_taken_at_the_trusted_depth():
+    # The client can prepend anything; the trusted proxies append what they saw
+    spoofed = request("6.6.6.6, 203.0.113.7, 10.0.0.2")
+    assert client_ip(spoofed, trusted_proxies=1) == "10.0.0.2"
+    assert client_ip(spoofed, trusted_proxies=2) == "203.0.113.7"
+    assert client_ip(request("203.0.113.7"), trusted_proxies=2) == "10.0.0.1"  # fewer hops than proxies
+    assert client_ip(request(), trusted_proxies=1) == "10.0.0.1"
+
+
+def test_zero_rate_disables_the_limiter(clock):
+    limiter = RateLimiter("test", rate=0, burst=0)
+    assert [limiter.acquire("a") for _ in range(5)] == [0, 0, 0, 0, 0]
+    limiter.check("a")
+    assert len(limiter) == 0
@@ -0,0 +1,38 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import rescore_profiles
+from game_scoring import GAME_TILES, score_selections
+from rescore_profiles import score_chunk, selections_pipeline
+
+
+def test_latest_pick_per_round_is_scored_from_the_table(monkeypatch):
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    db = mongomock_motor.AsyncMongoMockClient()["rescore_test"]
+    played_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    first = [words[0] for words in GAME_TILES]
+    replayed = [words[3] for words in GAME_TILES]
+    rows = [
+        # Generated with 1-based rounds, then replayed from the app with 0-based ones
+        {"user_id": "u1", "round_number": i + 1, "selected_word": word, "timestamp": played_at}
+        for i, word in enumerate(first)
+    ] + [
+        {"user_id": "u1", "round_number": i, "selected_word": word, "timestamp": played_at + timedelta(days=1)}
+        for i, word in enumerate(replayed)
+    ]
+
+    async def scenario():
+        await db.game_responses.insert_many(rows)
+        return [row async for row in db.game_responses.aggregate(selections_pipeline())]
+
+    grouped = asyncio.run(scenario())
+    assert [row["_id"] for row in grouped] == ["u1"]
+    assert sorted(selection["word"] for selection in grouped[0]["selections"]) == sorted(replayed)
+
+    expected = score_selections([{"word": word} for word in replayed])
+    monkeypatch.setattr(rescore_profiles, "score_selections", lambda *args: pytest.fail("fell back to counting"))
+    [operation] = score_chunk(grouped, played_at)
+    assert operation._doc["$set"]["value_profile"] == pytest.approx(expected[0])
+    assert operation._doc["$set"]["environment_preferences"] == expected[1]
@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from resident_index import ResidentIndex
+from reverse_matching import UserProfileIndex
+
+
+def test_top_k_ranks_users_by_profile_distance():
+    index = UserProfileIndex(keys=("adventure", "community"), initial_capacity=1)
+    index.upsert("close", {"adventure": 0.9, "community": 0.5})
+    index.upsert("far", {"adventure": 0.1, "community": 0.5})
+    index.upsert("partial", {"adventure": 0.8})
+    index.upsert("far", {"adventure": 0.2, "community": 0.5})  # replaced in place
+    assert len(index) == 3
+    top = index.top_k({"adventure": 1.0, "community": 0.5}, k=3, exclude=["partial"])
+    assert top == [("close", 95.0), ("far", 60.0)]
+
+
+def test_stale_index_keeps_serving_while_it_reloads_in_the_background():
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    db = mongomock_motor.AsyncMongoMockClient()["reverse_matching_test"]
+
+    async def scenario():
+        await db.users.insert_one({"user_id": "u_old", "value_profile": {"experiential": 1.0}})
+        index = UserProfileIndex()
+        await index.ensure_loaded(db)
+        assert len(index) == 1
+
+        await db.users.insert_one({"user_id": "u_new", "value_profile": {"experiential": 0.5}})
+        index.loaded_at -= index.refresh_seconds
+        await index.ensure_loaded(db)  # returns without waiting for the reload
+        assert index.reloading
+        assert [user_id for user_id, _ in index.top_k({"experiential": 1.0}, k=5)] == ["u_old"]
+        await index._reload_task
+        assert [user_id for user_id, _ in index.top_k({"experiential": 1.0}, k=5)] == ["u_old", "u_new"]
+
+    asyncio.run(scenario())
+
+
+def test_resident_index_hooks_are_abstract():
+    with pytest.raises(TypeError):
+        ResidentIndex()
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from search import SearchIndex
+
+
+def community(community_id, name, description="", tags=(), value_profile=None):
+    return {"community_id": community_id, "name": name, "description": description, "tags": list(tags),
+            "value_profile": value_profile or {}}
+
+
+def ids(hits):
+    return [hit.get("community_id") or hit.get("event_id") for hit in hits]
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex(initial_capacity=2)  # small, so adding grows the arrays
+    index.add("community", community("c_name", "Hiking club", "Weekend walks"))
+    index.add("community", community("c_tag", "Outdoors", "Weekend walks", tags=["hiking"]))
+    index.add("community", community("c_desc", "Walkers", "Hiking and walking every weekend"))
+    index.add("community", community("c_other", "Book club", "Reading together"))
+    index.add("event", {"event_id": "e_hike", "name": "Hiking day", "event_type": "outdoor"})
+    return index
+
+
+def test_bm25_weighs_name_over_tags_over_description(index):
+    assert ids(index.search("hiking", kind="community")) == ["c_name", "c_tag", "c_desc"]
+
+
+def test_rare_terms_score_higher_than_common_ones(index):
+    scores = index.text_scores("weekend reading", prefix=False)
+    assert scores[3] > scores[0] > 0  # "reading" appears once, "weekend" three times
+
+
+def test_last_word_matches_as_a_prefix(index):
+    assert set(ids(index.search("hik"))) == {"c_name", "c_tag", "c_desc", "e_hike"}
+    assert index.search("hik", prefix=False) == []
+    assert ids(index.search("book cl"))[0] == "c_other"
+
+
+def test_readding_an_item_replaces_it(index):
+    index.add("community", community("c_other", "Chess club"))
+    assert len(index) == 5
+    assert index.search("book", prefix=False) == []
+    assert ids(index.search("chess")) == ["c_other"]
+    for _ in range(5):  # replaced rows must not inflate document frequency
+        index.add("community", community("c_name", "Hiking club", "Weekend walks"))
+    assert ids(index.search("hiking", kind="community")) == ["c_name", "c_tag", "c_desc"]
+
+
+def test_value_profile_reranks_text_hits(index):
+    index.add("community", community("c_name", "Hiking club", value_profile={"experiential": 0.0}))
+    index.add("community", community("c_tag", "Hiking group", value_profile={"experiential": 1.0}))
+    query = dict(kind="community", value_profile={"experiential": 1.0})
+    assert ids(index.search("hiking", **query, profile_weight=0.0))[0] == "c_name"
+    assert ids(index.search("hiking", **query, profile_weight=0.9))[0] == "c_tag"
+
+
+def test_stale_index_keeps_serving_while_it_reloads_in_the_background():
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    db = mongomock_motor.AsyncMongoMockClient()["search_test"]
+
+    async def scenario():
+        await db.communities.insert_one(community("c_old", "Hiking club"))
+        index = SearchIndex()
+        await index.ensure_loaded(db)
+        assert ids(index.search("hiking")) == ["c_old"]
+
+        await db.communities.insert_one(community("c_new", "Hiking group"))
+        index.loaded_at -= index.refresh_seconds
+        await index.ensure_loaded(db)  # returns without waiting for the reload
+        assert index.reloading
+        assert ids(index.search("hiking")) == ["c_old"]
+        await index._reload_task
+        assert set(ids(index.search("hiking"))) == {"c_old", "c_new"}
+        assert not index.is_stale
+
+    asyncio.run(scenario())
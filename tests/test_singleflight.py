@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight("test")
+    calls = []
+
+    async def fetch(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return f"value of {key}"
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do(key, lambda key=key: fetch(key)) for key in "aab" * 3))
+
+    assert asyncio.run(scenario()) == ["value of a", "value of a", "value of b"] * 3
+    assert sorted(calls) == ["a", "b"]
+
+
+def test_exception_reaches_every_waiter_and_the_next_call_runs_again():
+    flights = SingleFlight("test")
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def scenario():
+        results = await asyncio.gather(flights.do("k", failing), flights.do("k", failing), return_exceptions=True)
+        assert [type(result) for result in results] == [ValueError, ValueError]
+        with pytest.raises(ValueError):
+            await flights.do("k", failing)
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_call():
+    flights = SingleFlight("test")
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def scenario():
+        first = asyncio.ensure_future(flights.do("k", slow))
+        second = asyncio.ensure_future(flights.do("k", slow))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == "done"